@@ -83,6 +83,16 @@ class OMMethodNotAllowedException(OMControllerException):
     pass
 
 
+class OMNotModifiedException(OMControllerException):
+    """ 304 Not Modified
+
+    Its `headers` attribute contains the validators (`ETag`, `Last-Modified`) to send back.
+    """
+    def __init__(self, headers=None):
+        OMControllerException.__init__(self, u"Not modified")
+        self.headers = headers if headers is not None else {}
+
+
 class OMNotAcceptableException(OMControllerException):
     """ 406 Not Acceptable
 
@@ -243,5 +253,13 @@ class OMAlreadyGeneratedAttributeError(OMInternalError):
     pass
 
 
+class OMOutdatedCacheEntryError(OMInternalError):
+    """The cached state of a resource does not match its current models.
+
+    Happens when the schema or the JSON-LD context has changed since the resource was cached.
+    """
+    pass
+
+
 class UnsupportedDataStorageFeatureException(OMDataStoreError):
     """Feature not supported by the data store."""
\ No newline at end of file
@@ -1,3 +1,4 @@
+from threading import Lock
 from uuid import uuid1
 from .exception import OMDataStoreError, OMRequiredHashlessIRIError
 
@@ -17,6 +18,16 @@ class IriGenerator(object):
         """
         raise NotImplementedError()
 
+    def generate_many(self, count, **kwargs):
+        """Generates some IRIs at once.
+
+        By default, calls :func:`~oldman.iri.IriGenerator.generate` for each IRI.
+
+        :param count: Number of IRIs.
+        :return: List of unique IRIs.
+        """
+        return [self.generate(**kwargs) for _ in range(count)]
+
 
 class PrefixedUUIDIriGenerator(IriGenerator):
     """Uses a prefix, a fragment and a unique UUID1 number to generate IRIs.
@@ -56,36 +67,74 @@ class IncrementalIriGenerator(IriGenerator):
     Beautiful but **slow** in concurrent settings. The number generation implies a critical section
     and a sequence of two SPARQL requests, which represents a significant bottleneck.
 
+    This bottleneck is mitigated by the hi/lo allocation: when `block_size` is greater than 1,
+    blocks of numbers are reserved at once in the data store and then handed out locally.
+    Unused numbers of the current block are lost when the process ends (gaps in the sequence).
+
     :param prefix: IRI prefix.
     :param graph: :class:`rdflib.Graph` object where to store the counter.
     :param class_iri: IRI of the RDFS class of which new :class:`~oldman.resource.Resource` objects are instance of.
                       Usually corresponds to the class IRI of the :class:`~oldman.model.Model` object that
                       owns this generator.
     :param fragment: IRI fragment to append to the hash-less IRI. Defaults to `None`.
+    :param block_size: Number of numbers reserved at once. Defaults to `1` (no local allocation).
     """
 
-    def __init__(self, prefix, data_store, class_iri, fragment=None):
+    def __init__(self, prefix, data_store, class_iri, fragment=None, block_size=1):
         self._prefix = prefix
         self._data_store = data_store
         self._class_iri = class_iri
         self._fragment = fragment
+        self._block_size = block_size
+
+        # Current block (hi/lo)
+        self._next_number = None
+        self._block_end = None
+        self._lock = Lock()
 
         self._data_store.check_and_repair_counter(class_iri)
 
     def generate(self, **kwargs):
         """See :func:`oldman.iri.IriGenerator.generate`."""
-        number = self._data_store.generate_instance_number(self._class_iri)
+        if self._block_size > 1:
+            number = self._allocate_number()
+        else:
+            number = self._data_store.generate_instance_number(self._class_iri)
+        return self._build_iri(number)
 
-        partial_iri = u"%s%d" % (self._prefix, number)
-        if self._fragment is not None:
-            return u"%s#%s" % (partial_iri, self._fragment)
-        return partial_iri
+    def generate_many(self, count, **kwargs):
+        """See :func:`oldman.iri.IriGenerator.generate_many`.
+
+        The numbers are reserved within one call to the data store.
+        """
+        if count == 0:
+            return []
+        first_number = self._data_store.reserve_instance_numbers(self._class_iri, count)
+        return [self._build_iri(n) for n in range(first_number, first_number + count)]
 
     def reset_counter(self):
         """
         For test purposes only
         """
-        self._data_store.reset_instance_counter(self._class_iri)
+        with self._lock:
+            self._next_number = None
+            self._block_end = None
+            self._data_store.reset_instance_counter(self._class_iri)
+
+    def _build_iri(self, number):
+        partial_iri = u"%s%d" % (self._prefix, number)
+        if self._fragment is not None:
+            return u"%s#%s" % (partial_iri, self._fragment)
+        return partial_iri
+
+    def _allocate_number(self):
+        with self._lock:
+            if self._next_number is None or self._next_number > self._block_end:
+                self._next_number = self._data_store.reserve_instance_numbers(self._class_iri, self._block_size)
+                self._block_end = self._next_number + self._block_size - 1
+            number = self._next_number
+            self._next_number += 1
+        return number
 
 
 class UUIDFragmentIriGenerator(IriGenerator):
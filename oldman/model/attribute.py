@@ -2,7 +2,7 @@ import logging
 from collections import namedtuple
 from weakref import WeakKeyDictionary
 
-from rdflib import Literal
+from rdflib import Literal, BNode, RDF, URIRef
 
 from oldman.exception import OMAttributeTypeCheckError, OMRequiredPropertyError, OMReadOnlyAttributeError, OMEditError
 from oldman.parsing.value import AttributeValueExtractor
@@ -213,10 +213,12 @@ class OMAttribute(object):
         value = entry.current_value if entry is not None else None
         return self.value_to_nt(value)
 
-    def value_to_nt(self, value):
+    def value_to_nt(self, value, blank_list_nodes=False):
         """Converts value(s) to N-Triples (NT) triples.
 
         :param value: Value of property.
+        :param blank_list_nodes: If `True`, RDF list nodes are blank nodes instead of skolemized IRIs.
+                                 Defaults to `False`.
         :return: N-Triples serialization of this value.
         """
         if value is None:
@@ -234,14 +236,15 @@ class OMAttribute(object):
         if self.container == "@list":
             # list_value = u"( " + u" ".join(converted_values) + u" )"
             # List with skolemized nodes
-            first_node = "<%s>" % _skolemize()
+            new_node = (lambda: BNode().n3()) if blank_list_nodes else (lambda: u"<%s>" % _skolemize())
+            first_node = new_node()
             node = first_node
             for v in converted_values:
-                lines += u'  %s rdf:first %s .\n' % (node, v)
+                lines += u'  %s <%s> %s .\n' % (node, RDF.first, v)
                 previous_node = node
-                node = "<%s>" % _skolemize()
-                lines += u'  %s rdf:rest %s .\n' % (previous_node, node)
-            lines += u'  %s rdf:rest rdf:nil .\n' % node
+                node = new_node()
+                lines += u'  %s <%s> %s .\n' % (previous_node, RDF.rest, node)
+            lines += u'  %s <%s> <%s> .\n' % (node, RDF.rest, RDF.nil)
             serialized_values = [first_node]
         else:
             serialized_values = converted_values
@@ -281,11 +284,11 @@ class OMAttribute(object):
         if language is None:
             language = self.language
         if jsonld_type == "@id":
-            return u"<%s>" % value
+            return URIRef(value).n3()
         elif language:
-            return u'"%s"@%s' % (Literal(value), language)
+            return u'%s@%s' % (_quote_literal(Literal(value)), language)
         elif jsonld_type:
-            return u'"%s"^^<%s>' % (Literal(value), jsonld_type)
+            return u'%s^^<%s>' % (_quote_literal(Literal(value, datatype=jsonld_type)), jsonld_type)
         # Should we really define unknown types as string?
         else:
             raise NotImplementedError(u"Untyped JSON-LD value are not (yet?) supported")
@@ -330,6 +333,17 @@ class OMAttribute(object):
 
         entry.current_value = value
 
+    def set_stored_value(self, resource, value):
+        """Sets a value that comes from the data store (e.g. through the cache).
+
+        Not for end-users! By contrast with :func:`~oldman.attribute.OMAttribute.set`,
+        this value is not checked and is considered as already saved.
+
+        :param resource: :class:`~oldman.resource.Resource` object.
+        :param value: Its stored value for this attribute (IRIs for objects).
+        """
+        self._entries[resource] = Entry(value)
+
     def check_value(self, value):
         """Checks a new **when assigned**.
 
@@ -359,6 +373,13 @@ class OMAttribute(object):
         """TODO: describe. Clearly not for end-users!!! """
         return self._entries.get(resource)
 
+    def copy_entry(self, resource, new_resource):
+        """Gives a clone of the entry of `resource` to `new_resource` (no validation).
+        Clearly not for end-users!!! """
+        entry = self._entries.get(resource)
+        if entry is not None:
+            self._entries[new_resource] = entry.clone()
+
     def set_entry(self, resource, entry):
         """TODO: describe. Clearly not for end-users!!! """
         # Validation
@@ -414,8 +435,8 @@ class ObjectOMAttribute(OMAttribute):
         """
         iris = OMAttribute.get(self, resource)
         if isinstance(iris, (list, set)):
-            # Returns a generator
-            return (resource.get_related_resource(id=iri) for iri in iris)
+            # Returns a generator (related resources are retrieved in bulk at the first iteration)
+            return _generate_related_resources(resource, list(iris))
         elif isinstance(iris, dict):
             raise NotImplementedError(u"Should we implement it?")
         elif iris is not None:
@@ -456,6 +477,12 @@ class ObjectOMAttribute(OMAttribute):
         OMAttribute.set(self, resource, values)
 
 
+def _generate_related_resources(resource, iris):
+    """Generator that retrieves all the related resources at once, keeping the order of `iris`."""
+    for related_resource in resource.get_related_resources(iris):
+        yield related_resource
+
+
 class Entry(object):
     """ Mutable.
 
@@ -507,6 +534,8 @@ class Entry(object):
         return value
 
 
-
-
-
+def _quote_literal(literal):
+    """Quotes the lexical form of a literal according to the N-Triples syntax
+    (:func:`rdflib.Literal.n3` may produce long Turtle strings)."""
+    return u'"%s"' % (literal.replace(u'\\', u'\\\\').replace(u'\n', u'\\n').replace(u'\r', u'\\r')
+                      .replace(u'"', u'\\"'))
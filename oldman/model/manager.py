@@ -41,9 +41,12 @@ class ModelManager(object):
         self._schema_graph = schema_graph
         self._operation_functions = {}
         self._registry = ModelRegistry()
+        # {tuple of models: tuple of (name, attribute) pairs}
+        self._serializable_attributes = {}
         self._logger = logging.getLogger(__name__)
 
         self._include_reversed_attributes = False
+        self._list_property_iris = set()
 
         # TODO: examine their relevance
         if declare_default_operation_functions:
@@ -59,6 +62,11 @@ class ModelManager(object):
         """Is `True` if at least one of its models use some reversed attributes."""
         return self._include_reversed_attributes
 
+    @property
+    def list_property_iris(self):
+        """Set of the IRIs of the RDF properties whose values are RDF lists in at least one of its models."""
+        return set(self._list_property_iris)
+
     @property
     def models(self):
         """TODO: describe."""
@@ -91,13 +99,39 @@ class ModelManager(object):
         """See :func:`oldman.resource.registry.ModelRegistry.find_models_and_types`."""
         return self._registry.find_models_and_types(type_set)
 
+    def find_serializable_attributes(self, models):
+        """Finds the attributes of some models that are serialized into a `dict`, with their names.
+
+        Like attribute access, the first model declaring an attribute name prevails.
+        Write-only attributes are excluded. Results are cached.
+
+        :param models: Ordered list of :class:`~oldman.model.Model` objects.
+        :return: A tuple of (name, :class:`~oldman.attribute.OMAttribute` object) pairs.
+        """
+        key = tuple(models)
+        attributes = self._serializable_attributes.get(key)
+        if attributes is None:
+            attributes = []
+            names = set()
+            for model in models:
+                for name in model.om_attributes:
+                    if name in names:
+                        continue
+                    names.add(name)
+                    attr = model.access_attribute(name)
+                    if not attr.is_write_only:
+                        attributes.append((name, attr))
+            attributes = tuple(attributes)
+            self._serializable_attributes[key] = attributes
+        return attributes
+
     def find_descendant_models(self, top_ancestor_name_or_iri):
         """TODO: explain. Includes the top ancestor. """
         return self._registry.find_descendant_models(top_ancestor_name_or_iri)
 
     def create_model(self, class_name_or_iri, context_iri_or_payload, data_store, iri_prefix=None, iri_fragment=None,
                      iri_generator=None, untyped=False, incremental_iri=False, is_default=False,
-                     context_file_path=None):
+                     context_file_path=None, iri_block_size=1):
         """Creates a :class:`~oldman.model.Model` object.
 
         TODO: remove data_store from the constructor!
@@ -126,6 +160,9 @@ class ModelManager(object):
                :class:`~oldman.iri.RandomPrefixedIriGenerator`. Defaults to `False`.
                Has no effect if `iri_prefix` is not given.
         :param context_file_path: TODO: describe.
+        :param iri_block_size: Number of instance numbers reserved at once by the
+               :class:`~oldman.iri.IncrementalIriGenerator` (hi/lo allocation). Defaults to `1`.
+               Has no effect if `incremental_iri` is `False`.
         """
 
         # Only for the DefaultModel
@@ -144,8 +181,8 @@ class ModelManager(object):
             id_generator = iri_generator
         elif iri_prefix is not None:
             if incremental_iri:
-                id_generator = IncrementalIriGenerator(iri_prefix, data_store,
-                                                       class_iri, fragment=iri_fragment)
+                id_generator = IncrementalIriGenerator(iri_prefix, data_store, class_iri, fragment=iri_fragment,
+                                                       block_size=iri_block_size)
             else:
                 id_generator = PrefixedUUIDIriGenerator(iri_prefix, fragment=iri_fragment)
         else:
@@ -161,6 +198,8 @@ class ModelManager(object):
         # Reversed attributes awareness
         if not self._include_reversed_attributes:
             self._include_reversed_attributes = model.has_reversed_attributes
+        # RDF list awareness
+        self._list_property_iris.update(model.list_property_iris)
 
         # Anonymous classes derived from hydra:Link properties
         self._create_anonymous_models(model, context_file_path, data_store)
@@ -206,9 +245,12 @@ class ClientModelManager(ModelManager):
             # Default model
             client_model = self.get_model(None)
         else:
-            client_model = ClientModel.copy_store_model(self._resource_manager, store_model)
-            # Hierarchy registration
-            self._registry.register(client_model, is_default=False)
+            # Same RDFS class in multiple stores: shared client model
+            client_model = self.get_model(store_model.class_iri)
+            if client_model is None:
+                client_model = ClientModel.copy_store_model(self._resource_manager, store_model)
+                # Hierarchy registration
+                self._registry.register(client_model, is_default=False)
         # Converter
         converter = EquivalentModelConverter(client_model, store_model)
         self._conversion_manager.register_model_converter(client_model, store_model, data_store, converter)
@@ -1,4 +1,5 @@
 import logging
+from hashlib import md5
 from oldman.exception import OMReservedAttributeNameError, OMAttributeAccessError
 
 
@@ -59,6 +60,10 @@ class Model(object):
                                    if op.name is not None}
 
         self._has_reversed_attributes = True in [a.reversed for a in self._om_attributes.values()]
+        self._list_property_iris = {a.om_property.iri for a in self._om_attributes.values()
+                                    if a.container == "@list" and not a.reversed}
+        self._attribute_layout = tuple(self._om_attributes[name] for name in sorted(self._om_attributes))
+        self._fingerprint = compute_fingerprint(class_iri, self._attribute_layout)
         self._logger = logging.getLogger(__name__)
 
     @property
@@ -107,6 +112,25 @@ class Model(object):
         """Is `True` if one of its attributes is reversed."""
         return self._has_reversed_attributes
 
+    @property
+    def list_property_iris(self):
+        """Set of the IRIs of the (non-reversed) RDF properties whose values are RDF lists
+        (attributes declared with `"@container": "@list"`)."""
+        return set(self._list_property_iris)
+
+    @property
+    def attribute_layout(self):
+        """Tuple of its :class:`~oldman.attribute.OMAttribute` objects, ordered by name.
+
+        Used for serializing resources compactly.
+        """
+        return self._attribute_layout
+
+    @property
+    def fingerprint(self):
+        """Short string that changes when its attribute layout or the metadata of its attributes change."""
+        return self._fingerprint
+
     def get_operation(self, http_method):
         """TODO: describe"""
         return self._operations.get(http_method)
@@ -152,6 +176,14 @@ class Model(object):
         """
         return self._id_generator.generate(**kwargs)
 
+    def generate_iris(self, count, **kwargs):
+        """Generates some new IRIs at once (bulk creation).
+
+        :param count: Number of IRIs.
+        :return: A list of new IRIs.
+        """
+        return self._id_generator.generate_many(count, **kwargs)
+
     def reset_counter(self):
         """Resets the counter of the IRI generator.
 
@@ -229,15 +261,28 @@ class ClientModel(Model):
         """
         return self.new(id=id, hashless_iri=hashless_iri, collection_iri=collection_iri, **kwargs).save()
 
-    def filter(self, hashless_iri=None, limit=None, eager=False, pre_cache_properties=None, **kwargs):
+    def filter(self, hashless_iri=None, limit=None, eager=False, pre_cache_properties=None, order_by=None,
+               after=None, **kwargs):
         """Finds the :class:`~oldman.resource.Resource` objects matching the given criteria.
 
         The `class_iri` attribute is added to the `types`.
 
-        See :func:`oldman.resource.finder.ResourceFinder.filter` for further details."""
+        See :func:`oldman.store.datastore.DataStore.filter` for further details
+        (including keyset pagination with `order_by` and `after`)."""
         types, kwargs = self._update_kwargs_and_types(kwargs)
         return self._resource_manager.filter(types=types, hashless_iri=hashless_iri, limit=limit, eager=eager,
-                                             pre_cache_properties=pre_cache_properties, **kwargs)
+                                             pre_cache_properties=pre_cache_properties, order_by=order_by,
+                                             after=after, **kwargs)
+
+    def count(self, hashless_iri=None, **kwargs):
+        """Counts the :class:`~oldman.resource.Resource` objects matching the given criteria,
+        without retrieving them.
+
+        The `class_iri` attribute is added to the `types`.
+
+        See :func:`oldman.store.datastore.DataStore.count` for further details."""
+        types, kwargs = self._update_kwargs_and_types(kwargs)
+        return self._resource_manager.count(types=types, hashless_iri=hashless_iri, **kwargs)
 
     def get(self, id=None, hashless_iri=None, **kwargs):
         """Gets the first :class:`~oldman.resource.Resource` object matching the given criteria.
@@ -255,7 +300,7 @@ class ClientModel(Model):
         return self._resource_manager.get(id=id, types=types, hashless_iri=hashless_iri,
                                           eager_with_reversed_attributes=eager_with_reversed_attributes, **kwargs)
 
-    def all(self, limit=None, eager=False):
+    def all(self, limit=None, eager=False, order_by=None, after=None):
         """Finds every :class:`~oldman.resource.Resource` object that is instance
         of its RDFS class.
 
@@ -263,9 +308,22 @@ class ClientModel(Model):
                       Defaults to `None`.
         :param eager: If `True` loads all the Resource objects within one single SPARQL query.
                       Defaults to `False` (lazy).
+        :param order_by: Name of the attribute to order by (see :func:`oldman.store.datastore.DataStore.filter`).
+                         Defaults to `None`.
+        :param after: Cursor of the last resource of the previous page
+                      (see :func:`~oldman.utils.cursor.build_cursor`). Defaults to `None`.
         :return: A generator of :class:`~oldman.resource.Resource` objects.
         """
-        return self.filter(types=[self._class_iri], limit=limit, eager=eager)
+        return self.filter(types=[self._class_iri], limit=limit, eager=eager, order_by=order_by, after=after)
+
+    def export(self, format="nt", chunk_size=1000):
+        """Streams every instance of its RDFS class.
+
+        See :func:`oldman.resource.manager.ClientResourceManager.export` for further details.
+
+        :return: A generator of unicode strings (one per chunk).
+        """
+        return self._resource_manager.export([self._class_iri], format=format, chunk_size=chunk_size)
 
     def _update_kwargs_and_types(self, kwargs, include_ancestry=False):
         types = list(self._class_types) if include_ancestry else [self._class_iri]
@@ -275,6 +333,22 @@ class ClientModel(Model):
         return types, kwargs
 
 
+def compute_fingerprint(key, attribute_layout):
+    """Computes a short string that changes when the key, the attribute layout or the metadata
+    of its attributes change.
+
+    Used for the fingerprints of the models and of the pickled resources
+    (see :func:`~oldman.resource.StoreResource.__getstate__`).
+
+    :param key: Representable object (e.g. a class IRI).
+    :param attribute_layout: Ordered collection of :class:`~oldman.attribute.OMAttribute` objects.
+    :return: An 8-character hexadecimal string.
+    """
+    description = repr((key, [(a.name, a.om_property.iri, a.container, a.language, a.jsonld_type, a.reversed)
+                              for a in attribute_layout]))
+    return md5(description.encode("utf-8")).hexdigest()[:8]
+
+
 def clean_context(context):
     """Cleans the context.
 
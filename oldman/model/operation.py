@@ -2,10 +2,9 @@
 TODO: explain
 """
 
-from rdflib import URIRef, Graph
 from oldman.vocabulary import HYDRA_MEMBER_IRI
 from oldman.utils.crud import extract_subjects, create_regular_resources, create_blank_nodes
-from oldman.exception import OMBadRequestException
+from oldman.exception import OMBadRequestException, OMEditError
 
 
 class Operation(object):
@@ -52,6 +51,11 @@ def append_to_hydra_collection(collection_resource, new_resources=None, graph=No
 
 
 def _append_to_hydra_coll_from_graph(collection_resource, graph):
+    new_resources = _create_resources_from_graph(collection_resource, graph)
+    return _append_resources_to_hydra_collection(collection_resource, new_resources)
+
+
+def _create_resources_from_graph(collection_resource, graph):
     collection_iri = collection_resource.id
     resource_manager = collection_resource.model_manager.resource_manager
 
@@ -65,26 +69,52 @@ def _append_to_hydra_coll_from_graph(collection_resource, graph):
     # TODO: ask if it should be accepted
     reg_resources, _ = create_regular_resources(resource_manager, graph, other_subjects, collection_iri=collection_iri)
     new_resources += reg_resources
+    return new_resources
 
-    return _append_resources_to_hydra_collection(collection_resource, new_resources)
 
+def _get_member_attributes(collection_resource):
+    return [attr for model in collection_resource.models for attr in model.om_attributes.values()
+            if attr.om_property.iri == HYDRA_MEMBER_IRI and not attr.reversed]
 
-def _append_resources_to_hydra_collection(collection_resource, new_resources):
-    # Check that they are valid
+
+def _check_new_resources(new_resources):
     for new_resource in new_resources:
         if not new_resource.is_valid():
             # TODO: find a better exception
             raise OMBadRequestException("One resource is not valid")
 
-    collection_graph = Graph().parse(data=collection_resource.to_rdf(rdf_format="nt"), format="nt")
+
+def _append_resources_to_hydra_collection(collection_resource, new_resources):
+    _check_new_resources(new_resources)
+    # The new members cannot be added to members that have not been saved
+    if any(attr.has_changed(collection_resource) for attr in _get_member_attributes(collection_resource)):
+        raise OMEditError(u"The members of %s have unsaved changes. Please save it first." % collection_resource.id)
+
     for new_resource in new_resources:
         new_resource.save()
-        collection_graph.add((URIRef(collection_resource.id), URIRef(HYDRA_MEMBER_IRI), URIRef(new_resource.id)))
-    collection_resource.update_from_graph(collection_graph)
+    # Only the new member triples are inserted (the collection is not re-saved)
+    new_iris = [r.id for r in new_resources]
+    collection_resource.store.add_object_values(collection_resource.id, HYDRA_MEMBER_IRI, new_iris)
+    # Not possible for a single-valued member attribute: its in-memory value is then left as is
+    collection_resource.add_stored_object_values(HYDRA_MEMBER_IRI, new_iris)
 
 
 def append_to_hydra_paged_collection(collection, graph=None, new_resources=None, **kwargs):
-    raise NotImplementedError("TODO: implement me!")
+    """Appends new members to a `hydra:PagedCollection`.
+
+    Unlike :func:`append_to_hydra_collection`, the collection is neither loaded nor re-saved:
+    only the new `hydra:member` triples are inserted.
+    """
+    if new_resources is not None and graph is not None:
+        # TODO: throw the right exception
+        raise Exception("Cannot add new_resources and graphs in the same time")
+    elif new_resources is None:
+        new_resources = _create_resources_from_graph(collection, graph)
+
+    _check_new_resources(new_resources)
+    for new_resource in new_resources:
+        new_resource.save()
+    collection.store.add_object_values(collection.id, HYDRA_MEMBER_IRI, [r.id for r in new_resources])
 
 
 def not_implemented(resource, **kwargs):
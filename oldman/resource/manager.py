@@ -1,9 +1,18 @@
+import json
+import logging
+from collections import OrderedDict
+from rdflib import Graph, RDF, URIRef
+from oldman.exception import OMClassInstanceError, OMUserError
 from oldman.resource.resource import ClientResource
+from oldman.utils.bulk import read_nt_chunks
+from oldman.utils.crud import extract_subjects, alter_bnode_triples
 from oldman.store.selector import DataStoreSelector
 from oldman.model.manager import ClientModelManager
 
 
 DEFAULT_MODEL_NAME = "Default_Client"
+# Export format -> RDFlib serialization format (None: JSON-LD lines)
+EXPORT_FORMATS = {"nt": "nt", "turtle": "turtle", "jsonld": None}
 
 
 class ClientResourceManager:
@@ -12,11 +21,12 @@ class ClientResourceManager:
     """
 
     def __init__(self, data_stores, schema_graph=None, attr_extractor=None, oper_extractor=None,
-                 declare_default_operation_functions=True):
+                 declare_default_operation_functions=True, max_workers=None, store_timeout=None):
         self._model_manager = ClientModelManager(self, schema_graph=schema_graph, attr_extractor=attr_extractor,
                                                  oper_extractor=oper_extractor,
                                                  declare_default_operation_functions=declare_default_operation_functions)
-        self._store_selector = DataStoreSelector(data_stores)
+        self._store_selector = DataStoreSelector(data_stores, max_workers=max_workers, store_timeout=store_timeout)
+        self._logger = logging.getLogger(__name__)
 
         # Default model
         self._model_manager.create_model(DEFAULT_MODEL_NAME, {u"@context": {}}, self, untyped=True,
@@ -27,6 +37,11 @@ class ClientResourceManager:
     def model_manager(self):
         return self._model_manager
 
+    @property
+    def store_selector(self):
+        """:class:`~oldman.store.selector.DataStoreSelector` object. Routes the requests to the data stores."""
+        return self._store_selector
+
     def declare_method(self, method, name, class_iri):
         """Attaches a method to the :class:`~oldman.resource.Resource` objects that are instances of a given RDFS class.
 
@@ -88,14 +103,39 @@ class ClientResourceManager:
                         collection_iri=collection_iri, **kwargs).save()
 
     def get(self, id=None, types=None, hashless_iri=None, eager_with_reversed_attributes=True, **kwargs):
-        """See :func:`oldman.store.datastore.DataStore.get`."""
-        #TODO: consider parallelism
-        store_resources = [store.get(id=id, types=types, hashless_iri=hashless_iri,
-                                     eager_with_reversed_attributes=eager_with_reversed_attributes, **kwargs)
-                           for store in self._store_selector.select_stores(id=id, types=types,
-                                                                           hashless_iri=hashless_iri, **kwargs)]
-        returned_store_resources = filter(lambda x: x, store_resources)
-        resources = self._model_manager.convert_store_resources(returned_store_resources)
+        """See :func:`oldman.store.datastore.DataStore.get`.
+
+        The selected stores are queried concurrently. Resources described by a store (i.e. having types)
+        are preferred to the empty ones returned by the other stores. When the same resource is
+        described by multiple stores, the first selected store prevails.
+        """
+        stores = self._store_selector.select_stores(id=id, types=types, hashless_iri=hashless_iri, **kwargs)
+
+        def get_resource(store):
+            try:
+                return store.get(id=id, types=types, hashless_iri=hashless_iri,
+                                 eager_with_reversed_attributes=eager_with_reversed_attributes, **kwargs)
+            except OMClassInstanceError as e:
+                # May be described by another store
+                return e
+
+        resources_by_store = dict(self._store_selector.map_stores(get_resource, stores))
+        results = [resources_by_store[store] for store in stores if store in resources_by_store]
+        errors = [r for r in results if isinstance(r, OMClassInstanceError)]
+        store_resources = [r for r in results if r and not isinstance(r, OMClassInstanceError)]
+
+        described_resources = [r for r in store_resources if len(r.types) > 0]
+        if len(described_resources) > 0:
+            store_resources = described_resources
+        elif len(errors) > 0:
+            raise errors[0]
+
+        returned_store_resources = OrderedDict()
+        for store_resource in store_resources:
+            if store_resource.id not in returned_store_resources:
+                returned_store_resources[store_resource.id] = store_resource
+
+        resources = self._model_manager.convert_store_resources(returned_store_resources.values())
         resource_count = len(resources)
         if resource_count == 1:
             return resources[0]
@@ -105,16 +145,199 @@ class ClientResourceManager:
         #TODO: see if relevant
         raise Exception("Non unique object")
 
-    def filter(self, types=None, hashless_iri=None, limit=None, eager=False, pre_cache_properties=None, **kwargs):
-        """See :func:`oldman.store.datastore.DataStore.filter`."""
+    def get_many(self, ids):
+        """See :func:`oldman.store.datastore.DataStore.get_many`.
+
+        The selected stores are queried concurrently. Like in
+        :func:`~oldman.resource.manager.ClientResourceManager.get`, described resources
+        are preferred and the first selected store prevails.
+
+        :return: A list of :class:`~oldman.resource.resource.ClientResource` objects (or `None`)
+                 in the same order than `ids`.
+        """
+        ids = list(ids)
+        # Routing
+        ids_by_stores = self._store_selector.group_ids_by_stores(ids)
+        stores = [s for s in self._store_selector.data_stores if s in ids_by_stores]
+        results_by_store = dict(self._store_selector.map_stores(lambda store: store.get_many(ids_by_stores[store]),
+                                                                stores))
+
+        store_resources = {}
+        for store in stores:
+            for id, resource in zip(ids_by_stores[store], results_by_store.get(store, [])):
+                if resource is None:
+                    continue
+                selected_resource = store_resources.get(id)
+                if selected_resource is None or (len(selected_resource.types) == 0 and len(resource.types) > 0):
+                    store_resources[id] = resource
+
+        resources = {r.id: r for r in self._model_manager.convert_store_resources(store_resources.values())}
+        return [resources.get(id) for id in ids]
+
+    def filter(self, types=None, hashless_iri=None, limit=None, eager=False, pre_cache_properties=None,
+               order_by=None, after=None, **kwargs):
+        """See :func:`oldman.store.datastore.DataStore.filter`.
+
+        The selected stores are queried concurrently and their results are merged as they arrive.
+        Resources returned by multiple stores appear only once and no more than `limit` resources are returned.
+        Ordered results (`order_by` or `after`) of multiple stores are merged in the keyset order
+        (ordering key, then IRI) before being truncated.
+        """
         #TODO: support again generator. Find a way to aggregate them.
-        resources = [r for store in self._store_selector.select_stores(types=types, hashless_iri=hashless_iri,
-                                                                       pre_cache_properties=pre_cache_properties,
-                                                                       **kwargs)
-                     for r in store.filter(types=types, hashless_iri=hashless_iri, limit=limit, eager=eager,
-                                           pre_cache_properties=pre_cache_properties, **kwargs)]
+        stores = self._store_selector.select_stores(types=types, hashless_iri=hashless_iri,
+                                                    pre_cache_properties=pre_cache_properties, **kwargs)
+        filter_store = lambda store: list(store.filter(types=types, hashless_iri=hashless_iri, limit=limit,
+                                                       eager=eager, pre_cache_properties=pre_cache_properties,
+                                                       order_by=order_by, after=after, **kwargs))
+        resources = []
+        ids = set()
+        for store, store_resources in self._store_selector.map_stores(filter_store, stores):
+            for r in store_resources:
+                if r.id not in ids:
+                    ids.add(r.id)
+                    resources.append(r)
+        if (order_by is not None or after is not None) and len(stores) > 1:
+            resources.sort(key=lambda r: _get_ordering_key(r, order_by))
+        if limit is not None:
+            resources = resources[:limit]
         return self._model_manager.convert_store_resources(resources)
 
+    def count(self, types=None, hashless_iri=None, **kwargs):
+        """See :func:`oldman.store.datastore.DataStore.count`.
+
+        The selected stores are queried concurrently and their counts are summed
+        (a resource described by multiple stores is counted multiple times).
+        """
+        stores = self._store_selector.select_stores(types=types, hashless_iri=hashless_iri, **kwargs)
+        count_store = lambda store: store.count(types=types, hashless_iri=hashless_iri, **kwargs)
+        return sum(count for _, count in self._store_selector.map_stores(count_store, stores))
+
+    def exists_many(self, ids):
+        """See :func:`oldman.store.datastore.DataStore.exists_many`.
+
+        The IRIs are routed to their stores, which are queried concurrently.
+        """
+        ids_by_stores = self._store_selector.group_ids_by_stores(list(ids))
+        existing_ids = set()
+        for _, store_ids in self._store_selector.map_stores(lambda store: store.exists_many(ids_by_stores[store]),
+                                                            ids_by_stores.keys()):
+            existing_ids.update(store_ids)
+        return existing_ids
+
+    def bulk_load(self, source, batch_size=1000, hashless_iri=None, collection_iri=None, is_end_user=True,
+                  progress_callback=None):
+        """Validates and inserts new resources in bulk (e.g. for seeding a data store from a large RDF dump).
+
+        By contrast with :func:`~oldman.resource.resource.Resource.save`, resources are not saved one by one:
+        each batch is inserted within one request per data store. The cache is not updated and existing
+        resources are not checked (their triples are just added).
+
+        Subjects are loaded as resources, except RDF list nodes. Blank nodes receive IRIs generated in bulk
+        by the IRI generator of their main model (see :func:`~oldman.model.Model.generate_iris`).
+        Their triples are altered accordingly in the source graphs.
+
+        :param source: :class:`rdflib.Graph` object, iterable of :class:`rdflib.Graph` objects
+                       or N-Triples stream (file-like object). Streams are read by chunks
+                       (see :func:`~oldman.utils.bulk.read_nt_chunks`) so memory usage does not depend on their size.
+        :param batch_size: Number of resources per insertion request. Defaults to `1000`.
+        :param hashless_iri: Hash-less IRI given to the IRI generators of blank nodes. Defaults to `None`.
+        :param collection_iri: Collection IRI given to the IRI generators of blank nodes. Defaults to `None`.
+        :param is_end_user: `False` when an authorized user (not a regular end-user)
+                             wants to force some rights. Defaults to `True`.
+        :param progress_callback: Function called after each batch with the number of resources loaded so far.
+                                  Defaults to `None`.
+        :return: The number of loaded resources.
+        """
+        if isinstance(source, Graph):
+            graphs = [source]
+        elif hasattr(source, "read"):
+            graphs = read_nt_chunks(source, batch_size)
+        else:
+            graphs = source
+
+        count = 0
+        for graph in graphs:
+            ids = self._prepare_bulk_graph(graph, hashless_iri, collection_iri)
+            for i in range(0, len(ids), batch_size):
+                batch = ids[i:i + batch_size]
+                self._insert_batch(graph, batch, is_end_user)
+                count += len(batch)
+                self._logger.info(u"Bulk loading: %d resources loaded." % count)
+                if progress_callback is not None:
+                    progress_callback(count)
+        return count
+
+    def _prepare_bulk_graph(self, graph, hashless_iri, collection_iri):
+        """Replaces the blank nodes by generated IRIs.
+
+        :return: The IRIs of the resources to load.
+        """
+        bnode_subjects, other_subjects = extract_subjects(graph)
+        is_resource = lambda s: (s, RDF.first, None) not in graph
+
+        # One bulk generation per main model
+        bnodes_by_models = OrderedDict()
+        for bnode in filter(is_resource, bnode_subjects):
+            types = {unicode(t) for t in graph.objects(bnode, RDF.type)}
+            models, _ = self._model_manager.find_models_and_types(types)
+            bnodes_by_models.setdefault(models[0], []).append(bnode)
+
+        ids = [unicode(s) for s in other_subjects if is_resource(s)]
+        for model, bnodes in bnodes_by_models.iteritems():
+            iris = model.generate_iris(len(bnodes), hashless_iri=hashless_iri, collection_iri=collection_iri)
+            for bnode, iri in zip(bnodes, iris):
+                alter_bnode_triples(graph, bnode, URIRef(iri))
+            ids += iris
+        return ids
+
+    def _insert_batch(self, graph, ids, is_end_user):
+        """Validates some resources and inserts them (one request per data store)."""
+        nt_by_stores = OrderedDict()
+        for id in ids:
+            types = {unicode(t) for t in graph.objects(URIRef(id), RDF.type)}
+            store = self._store_selector.select_store(id=id, types=types)
+            resource = ClientResource.load_from_graph(self, self._model_manager, store, id, graph, is_new=False)
+            resource.check_validity(is_end_user)
+            nt_by_stores.setdefault(store, []).append(resource.to_nt())
+
+        for store, nt_lines in nt_by_stores.iteritems():
+            store.insert_nt(u"".join(nt_lines))
+
+    def export(self, types, format="nt", chunk_size=1000):
+        """Streams all the instances of some RDFS classes (e.g. for dumping a model).
+
+        Data stores are paged through (see :func:`~oldman.store.datastore.DataStore.export_graphs`)
+        so memory usage does not depend on the number of instances. Exported resources are not cached.
+
+        :param types: IRIs of the RDFS classes.
+        :param format: `"nt"` (N-Triples), `"turtle"` or `"jsonld"` (JSON-LD lines: one flat JSON-LD
+                       object per line, see :func:`~oldman.resource.Resource.to_flat_dict`).
+                       Defaults to `"nt"`.
+        :param chunk_size: Number of resources per chunk. Defaults to `1000`.
+        :return: A generator of unicode strings (one per chunk).
+                 Each Turtle chunk is a complete document.
+        """
+        if format not in EXPORT_FORMATS:
+            raise OMUserError(u"Unsupported export format %s (supported: %s)" % (format, EXPORT_FORMATS.keys()))
+        rdf_format = EXPORT_FORMATS[format]
+
+        for store in self._store_selector.select_stores(types=types):
+            for graph in store.export_graphs(types, chunk_size=chunk_size):
+                if rdf_format is not None:
+                    yield graph.serialize(format=rdf_format).decode("utf-8")
+                else:
+                    yield self._graph_to_jsonld_lines(graph, types, store)
+
+    def _graph_to_jsonld_lines(self, graph, types, store):
+        lines = []
+        for iri in sorted(set(graph.subjects(RDF.type, URIRef(types[0])))):
+            resource = ClientResource.load_from_graph(self, self._model_manager, store, unicode(iri), graph,
+                                                      is_new=False)
+            dct = resource.to_flat_dict()
+            dct["@context"] = resource.context
+            lines.append(u"%s\n" % json.dumps(dct, sort_keys=True))
+        return u"".join(lines)
+
     def sparql_filter(self, query):
         """See :func:`oldman.store.datastore.DataStore.sparql_filter`."""
         #TODO: support again generator. Find a way to aggregate them.
@@ -132,6 +355,15 @@ class ClientResourceManager:
                 is_default = (store_model.class_iri is None)
                 self._model_manager.import_model(store_model, store,
                                                  is_default=is_default)
+        # RDFS classes -> stores
+        self._store_selector.index_store_models()
 
     def get_model(self, class_name_or_iri):
         return self._model_manager.get_model(class_name_or_iri)
+
+
+def _get_ordering_key(resource, order_by):
+    """Same order as the keyset pagination of the data stores (ordering key, then IRI)."""
+    if order_by in (None, "id"):
+        return resource.id
+    return resource.get_attribute(order_by).get_lightly(resource), resource.id
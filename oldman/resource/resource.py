@@ -2,11 +2,18 @@ from functools import partial
 from urlparse import urlparse
 import logging
 import json
+import re
 from types import GeneratorType
-from rdflib import URIRef, Graph, RDF
-from oldman.exception import OMUnauthorizedTypeChangeError, OMInternalError, OMUserError
+from rdflib import URIRef, Graph, RDF, BNode
+from oldman.exception import OMUnauthorizedTypeChangeError, OMUserError, OMOutdatedCacheEntryError
 from oldman.exception import OMAttributeAccessError, OMUniquenessError, OMWrongResourceError, OMEditError
 from oldman.common import OBJECT_PROPERTY
+from oldman.model.model import compute_fingerprint
+
+# N-Triples keywords and content-types of RDFlib
+NT_FORMATS = {"nt", "application/n-triples"}
+# Local name that can be abbreviated by a namespace prefix
+_LOCAL_NAME_REGEX = re.compile(r"(?<=[#/])[A-Za-z_][A-Za-z0-9_.-]*$")
 
 
 class Resource(object):
@@ -89,7 +96,6 @@ class Resource(object):
 
     _special_attribute_names = ["_models", "_id", "_types", "_is_blank_node", "_model_manager",
                                 "_store", "_former_types", "_logger", "_resource_manager", "_is_new"]
-    _pickle_attribute_names = ["_id", '_types', '_is_new']
 
     def __init__(self, model_manager, data_store, id=None, types=None, hashless_iri=None, collection_iri=None,
                  is_new=True, former_types=None, **kwargs):
@@ -327,14 +333,17 @@ class Resource(object):
             new_types.add(additional_type)
             self._change_types(new_types)
 
-    def check_validity(self):
+    def check_validity(self, is_end_user=True):
         """Checks its validity.
 
         Raises an :class:`oldman.exception.OMEditError` exception if invalid.
+
+        :param is_end_user: `False` when an authorized user (not a regular end-user)
+                             wants to force some rights. Defaults to `True`.
         """
         for model in self._models:
             for attr in model.om_attributes.values():
-                attr.check_validity(self)
+                attr.check_validity(self, is_end_user)
 
     def receive_id(self, id):
         """Receives the permanent ID assigned by the store.
@@ -346,6 +355,37 @@ class Resource(object):
         self._id = id
         self._is_new = False
 
+    def add_stored_object_values(self, property_iri, value_iris):
+        """Adds IRIs that have already been saved (see
+        :func:`~oldman.store.datastore.DataStore.add_object_values`) to the values of a property.
+
+        Not for end-users! The resource is not marked as changed.
+
+        :param property_iri: IRI of the property.
+        :param value_iris: List of new IRIs.
+        :return: `False` if the values cannot be added: unknown property, unsaved change
+                 or value of a single-valued attribute already present.
+        """
+        for model in self._models:
+            for attr in model.om_attributes.values():
+                if attr.om_property.iri != property_iri or attr.reversed:
+                    continue
+                if attr.has_changed(self):
+                    return False
+                entry = attr.get_entry(self)
+                current_value = entry.current_value if entry is not None else None
+                if attr.container == "@set":
+                    new_value = (current_value or set()).union(value_iris)
+                elif attr.container == "@list":
+                    new_value = (current_value or []) + list(value_iris)
+                elif current_value is None and len(value_iris) == 1:
+                    new_value = value_iris[0]
+                else:
+                    return False
+                attr.set_stored_value(self, new_value)
+                return True
+        return False
+
     def save(self, is_end_user=True):
         """Saves it into the `data_store` and its `resource_cache`.
 
@@ -373,51 +413,95 @@ class Resource(object):
             attributes += model.om_attributes.values()
         return attributes
 
+    def to_nt(self):
+        """Serializes its types and its attribute values into N-Triples lines.
+
+        Relies on :func:`~oldman.attribute.OMAttribute.to_nt`.
+
+        :return: N-Triples serialization (unicode string).
+        """
+        subject = u"<%s>" % self._id
+        lines = u"".join(u"%s <%s> <%s> .\n" % (subject, RDF.type, t) for t in self._types)
+        for attr in self._extract_attribute_list():
+            #{0} -> subject
+            lines += attr.to_nt(self).replace(u"{0}", subject)
+        return lines
+
     def to_dict(self, remove_none_values=True, include_different_contexts=False,
-                ignored_iris=None):
+                ignored_iris=None, max_depth=None):
         """Serializes the resource into a JSON-like `dict`.
 
+        Sub-resources that are blank nodes or in the same document are embedded.
+        They are retrieved depth by depth: one bulk retrieval per depth
+        (see :func:`~oldman.resource.Resource.get_related_resources`).
+        Other sub-resources are represented by their IRIs.
+
         :param remove_none_values: If `True`, `None` values are not inserted into the dict.
                                    Defaults to `True`.
         :param include_different_contexts: If `True` local contexts are given to sub-resources.
                                            Defaults to `False`.
         :param ignored_iris: List of IRI of resources that should not be included in the `dict`.
                              Defaults to `set()`.
+        :param max_depth: Maximum depth of the embedded sub-resources. Deeper sub-resources are
+                          represented by their IRIs. `0` embeds none of them. Defaults to `None` (no limit).
         :return: A `dict` describing the resource.
         """
         if ignored_iris is None:
             ignored_iris = set()
         ignored_iris.add(self._id)
 
-        dct = {attr.name: self._convert_value(getattr(self, attr.name), ignored_iris, remove_none_values,
-                                              include_different_contexts)
-               for attr in self._extract_attribute_list()
-               if not attr.is_write_only}
-        # filter None values
-        if remove_none_values:
-            dct = {k: v for k, v in dct.iteritems() if v is not None}
-
-        if not self.is_blank_node():
-            dct["id"] = self._id
-        if self._types and len(self._types) > 0:
-            dct["types"] = list(self._types)
+        dct, to_embed = self._to_dict_level(ignored_iris, remove_none_values, max_depth != 0)
+        depth = 1
+        while len(to_embed) > 0:
+            can_embed = max_depth is None or depth < max_depth
+            sub_resources = self.get_related_resources([iri for _, _, iri, _ in to_embed])
+            next_to_embed = []
+            for (container, key, iri, parent), sub_resource in zip(to_embed, sub_resources):
+                # Otherwise, not found: the IRI is kept
+                if isinstance(sub_resource, Resource):
+                    value_dict, sub_to_embed = sub_resource._to_dict_level(ignored_iris, remove_none_values,
+                                                                           can_embed)
+                    # TODO: should we improve this test?
+                    if include_different_contexts and sub_resource.context != parent.context:
+                        value_dict["@context"] = sub_resource.context
+                    container[key] = value_dict
+                    next_to_embed += sub_to_embed
+            to_embed = next_to_embed
+            depth += 1
         return dct
 
-    def to_json(self, remove_none_values=True, ignored_iris=None):
+    def to_flat_dict(self, remove_none_values=True):
+        """Serializes the resource into a flat JSON-like `dict`.
+
+        By contrast with :func:`~oldman.resource.Resource.to_dict`, sub-resources are only
+        represented by their IRIs so they are never retrieved.
+
+        :param remove_none_values: If `True`, `None` values are not inserted into the dict.
+                                   Defaults to `True`.
+        :return: A `dict` describing the resource.
+        """
+        return self.to_dict(remove_none_values=remove_none_values, max_depth=0)
+
+    def to_json(self, remove_none_values=True, ignored_iris=None, compact=False, max_depth=None):
         """Serializes the resource into pure JSON (not JSON-LD).
 
         :param remove_none_values: If `True`, `None` values are not inserted into the dict.
                                    Defaults to `True`.
         :param ignored_iris: List of IRI of resources that should not be included in the `dict`.
                              Defaults to `set()`.
+        :param compact: If `True`, the JSON is neither indented nor sorted and is encoded
+                        by the compact JSON encoder (see :func:`~oldman.resource.resource.set_compact_json_encoder`).
+                        Defaults to `False`.
+        :param max_depth: Maximum depth of the embedded sub-resources (see :func:`~oldman.resource.Resource.to_dict`).
+                          Defaults to `None` (no limit).
         :return: A JSON-encoded string.
         """
-        return json.dumps(self.to_dict(remove_none_values=remove_none_values,
+        return dump_json(self.to_dict(remove_none_values=remove_none_values,
                                        include_different_contexts=False,
-                                       ignored_iris=ignored_iris), sort_keys=True, indent=2)
+                                       ignored_iris=ignored_iris, max_depth=max_depth), compact)
 
     def to_jsonld(self, remove_none_values=True, include_different_contexts=False,
-                  ignored_iris=None):
+                  ignored_iris=None, compact=False, max_depth=None):
         """Serializes the resource into JSON-LD.
 
         :param remove_none_values: If `True`, `None` values are not inserted into the dict.
@@ -426,13 +510,17 @@ class Resource(object):
                                            Defaults to `False`.
         :param ignored_iris: List of IRI of resources that should not be included in the `dict`.
                              Defaults to `set()`.
+        :param compact: If `True`, the JSON is neither indented nor sorted (see
+                        :func:`~oldman.resource.Resource.to_json`). Defaults to `False`.
+        :param max_depth: Maximum depth of the embedded sub-resources (see :func:`~oldman.resource.Resource.to_dict`).
+                          Defaults to `None` (no limit).
         :return: A JSON-LD encoded string.
         """
         dct = self.to_dict(remove_none_values=remove_none_values,
                            include_different_contexts=include_different_contexts,
-                           ignored_iris=ignored_iris)
+                           ignored_iris=ignored_iris, max_depth=max_depth)
         dct['@context'] = self.context
-        return json.dumps(dct, sort_keys=True, indent=2)
+        return dump_json(dct, compact)
 
     def to_rdf(self, rdf_format="turtle"):
         """Serializes the resource into RDF.
@@ -441,40 +529,220 @@ class Resource(object):
                            Defaults to `"turtle"`.
         :return: A string in the chosen RDF format.
         """
+        nt_lines = u"".join(self._iter_rdf_nt(set(), {}))
+        # Already serialized (UTF-8)
+        if rdf_format in NT_FORMATS:
+            return nt_lines.encode("utf-8")
         g = Graph()
-        g.parse(data=self.to_json(), context=self.local_context, format="json-ld")
+        g.parse(data=nt_lines, format="nt")
+        # Namespace prefixes bound in a deterministic order
+        bound_namespaces = {unicode(namespace) for _, namespace in g.namespaces()}
+        namespaces = {_extract_namespace(p) for p in g.predicates()}.difference(bound_namespaces).difference([None])
+        for i, namespace in enumerate(sorted(namespaces)):
+            g.bind(u"ns%d" % (i + 1), namespace)
         return g.serialize(format=rdf_format)
 
+    def iter_nt(self, chunk_size=1000):
+        """Streams the N-Triples serialization of the resource (same triples as
+        :func:`~oldman.resource.Resource.to_rdf`).
+
+        Large collections of values are encoded by slices, so the complete serialization
+        is never built in memory.
+
+        :param chunk_size: Approximate number of triples per chunk. Defaults to `1000`.
+        :return: A generator of unicode strings.
+        """
+        buffer = []
+        line_count = 0
+        for lines in self._iter_rdf_nt(set(), {}, chunk_size):
+            buffer.append(lines)
+            line_count += lines.count(u"\n")
+            if line_count >= chunk_size:
+                yield u"".join(buffer)
+                buffer = []
+                line_count = 0
+        if len(buffer) > 0:
+            yield u"".join(buffer)
+
+    def iter_json(self, chunk_size=1000, max_depth=None):
+        """Streams the compact JSON serialization of the resource
+        (see :func:`~oldman.resource.Resource.to_json`).
+
+        The complete `dict` is never built: the values are encoded attribute by attribute,
+        large lists by slices and the embedded sub-resources one at a time
+        (retrieved by batches of `chunk_size`).
+        Sub-resources are embedded depth-first, so a sub-resource reachable through multiple paths
+        may be embedded at another place than in :func:`~oldman.resource.Resource.to_dict`.
+
+        :param chunk_size: Number of list elements per chunk. Defaults to `1000`.
+        :param max_depth: See :func:`~oldman.resource.Resource.to_dict`. Defaults to `None`.
+        :return: A generator of strings.
+        """
+        return self._iter_json(set(), chunk_size, max_depth)
+
+    def iter_jsonld(self, chunk_size=1000, max_depth=None):
+        """Streams the compact JSON-LD serialization of the resource
+        (see :func:`~oldman.resource.Resource.to_jsonld`).
+
+        Like :func:`~oldman.resource.Resource.iter_json`, the complete `dict` is never built.
+
+        :param chunk_size: Number of list elements per chunk. Defaults to `1000`.
+        :param max_depth: See :func:`~oldman.resource.Resource.to_dict`. Defaults to `None`.
+        :return: A generator of strings.
+        """
+        return self._iter_json(set(), chunk_size, max_depth, context=self.context)
+
+    def _iter_json(self, ignored_iris, chunk_size, max_depth, context=None):
+        """Recursive method. Internals of :func:`~oldman.resource.Resource.iter_json`.
+
+        :param context: If not `None`, added as the `@context` value. Defaults to `None`.
+        :return: A generator of strings.
+        """
+        encode = _compact_json_encoder
+        ignored_iris.add(self._id)
+        dct, to_embed = self._to_dict_level(ignored_iris, True, max_depth != 0)
+        if context is not None:
+            dct['@context'] = context
+        sub_max_depth = max_depth - 1 if max_depth is not None else None
+        # (container, key) -> IRI of the sub-resource to embed
+        embedded_iris = {(id(container), key): iri for container, key, iri, _ in to_embed}
+
+        def iter_value(value, sub_resource):
+            # Otherwise, not found: the IRI is kept
+            if isinstance(sub_resource, Resource):
+                return sub_resource._iter_json(ignored_iris, chunk_size, sub_max_depth)
+            return iter([encode(value)])
+
+        def iter_slice(values, start):
+            """Encodes a slice of list elements (comma-separated). Its sub-resources are retrieved at once."""
+            value_slice = values[start:start + chunk_size]
+            keys = [(id(values), i) for i in range(start, start + len(value_slice))]
+            iris = [embedded_iris[k] for k in keys if k in embedded_iris]
+            if len(iris) == 0:
+                # Inner elements of the encoded slice
+                yield (u"," if start > 0 else u"") + encode(value_slice)[1:-1]
+                return
+            sub_resources = dict(zip(iris, self.get_related_resources(iris)))
+            for key, value in zip(keys, value_slice):
+                if key[1] > 0:
+                    yield u","
+                for chunk in iter_value(value, sub_resources.get(embedded_iris.get(key))):
+                    yield chunk
+
+        yield u"{"
+        for i, (key, value) in enumerate(dct.iteritems()):
+            prefix = u"%s%s:" % (u"," if i > 0 else u"", encode(key))
+            if (id(dct), key) in embedded_iris:
+                yield prefix
+                for chunk in iter_value(value, self.get_related_resources([embedded_iris[(id(dct), key)]])[0]):
+                    yield chunk
+            elif isinstance(value, list) and (len(value) > chunk_size
+                                              or any((id(value), j) in embedded_iris for j in range(len(value)))):
+                yield prefix + u"["
+                for j in range(0, len(value), chunk_size):
+                    for chunk in iter_slice(value, j):
+                        yield chunk
+                yield u"]"
+            else:
+                yield prefix + encode(value)
+        yield u"}"
+
+    def _iter_rdf_nt(self, ignored_iris, blank_node_labels, chunk_size=None):
+        """Recursive method. Internals of :func:`~oldman.resource.Resource.to_rdf`.
+
+        Like :func:`~oldman.resource.Resource.to_dict`, includes the sub-resources that are blank nodes
+        or in the same document and ignores the write-only attributes.
+        Skolemized IRIs become blank nodes (like in the JSON-LD serialization).
+
+        :param chunk_size: If not `None`, maximum number of values encoded at once
+                           (RDF lists excepted). Defaults to `None`.
+        :return: A generator of N-Triples lines (unicode strings).
+        """
+        ignored_iris.add(self._id)
+        if self._is_blank_node:
+            subject = blank_node_labels.setdefault(self._id, BNode().n3())
+        else:
+            subject = u"<%s>" % self._id
+        yield u"".join(u"%s <%s> <%s> .\n" % (subject, RDF.type, t) for t in self._types)
+
+        sub_resource_iris = []
+        for attr in self._extract_attribute_list():
+            if attr.is_write_only:
+                continue
+            value = attr.get_lightly(self)
+            if value is None:
+                continue
+            if chunk_size is not None and isinstance(value, (list, set)) and attr.container != "@list":
+                values = list(value)
+                value_slices = [values[i:i + chunk_size] for i in range(0, len(values), chunk_size)]
+            else:
+                value_slices = [value]
+
+            for value_slice in value_slices:
+                #{0} -> subject
+                lines = attr.value_to_nt(value_slice, blank_list_nodes=True).replace(u"{0}", subject)
+                if attr.om_property.type == OBJECT_PROPERTY:
+                    iris = value_slice if isinstance(value_slice, (list, set)) else [value_slice]
+                    for iri in iris:
+                        if is_blank_node(iri):
+                            lines = lines.replace(u"<%s>" % iri, blank_node_labels.setdefault(iri, BNode().n3()))
+                        if iri not in ignored_iris and (is_blank_node(iri)
+                                                        or iri.split('#')[0] == self.hashless_iri):
+                            sub_resource_iris.append(iri)
+                yield lines
+
+        batch_size = chunk_size if chunk_size is not None else max(len(sub_resource_iris), 1)
+        for i in range(0, len(sub_resource_iris), batch_size):
+            for sub_resource in self.get_related_resources(sub_resource_iris[i:i + batch_size]):
+                if isinstance(sub_resource, Resource) and sub_resource.id not in ignored_iris:
+                    for lines in sub_resource._iter_rdf_nt(ignored_iris, blank_node_labels, chunk_size):
+                        yield lines
+
     def __str__(self):
         return self._id
 
     def __repr__(self):
         return u"%s(<%s>)" % (self.__class__.__name__, self._id)
 
-    def _convert_value(self, value, ignored_iris, remove_none_values, include_different_contexts=False):
-        """Recursive method. Internals of :func:`~oldman.resource.Resource.to_dict`.
-
-        :return: JSON-compatible value or list of JSON-compatible values.
-        """
-        # Containers
-        if isinstance(value, (list, set, GeneratorType)):
-            return [self._convert_value(v, ignored_iris, remove_none_values, include_different_contexts)
-                    for v in value]
-        # Object
-        if isinstance(value, Resource):
-            # If non-blank or in the same document
-            if value.id not in ignored_iris and \
-                    (value.is_blank_node() or self.in_same_document(value)):
-                value_dict = dict(value.to_dict(remove_none_values, include_different_contexts, ignored_iris))
-                # TODO: should we improve this test?
-                if include_different_contexts and value._context != self._context:
-                    value_dict["@context"] = value._context
-                return value_dict
-            else:
-                # URI
-                return value.id
-        # Literal
-        return value
+    def _to_dict_level(self, ignored_iris, remove_none_values, can_embed):
+        """Internals of :func:`~oldman.resource.Resource.to_dict`.
+
+        Sub-resources are represented by their IRIs.
+        The ones to embed are added to `ignored_iris` and returned as placeholders.
+
+        :return: The `dict` and a list of placeholders (container, key, IRI, resource).
+        """
+        dct = {}
+        to_embed = []
+        for name, attr in self._model_manager.find_serializable_attributes(self._models):
+            value = attr.get_lightly(self)
+            # Containers
+            if isinstance(value, (list, set, GeneratorType)):
+                value = list(value)
+            if value is None:
+                if not remove_none_values:
+                    dct[name] = None
+                continue
+            dct[name] = value
+
+            if can_embed and attr.om_property.type == OBJECT_PROPERTY:
+                if isinstance(value, list):
+                    placeholders = [(value, i, iri) for i, iri in enumerate(value)]
+                elif isinstance(value, dict):
+                    placeholders = []
+                else:
+                    placeholders = [(dct, name, value)]
+                for container, key, iri in placeholders:
+                    # If blank or in the same document
+                    if iri not in ignored_iris and (is_blank_node(iri) or iri.split('#')[0] == self.hashless_iri):
+                        ignored_iris.add(iri)
+                        to_embed.append((container, key, iri, self))
+
+        if not self.is_blank_node():
+            dct["id"] = self._id
+        if self._types and len(self._types) > 0:
+            dct["types"] = list(self._types)
+        return dct, to_embed
 
     def update(self, full_dict, is_end_user=True, allow_new_type=False, allow_type_removal=False, save=True):
         """Updates the resource from a flat `dict`.
@@ -571,6 +839,15 @@ class Resource(object):
         """
         raise NotImplementedError("To be implemented by a concrete sub-class")
 
+    def get_related_resources(self, ids):
+        """ Not for end-users!
+        Must be implemented by concrete classes.
+
+        Bulk version of :func:`~oldman.resource.resource.Resource.get_related_resource`.
+        Keeps the order of `ids`. If cannot get a resource, its IRI is returned instead.
+        """
+        raise NotImplementedError("To be implemented by a concrete sub-class")
+
     def _check_and_update_types(self, new_types, allow_new_type, allow_type_removal):
         current_types = set(self._types)
         if new_types == current_types:
@@ -642,58 +919,67 @@ class StoreResource(Resource):
         return instance
 
     def __getstate__(self):
-        """Pickles this resource."""
-        state = {name: getattr(self, name) for name in self._pickle_attribute_names}
-        state["store_name"] = self._store.name
-
-        # Reversed order so that important models can overwrite values
-        reversed_models = self._models
-        reversed_models.reverse()
-        for model in reversed_models:
-            for name, attr in model.om_attributes.iteritems():
-                value = attr.get_lightly(self)
-                if isinstance(value, GeneratorType):
-                    if attr.container == "@list":
-                        value = list(value)
-                    else:
-                        value = set(value)
-                if value is not None:
-                    state[name] = value
-        return state
+        """Pickles this resource into a compact tuple.
+
+        Attribute values are ordered according to the attribute layouts of its models
+        (see :attr:`oldman.model.Model.attribute_layout`) and come with the fingerprint of these models.
+        """
+        layout, fingerprint = _extract_attribute_layout(self._models)
+        values = []
+        for attr in layout:
+            value = attr.get_lightly(self)
+            if isinstance(value, GeneratorType):
+                value = list(value) if attr.container == "@list" else set(value)
+            values.append(value)
+        return self._id, list(self._types), self._is_new, self._store.name, fingerprint, tuple(values)
 
     def __setstate__(self, state):
-        """Unpickles this resource from its serialized `state`."""
-        required_fields = self._pickle_attribute_names + ["store_name"]
-        for name in required_fields:
-            if name not in state:
-                #TODO: find a better exception (due to the cache)
-                raise OMInternalError(u"Required field %s is missing in the cached state" % name)
-
-        self._id = state["_id"]
-        self._is_new = state["_is_new"]
+        """Unpickles this resource from its serialized `state`.
+
+        Values come from the data store so they are not validated again.
+        Raises an :class:`~oldman.exception.OMOutdatedCacheEntryError` exception if the models
+        have changed since the resource has been pickled.
+        """
+        if not isinstance(state, tuple) or len(state) != 6:
+            raise OMOutdatedCacheEntryError(u"Unsupported cached state")
+        id, types, is_new, store_name, fingerprint, values = state
+
+        self._id = id
+        self._is_new = is_new
         self._init_non_persistent_attributes(self._id)
 
         # Store
         from oldman.store.datastore import DataStore
-        self._store = DataStore.get_store(state["store_name"])
+        self._store = DataStore.get_store(store_name)
         self._model_manager = self._store.model_manager
 
         # Models and types
-        self._models, self._types = self._model_manager.find_models_and_types(state["_types"])
+        self._models, self._types = self._model_manager.find_models_and_types(types)
         self._former_types = set(self._types)
 
-        # Attributes (Python attributes or OMAttributes)
-        for name, value in state.iteritems():
-            if name in ["store_name", "_id", "_types", "_is_new"]:
-                continue
-            elif name in self._special_attribute_names:
-                setattr(self, name, value)
-            # OMAttributes
-            else:
-                attribute = self._get_om_attribute(name)
-                attribute.set(self, value)
-                # Clears former values (allows modification)
-                attribute.receive_storage_ack(self)
+        layout, current_fingerprint = _extract_attribute_layout(self._models)
+        if fingerprint != current_fingerprint:
+            raise OMOutdatedCacheEntryError(u"The models of %s have changed since it was cached" % self._id)
+
+        # No validation
+        for attr, value in zip(layout, values):
+            if value is not None:
+                attr.set_stored_value(self, value)
+
+    def __copy__(self):
+        """Shallow copy that does not share its attribute values (entries) with this resource.
+
+        Much cheaper than a pickling round-trip.
+        """
+        resource = self.__class__.__new__(self.__class__)
+        resource.__dict__.update(self.__dict__)
+        resource._models = list(self._models)
+        resource._types = list(self._types)
+        resource._former_types = set(self._former_types)
+        for model in self._models:
+            for attr in model.attribute_layout:
+                attr.copy_entry(self, resource)
+        return resource
 
     def get_related_resource(self, id):
         """ Gets a related `StoreResource` by calling the datastore directly. """
@@ -702,6 +988,11 @@ class StoreResource(Resource):
             return id
         return resource
 
+    def get_related_resources(self, ids):
+        """ Gets related `StoreResource` objects in bulk by calling the datastore directly. """
+        return [r if r is not None else id
+                for id, r in zip(ids, self.store.get_many(ids))]
+
     def save(self, is_end_user=True):
         """Saves it into the `data_store` and its `resource_cache`.
 
@@ -719,6 +1010,7 @@ class StoreResource(Resource):
 
         # Find objects to delete
         objects_to_delete = []
+        resources_to_invalidate = set()
         for attr in attributes:
             if not attr.has_changed(self):
                 continue
@@ -732,14 +1024,13 @@ class StoreResource(Resource):
                 former_value = former_value if isinstance(former_value, (set, list)) else [former_value]
 
                 # Cache invalidation (because of possible reverse properties)
-                resources_to_invalidate = set(value) if isinstance(value, (set, list)) else {value}
+                resources_to_invalidate.update(value if isinstance(value, (set, list)) else {value})
                 resources_to_invalidate.update(former_value)
-                for r in resources_to_invalidate:
-                    if r is not None:
-                        self._store.resource_cache.remove_resource_from_id(r)
 
                 objects_to_delete += self._filter_objects_to_delete(former_value)
 
+        self._invalidate_related_resources(resources_to_invalidate)
+
         # Update literal values
         self.store.save(self, attributes, self._former_types)
 
@@ -761,6 +1052,7 @@ class StoreResource(Resource):
         :func:`~oldman.resource.resource.should_delete_resource`.
         """
         attributes = self._extract_attribute_list()
+        resources_to_invalidate = set()
         for attr in attributes:
             # Delete blank nodes recursively
             if attr.om_property.type == OBJECT_PROPERTY:
@@ -774,10 +1066,12 @@ class StoreResource(Resource):
                         else:
                             self._logger.debug(u"%s not deleted with %s" % (obj.id, self._id))
                             # Cache invalidation (because of possible reverse properties)
-                            self._store.resource_cache.remove_resource(obj)
+                            resources_to_invalidate.add(obj.id)
 
             setattr(self, attr.name, None)
 
+        self._invalidate_related_resources(resources_to_invalidate)
+
         #Types
         self._change_types(set())
         self._store.delete(self, attributes, self._former_types)
@@ -791,6 +1085,23 @@ class StoreResource(Resource):
         return [self.store.get(id=id) for id in ids
                 if id is not None and is_blank_node(id)]
 
+    def _invalidate_related_resources(self, ids):
+        """Removes some related resources from the cache and bumps the versions of their documents.
+
+        Within a session, this is done when the pending updates are flushed.
+        """
+        ids = [id for id in ids if id is not None]
+        document_iris = self._store._find_document_iris(ids)
+        session = self._store.current_session
+        if session is None:
+            # One single request to the cache
+            self._store.resource_cache.remove_resources_from_ids(ids)
+            self._store.resource_cache.bump_document_versions(document_iris)
+        else:
+            for id in ids:
+                session.uncache_resource(id)
+            session.bump_document_versions(document_iris)
+
 
 class ClientResource(Resource):
     """ClientResource: resource manipulated by the end-user.
@@ -831,6 +1142,11 @@ class ClientResource(Resource):
             return id
         return resource
 
+    def get_related_resources(self, ids):
+        """ Gets related `ClientResource` objects in bulk through the resource manager. """
+        return [r if r is not None else id
+                for id, r in zip(ids, self._resource_manager.get_many(ids))]
+
     def save(self, is_end_user=True):
         """Saves it into the `data_store` and its `resource_cache`.
 
@@ -907,6 +1223,54 @@ def is_blank_node(iri):
     return (u"/.well-known/genid/" in id_result.path) and (id_result.hostname == u"localhost")
 
 
+#: Encoder of the compact JSON mode. See :func:`~oldman.resource.resource.set_compact_json_encoder`.
+_compact_json_encoder = partial(json.dumps, separators=(",", ":"))
+
+def set_compact_json_encoder(encoder):
+    """Replaces the JSON encoder used by :func:`~oldman.resource.Resource.to_json` and
+    :func:`~oldman.resource.Resource.to_jsonld` in compact mode.
+
+    :param encoder: Function that takes a JSON-like `dict` and returns a JSON string
+                    (e.g. a faster implementation like `ujson.dumps`).
+    """
+    global _compact_json_encoder
+    _compact_json_encoder = encoder
+
+
+def dump_json(dct, compact=False):
+    """Encodes a JSON-like `dict` like :func:`~oldman.resource.Resource.to_json` does.
+
+    :param dct: JSON-like `dict`.
+    :param compact: If `True`, uses the compact JSON encoder
+                    (see :func:`~oldman.resource.resource.set_compact_json_encoder`). Defaults to `False`.
+    :return: A JSON-encoded string.
+    """
+    if compact:
+        return _compact_json_encoder(dct)
+    return json.dumps(dct, sort_keys=True, indent=2)
+
+
+def _extract_attribute_layout(models):
+    """Returns the ordered attributes of some models and the fingerprint of this layout.
+
+    Like attribute access, the first model declaring an attribute name prevails.
+    """
+    layout = []
+    names = set()
+    for model in models:
+        for attr in model.attribute_layout:
+            if attr.name not in names:
+                names.add(attr.name)
+                layout.append(attr)
+    return layout, compute_fingerprint([model.fingerprint for model in models], layout)
+
+
+def _extract_namespace(iri):
+    """Returns the namespace of an IRI ending with a simple local name (after its last `#` or `/`), or `None`."""
+    match = _LOCAL_NAME_REGEX.search(iri)
+    return iri[:match.start()] if match is not None else None
+
+
 def should_delete_resource(resource):
     """Tests if a resource should be deleted.
 
@@ -1,3 +1,4 @@
+from email.utils import formatdate, parsedate_tz, mktime_tz
 from rdflib import Graph
 from rdflib.plugin import PluginException, plugins
 from logging import getLogger
@@ -6,7 +7,7 @@ from .crud import HashLessCRUDer, JSON_TYPES
 from oldman.vocabulary import HTTP_POST
 from oldman.exception import OMResourceNotFoundException, OMForbiddenOperationException, OMRequiredAuthenticationException
 from oldman.exception import OMMethodNotAllowedException, OMBadRequestException, OMObjectNotFoundError
-from oldman.exception import OMNotAcceptableException
+from oldman.exception import OMNotAcceptableException, OMNotModifiedException
 from negotiator import ContentNegotiator, ContentType, AcceptParameters
 
 
@@ -19,19 +20,24 @@ class HTTPController(object):
 
     DEFAULT_CONFIG = {'allow_put_new_type_existing_resource': False,
                       'allow_put_remove_type_existing_resource': False,
-                      'allow_put_new_resource': True
+                      'allow_put_new_resource': True,
+                      'compact_json': False,
+                      'page_size': 100,
+                      'keyset_pagination': False
                       }
 
     def __init__(self, manager, config={}):
         self._logger = getLogger(__name__)
         self._manager = manager
 
-        # For operations except POST
-        self._cruder = HashLessCRUDer(manager)
-
         self._config = self.DEFAULT_CONFIG.copy()
         self._config.update(config)
 
+        # For operations except POST
+        self._cruder = HashLessCRUDer(manager, compact_json=self._config['compact_json'],
+                                      page_size=self._config['page_size'],
+                                      keyset_pagination=self._config['keyset_pagination'])
+
         self._negotiator = None
         self._init_content_negotiator()
 
@@ -52,37 +58,93 @@ class HTTPController(object):
 
         self._negotiator = ContentNegotiator(default_accept_params, acceptable_params)
 
-    def get(self, hashless_iri, accept_header="*/*", **kwargs):
+    def get(self, hashless_iri, accept_header="*/*", if_none_match=None, if_modified_since=None, page=None,
+            after=None, **kwargs):
         """
             TODO: describe.
 
             No support declaration required.
+
+            Conditional requests are supported (see :func:`~oldman.rest.controller.HTTPController.get_with_headers`).
+
+            :return: The payload and its content type.
         """
-        self._logger.debug("Accept header: %s" % accept_header)
-        accepted_type = self._negotiator.negotiate(accept=accept_header)
-        if accepted_type is None:
-            raise OMNotAcceptableException()
+        payload, headers = self.get_with_headers(hashless_iri, accept_header=accept_header,
+                                                 if_none_match=if_none_match, if_modified_since=if_modified_since,
+                                                 page=page, after=after, **kwargs)
+        return payload, headers["Content-Type"]
 
-        content_type = str(accepted_type.content_type)
-        self._logger.debug("Selected content-type: %s" % content_type)
+    def get_with_headers(self, hashless_iri, accept_header="*/*", if_none_match=None, if_modified_since=None,
+                         page=None, after=None, **kwargs):
+        """
+            Like :func:`~oldman.rest.controller.HTTPController.get` but also gives the response headers.
+
+            Conditional requests: raises an :class:`~oldman.exception.OMNotModifiedException` exception (304)
+            without loading nor serializing the resource when `if_none_match` contains its current ETag
+            (or is `*` and the document exists)
+            or, in absence of `if_none_match`, when it has not been modified since `if_modified_since`.
+
+            :param if_none_match: Value of the `If-None-Match` header. Defaults to `None`.
+            :param if_modified_since: Value of the `If-Modified-Since` header (HTTP date). Defaults to `None`.
+            :param page: `page` query parameter (paged collections only).
+                         See :func:`~oldman.rest.crud.HashLessCRUDer.get`. Defaults to `None`.
+            :param after: `after` query parameter (paged collections only). Defaults to `None`.
+            :return: The payload and a `dict` of headers (`Content-Type` and, if available, the `ETag` and
+                     `Last-Modified` validators of this payload).
+        """
+        content_type = self._negotiate(accept_header)
+
+        if if_none_match is not None and if_none_match.strip() == "*":
+            # The document must exist
+            try:
+                etag, last_modified = self._cruder.head(hashless_iri, content_type, page, after)
+            except OMObjectNotFoundError:
+                raise OMResourceNotFoundException()
+        else:
+            etag, last_modified = self._cruder.get_validators(hashless_iri, content_type, page, after)
+        if etag is not None and _is_not_modified(etag, last_modified, if_none_match, if_modified_since):
+            raise OMNotModifiedException(_build_validator_headers(etag, last_modified))
 
         try:
-            return self._cruder.get(hashless_iri, content_type)
+            payload, content_type, (etag, last_modified) = self._cruder.get_with_validators(hashless_iri, content_type,
+                                                                                          page, after)
         except OMObjectNotFoundError:
             raise OMResourceNotFoundException()
 
-    def head(self, hashless_iri, **kwargs):
+        headers = _build_validator_headers(etag, last_modified)
+        headers["Content-Type"] = content_type
+        return payload, headers
+
+    def head(self, hashless_iri, accept_header="*/*", page=None, after=None, **kwargs):
         """
             TODO: describe.
 
             No support declaration required.
+
+            Answered from the cached metadata when the representation has already been produced.
+
+            :return: `dict` of headers (`Content-Type` and, if available, `ETag` and `Last-Modified`).
         """
-        #TODO: consider a more efficient implementation
+        content_type = self._negotiate(accept_header)
         try:
-            self._cruder.get(hashless_iri, None)
+            etag, last_modified = self._cruder.head(hashless_iri, content_type, page, after)
         except OMObjectNotFoundError:
             raise OMResourceNotFoundException()
 
+        headers = _build_validator_headers(etag, last_modified)
+        headers["Content-Type"] = content_type
+        return headers
+
+    def _negotiate(self, accept_header):
+        self._logger.debug("Accept header: %s" % accept_header)
+        accepted_type = self._negotiator.negotiate(accept=accept_header)
+        if accepted_type is None:
+            raise OMNotAcceptableException()
+
+        content_type = str(accepted_type.content_type)
+        self._logger.debug("Selected content-type: %s" % content_type)
+        return content_type
+
     def post(self, hashless_iri, content_type=None, payload=None, **kwargs):
         """
             TODO: categorize the resource to decide what to do.
@@ -152,4 +214,28 @@ class HTTPController(object):
             raise OMBadRequestException("Content type is required.")
         if payload is None:
             raise OMBadRequestException("No payload given.")
-        raise NotImplementedError("PATCH is not yet supported.")
\ No newline at end of file
+        raise NotImplementedError("PATCH is not yet supported.")
+
+
+def _build_validator_headers(etag, last_modified):
+    headers = {}
+    if etag is not None:
+        headers["ETag"] = etag
+    if last_modified is not None:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+    return headers
+
+
+def _is_not_modified(etag, last_modified, if_none_match, if_modified_since):
+    """Evaluates the If-None-Match (weak comparison) or, in its absence, the If-Modified-Since condition.
+
+    `If-None-Match: *` matches any current representation.
+    """
+    if if_none_match is not None:
+        etags = [e.strip() for e in if_none_match.split(",")]
+        return "*" in etags or etag in [e[2:] if e.startswith("W/") else e for e in etags]
+    if if_modified_since is not None and last_modified is not None:
+        since = parsedate_tz(if_modified_since)
+        # Invalid dates are ignored
+        return since is not None and int(last_modified) <= mktime_tz(since)
+    return False
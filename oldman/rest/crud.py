@@ -1,11 +1,23 @@
-from rdflib import BNode, Graph
+from hashlib import md5
+from urllib import urlencode
+from rdflib import BNode, Graph, URIRef, Literal
 from rdflib.plugin import PluginException
 from oldman.utils.crud import create_blank_nodes, create_regular_resources
 from oldman.utils.crud import extract_subjects
+from oldman.resource.resource import dump_json
+from oldman.vocabulary import HYDRA_PAGED_COLLECTION_IRI, HYDRA_MEMBER_IRI, HYDRA_NEXT_PAGE_IRI
+from oldman.vocabulary import HYDRA_PREVIOUS_PAGE_IRI, HYDRA_ITEMS_PER_PAGE_IRI
 from oldman.exception import OMBadRequestException, OMNotAcceptableException
 
 JSON_TYPES = ["application/json", "json"]
 JSON_LD_TYPES = ["application/ld+json", "json-ld"]
+NT_TYPES = ["application/n-triples", "nt"]
+
+#: JSON-LD context of the paging keys added to the pages of collections.
+PAGE_CONTEXT = {"member": {"@id": HYDRA_MEMBER_IRI, "@type": "@id"},
+                "nextPage": {"@id": HYDRA_NEXT_PAGE_IRI, "@type": "@id"},
+                "previousPage": {"@id": HYDRA_PREVIOUS_PAGE_IRI, "@type": "@id"},
+                "itemsPerPage": {"@id": HYDRA_ITEMS_PER_PAGE_IRI}}
 
 
 class HashLessCRUDer(object):
@@ -21,17 +33,31 @@ class HashLessCRUDer(object):
     This class is generic and does not support the Collection pattern
     (there is no append method).
 
+    However, `hydra:PagedCollection` resources are represented page by page:
+    each page includes `page_size` members (ordered by IRI) and `hydra:nextPage`/`hydra:previousPage` links.
+    Pages are selected by number (`?page=2`, SPARQL `OFFSET`) or, cheaper for large collections,
+    by the last member of the previous page (`?after=<IRI>`, keyset pagination).
+    Cursor-based pages only link to their next page.
+
     :param manager: :class:`~oldman.resource.manager.ResourceManager` object.
+    :param compact_json: If `True`, JSON and JSON-LD representations are compact
+                         (see :func:`~oldman.resource.Resource.to_json`). Defaults to `False`.
+    :param page_size: Number of members per page of a paged collection. Defaults to `100`.
+    :param keyset_pagination: If `True`, the `hydra:nextPage` links of the paged collections
+                              always use the `after` cursor. Defaults to `False`.
 
     Possible improvements:
 
         - Add a PATCH method.
     """
 
-    def __init__(self, manager):
+    def __init__(self, manager, compact_json=False, page_size=100, keyset_pagination=False):
         self._manager = manager
+        self._compact_json = compact_json
+        self._page_size = page_size
+        self._keyset_pagination = keyset_pagination
 
-    def get(self, hashless_iri, content_type="text/turtle"):
+    def get(self, hashless_iri, content_type="text/turtle", page=None, after=None):
         """Gets the main :class:`~oldman.resource.Resource` object having its hash-less IRI.
 
         When multiple  :class:`~oldman.resource.Resource` objects have this hash-less IRI,
@@ -43,24 +69,204 @@ class HashLessCRUDer(object):
 
         Raises an :class:`~oldman.exception.ObjectNotFoundError` exception if no resource is found.
 
+        Representations are cached according to the version of the document
+        (see :func:`~oldman.resource.cache.ResourceCache.get_representation`),
+        when the document is held by one single data store.
+        The versions of a document start being tracked when it is first retrieved (or saved).
+
         :param hashless_iri: hash-less of the resource.
         :param content_type: Content type of its representation.
+        :param page: Page number (starting from 1) of a paged collection. Defaults to `None` (first page).
+        :param after: IRI of the last member of the previous page of a paged collection.
+                      Has precedence over `page`. Defaults to `None`.
         :return: The representation of selected :class:`~oldman.resource.Resource` object and its content type
         """
+        payload, content_type, _ = self.get_with_validators(hashless_iri, content_type, page, after)
+        return payload, content_type
+
+    def get_with_validators(self, hashless_iri, content_type="text/turtle", page=None, after=None):
+        """Like :func:`~oldman.rest.crud.HashLessCRUDer.get` but also gives the validators of the returned
+        representation.
+
+        They come from the same read of the document state than the one that selected the cached
+        representation, so they never describe a more recent version than the payload.
+
+        :param hashless_iri: Hash-less IRI of the document.
+        :param content_type: Content type of the representation.
+        :param page: See :func:`~oldman.rest.crud.HashLessCRUDer.get`.
+        :param after: See :func:`~oldman.rest.crud.HashLessCRUDer.get`.
+        :return: The representation, its content type and a pair (ETag, last modification timestamp).
+                 This pair is `(None, None)` when the versions of this document were not tracked yet.
+        """
+        page = _parse_page_number(page)
+        variant = _build_variant(content_type, page, after)
+        cache, version, last_modified = self._get_document_state(hashless_iri)
+        payload = cache.get_representation(hashless_iri, variant, version) if version is not None else None
+        if payload is None:
+            payload = self._serialize(hashless_iri, content_type, page, after)
+            if version is not None:
+                cache.set_representation(hashless_iri, variant, version, payload)
+            elif cache is not None:
+                # The document exists. This payload may predate the first version so it is not cached.
+                cache.track_document(hashless_iri)
+        if version is None:
+            return payload, content_type, (None, None)
+        return payload, content_type, (_build_etag(version, variant), last_modified)
+
+    def stream(self, hashless_iri, content_type="application/n-triples", chunk_size=1000):
+        """Streaming variant of :func:`~oldman.rest.crud.HashLessCRUDer.get` for large documents
+        (e.g. collections with thousands of members).
+
+        N-Triples, JSON and JSON-LD representations are generated chunk by chunk
+        (see :func:`~oldman.resource.Resource.iter_nt` and :func:`~oldman.resource.Resource.iter_jsonld`)
+        and are not cached. JSON representations are compact.
+        Other representations (and cached ones) are given as one single chunk.
+
+        The resource is retrieved before returning, so an :class:`~oldman.exception.ObjectNotFoundError`
+        exception is raised immediately if it is not found.
+        A page of a paged collection is given as one single chunk.
+
+        :param hashless_iri: Hash-less IRI of the resource.
+        :param content_type: Content type of its representation. Defaults to `"application/n-triples"`.
+        :param chunk_size: Approximate number of values (triples, list elements) per chunk. Defaults to `1000`.
+        :return: A generator of strings (that WSGI servers can stream) and the content type.
+        """
+        cache, version, _ = self._get_document_state(hashless_iri)
+        payload = cache.get_representation(hashless_iri, content_type, version) if version is not None else None
+        if payload is not None:
+            return iter([payload]), content_type
+
+        resource = self._manager.get(hashless_iri=hashless_iri)
+        if HYDRA_PAGED_COLLECTION_IRI in resource.types:
+            chunks = iter([self.get(hashless_iri, content_type)[0]])
+        elif content_type in NT_TYPES:
+            chunks = resource.iter_nt(chunk_size)
+        elif content_type in JSON_TYPES:
+            chunks = resource.iter_json(chunk_size)
+        elif content_type in JSON_LD_TYPES:
+            chunks = resource.iter_jsonld(chunk_size)
+        else:
+            chunks = iter([self.get(hashless_iri, content_type)[0]])
+        return chunks, content_type
+
+    def get_validators(self, hashless_iri, content_type="text/turtle", page=None, after=None):
+        """Gets the validators of a representation of a document, without retrieving or serializing it.
+
+        The strong ETag is derived from the version of the document, from the content type
+        and from the page parameters.
+        These versions are tracked once the document has been retrieved or saved
+        (see :func:`~oldman.resource.cache.ResourceCache.get_document_state`).
+
+        The existence of the document is not checked.
+
+        :param hashless_iri: Hash-less IRI of the document.
+        :param content_type: Content type of the representation.
+        :param page: See :func:`~oldman.rest.crud.HashLessCRUDer.get`.
+        :param after: See :func:`~oldman.rest.crud.HashLessCRUDer.get`.
+        :return: A pair (ETag, last modification timestamp) or `(None, None)` if the versions of this
+                 document are not tracked.
+        """
+        _, version, last_modified = self._get_document_state(hashless_iri)
+        if version is None:
+            return None, None
+        return _build_etag(version, _build_variant(content_type, _parse_page_number(page), after)), last_modified
+
+    def head(self, hashless_iri, content_type="text/turtle", page=None, after=None):
+        """Checks that a representation of a document is available and gets its validators.
+
+        The resource is only retrieved and serialized (see :func:`~oldman.rest.crud.HashLessCRUDer.get`)
+        when this representation is not in the cache.
+
+        Raises an :class:`~oldman.exception.ObjectNotFoundError` exception if no resource is found.
+
+        :param hashless_iri: Hash-less IRI of the document.
+        :param content_type: Content type of the representation.
+        :param page: See :func:`~oldman.rest.crud.HashLessCRUDer.get`.
+        :param after: See :func:`~oldman.rest.crud.HashLessCRUDer.get`.
+        :return: A pair (ETag, last modification timestamp). See
+                 :func:`~oldman.rest.crud.HashLessCRUDer.get_validators`.
+        """
+        variant = _build_variant(content_type, _parse_page_number(page), after)
+        cache, version, _ = self._get_document_state(hashless_iri)
+        if version is None or cache.get_representation(hashless_iri, variant, version) is None:
+            self.get(hashless_iri, content_type, page, after)
+        return self.get_validators(hashless_iri, content_type, page, after)
+
+    def _get_document_state(self, hashless_iri):
+        """:return: The resource cache of the data store of the document, the version of the document
+                    and its last modification time (`None` if not available).
+        """
+        stores = self._manager.store_selector.select_stores(hashless_iri=hashless_iri)
+        if len(stores) != 1 or not stores[0].support_representation_cache():
+            return None, None, None
+        cache = stores[0].resource_cache
+        version, last_modified = cache.get_document_state(hashless_iri)
+        return cache, version, last_modified
+
+    def _serialize(self, hashless_iri, content_type, page=None, after=None):
         #TODO: stop this practice
         resource = self._manager.get(hashless_iri=hashless_iri)
 
-        if content_type in JSON_TYPES:
-            payload = resource.to_json()
+        if HYDRA_PAGED_COLLECTION_IRI in resource.types:
+            return self._serialize_page(resource, content_type, page, after)
+        elif content_type in JSON_TYPES:
+            payload = resource.to_json(compact=self._compact_json)
         elif content_type in JSON_LD_TYPES:
-            payload = resource.to_jsonld()
+            payload = resource.to_jsonld(compact=self._compact_json)
         # Try as a RDF mime-type (may not be supported)
         else:
             try:
                 payload = resource.to_rdf(content_type)
             except PluginException:
                 raise OMNotAcceptableException()
-        return payload, content_type
+        return payload
+
+    def _serialize_page(self, resource, content_type, page, after):
+        """Serializes the collection with one page of its members instead of all of them."""
+        members, links = self._get_page(resource, page, after)
+
+        if content_type in JSON_TYPES or content_type in JSON_LD_TYPES:
+            dct = resource.to_dict()
+            dct[_find_member_attribute_name(resource)] = members
+            for link_iri, key in [(HYDRA_NEXT_PAGE_IRI, "nextPage"), (HYDRA_PREVIOUS_PAGE_IRI, "previousPage")]:
+                if link_iri in links:
+                    dct[key] = links[link_iri]
+            dct["itemsPerPage"] = self._page_size
+            if content_type in JSON_LD_TYPES:
+                context = resource.context
+                dct["@context"] = (context if isinstance(context, list) else [context]) + [PAGE_CONTEXT]
+            return dump_json(dct, self._compact_json)
+
+        graph = Graph().parse(data=resource.to_rdf("nt"), format="nt")
+        collection_ref = URIRef(resource.id)
+        # Members that may have been set in memory
+        graph.remove((collection_ref, URIRef(HYDRA_MEMBER_IRI), None))
+        for member_iri in members:
+            graph.add((collection_ref, URIRef(HYDRA_MEMBER_IRI), URIRef(member_iri)))
+        for link_iri, page_iri in links.iteritems():
+            graph.add((collection_ref, URIRef(link_iri), URIRef(page_iri)))
+        graph.add((collection_ref, URIRef(HYDRA_ITEMS_PER_PAGE_IRI), Literal(self._page_size)))
+        try:
+            return graph.serialize(format=content_type)
+        except PluginException:
+            raise OMNotAcceptableException()
+
+    def _get_page(self, resource, page, after):
+        """:return: The member IRIs of the page and its links (`dict` of page IRIs indexed by link property IRIs).
+        """
+        page = page if page is not None else 1
+        offset = (page - 1) * self._page_size if after is None else 0
+        members, has_next = resource.store.get_values_page(resource.id, HYDRA_MEMBER_IRI, self._page_size,
+                                                           offset=offset, after=after)
+        links = {}
+        if has_next:
+            if after is not None or self._keyset_pagination:
+                links[HYDRA_NEXT_PAGE_IRI] = _build_page_iri(resource.id, after=members[-1])
+            else:
+                links[HYDRA_NEXT_PAGE_IRI] = _build_page_iri(resource.id, page=page + 1)
+        if after is None and page > 1:
+            links[HYDRA_PREVIOUS_PAGE_IRI] = _build_page_iri(resource.id, page=page - 1)
+        return members, links
 
     def delete(self, hashless_iri):
         """Deletes every :class:`~oldman.resource.Resource` object having this hash-less IRI.
@@ -135,4 +341,39 @@ class HashLessCRUDer(object):
             # Cheap because already in the resource cache
             r = self._manager.get(id=iri)
             if r is not None:
-                r.delete()
\ No newline at end of file
+                r.delete()
+
+
+def _parse_page_number(page):
+    if page is None:
+        return None
+    try:
+        page = int(page)
+    except ValueError:
+        raise OMBadRequestException(u"Invalid page number: %s" % page)
+    if page < 1:
+        raise OMBadRequestException(u"Page numbers start from 1 (%d given)" % page)
+    return page
+
+
+def _build_etag(version, variant):
+    return u'"%s-%s"' % (version, md5(variant.encode("utf-8")).hexdigest()[:8])
+
+
+def _build_variant(content_type, page, after):
+    """Key of a representation in the cache: the content type and, if given, the page parameters."""
+    if page is None and after is None:
+        return content_type
+    return u"%s;page=%s;after=%s" % (content_type, page, after)
+
+
+def _build_page_iri(collection_iri, **params):
+    return u"%s?%s" % (collection_iri, urlencode({k: unicode(v).encode("utf-8") for k, v in params.iteritems()}))
+
+
+def _find_member_attribute_name(resource):
+    for model in resource.models:
+        for name, attr in model.om_attributes.iteritems():
+            if attr.om_property.iri == HYDRA_MEMBER_IRI:
+                return name
+    return "member"
@@ -1,5 +1,16 @@
 # coding=utf-8
 import logging
+from collections import OrderedDict
+from copy import copy
+from threading import Lock
+from time import time
+from uuid import uuid4
+
+from oldman.exception import OMOutdatedCacheEntryError
+
+_RESOURCE_METADATA_PREFIX = u"resource-metadata:"
+_DOCUMENT_VERSION_PREFIX = u"document-version:"
+_REPRESENTATION_PREFIX = u"representation:"
 
 
 class ResourceCache(object):
@@ -19,13 +30,40 @@ class ResourceCache(object):
     and :func:`~oldman.resource.cache.ResourceCache.remove_resource` can still safely be
     called. They just have no effect.
 
+    .. admonition:: In-process tier
+
+        When `local_cache_size` is positive, a bounded in-process LRU tier is placed in front
+        of the `cache_region`. Its hits avoid unpickling and, for remote back-ends, a network hop.
+        Its entries are stamped with the version of their document
+        (see :func:`~oldman.resource.cache.ResourceCache.get_document_version`) and are only used while this
+        version has not changed, so the modifications done by other processes are seen once they have
+        bumped the document versions. Checking the versions of the hits costs one small read per call
+        to the `cache_region`. Entries also expire after `local_cache_ttl` seconds.
+
+        This tier keeps its own copies of the resources and each hit returns a new (shallow) copy,
+        so the caller can modify it.
+
+    .. admonition:: Serialized representations
+
+        Finished representations of documents (e.g. Turtle or JSON-LD payloads) can also be cached.
+        They are keyed by the hash-less IRI, the content type and the current version of the document
+        (see :func:`~oldman.resource.cache.ResourceCache.get_document_version`).
+        Versions are bumped when resources of the document (including the blank nodes it embeds)
+        or resources they refer to are saved or deleted, so outdated representations are
+        never reached again (they just expire).
+
     :param cache_region: :class:`dogpile.cache.region.CacheRegion` object.
                          This object must already be configured.
                          Defaults to None (no cache).
+    :param local_cache_size: Maximum number of resources kept in the in-process tier.
+                             Defaults to `0` (disabled).
+    :param local_cache_ttl: Time-to-live (in seconds) of the entries of the in-process tier.
+                            Defaults to `None` (no expiration).
     """
 
-    def __init__(self, cache_region):
+    def __init__(self, cache_region, local_cache_size=0, local_cache_ttl=None):
         self._region = cache_region
+        self._local_cache = _LRUCache(local_cache_size, local_cache_ttl) if local_cache_size > 0 else None
         self._logger = logging.getLogger(__name__)
 
     @property
@@ -40,10 +78,14 @@ class ResourceCache(object):
     def change_cache_region(self, cache_region):
         """Replaces the `cache_region` attribute.
 
+        The in-process tier is cleared.
+
         :param cache_region: :class:`dogpile.cache.region.CacheRegion` object.
                               May be `None`.
         """
         self._region = cache_region
+        if self._local_cache is not None:
+            self._local_cache.clear()
 
     def get_resource(self, id):
         """Gets a :class:`~oldman.resource.Resource` object from the cache.
@@ -53,12 +95,61 @@ class ResourceCache(object):
         """
         if id is None or self._region is None:
             return None
-        resource = self._region.get(unicode(id))
+        key = unicode(id)
+        if self._local_cache is not None:
+            resource = self._get_local_resources([key]).get(key)
+            if resource is not None:
+                self._logger.debug(u"%s found in the in-process cache." % resource.id)
+                return resource
+            # Read before the resource so that it cannot be stamped with a more recent version
+            versions = self._get_document_versions([key])
+
+        try:
+            resource = self._region.get(key)
+        except OMOutdatedCacheEntryError:
+            self._logger.info(u"Outdated cache entry for %s. Removed." % key)
+            self._region.delete(key)
+            return None
         if resource:
             self._logger.debug(u"%s found in the cache." % resource.id)
+            if self._local_cache is not None:
+                self._set_local_resources({key: resource}, versions)
             return resource
         return None
 
+    def get_resources(self, ids):
+        """Gets some :class:`~oldman.resource.Resource` objects from the cache.
+
+        Relies on one single call to :func:`dogpile.cache.region.CacheRegion.get_multi`.
+
+        :param ids: List of IRIs.
+        :return: `dict` of the :class:`~oldman.resource.Resource` objects found. Keys are their IRIs.
+        """
+        if self._region is None:
+            return {}
+        keys = [unicode(id) for id in ids if id is not None]
+        resources = {}
+        if self._local_cache is not None:
+            resources.update(self._get_local_resources(keys))
+            keys = [key for key in keys if key not in resources]
+        if len(keys) == 0:
+            return resources
+        if self._local_cache is not None:
+            versions = self._get_document_versions(keys)
+
+        try:
+            values = self._region.get_multi(keys)
+        except OMOutdatedCacheEntryError:
+            # Some entries are outdated: one request per key
+            values = [self.get_resource(key) for key in keys]
+
+        found_resources = {key: resource for key, resource in zip(keys, values) if resource}
+        resources.update(found_resources)
+        if self._local_cache is not None:
+            self._set_local_resources(found_resources, versions)
+        self._logger.debug(u"%d resources found in the cache." % len(resources))
+        return resources
+
     def set_resource(self, resource):
         """Adds or updates a :class:`~oldman.resource.Resource` object in the cache.
 
@@ -67,9 +158,26 @@ class ResourceCache(object):
         :param resource: :class:`~oldman.resource.Resource` object to add to the cache (or update).
         """
         if self._region is not None:
-            self._region.set(unicode(resource.id), resource)
+            key = unicode(resource.id)
+            self._region.set(key, resource)
+            if self._local_cache is not None:
+                self._set_local_resources({key: resource})
             self._logger.debug(u"%s cached." % resource.id)
 
+    def set_resources(self, resources):
+        """Adds or updates some :class:`~oldman.resource.Resource` objects in the cache.
+
+        Relies on one single call to :func:`dogpile.cache.region.CacheRegion.set_multi`.
+
+        :param resources: Collection of :class:`~oldman.resource.Resource` objects.
+        """
+        if self._region is not None and len(resources) > 0:
+            mapping = {unicode(r.id): r for r in resources}
+            self._region.set_multi(mapping)
+            if self._local_cache is not None:
+                self._set_local_resources(mapping)
+            self._logger.debug(u"%d resources cached." % len(mapping))
+
     def remove_resource(self, resource):
         """Removes a :class:`~oldman.resource.Resource` object from the cache.
 
@@ -77,9 +185,7 @@ class ResourceCache(object):
         cache). Does nothing if `cache_region` is `None`.
 
         :param resource: :class:`~oldman.resource.Resource` object to remove from the cache."""
-        if self._region is not None:
-            self._region.delete(unicode(resource.id))
-            self._logger.debug(u"%s removed from the cache." % resource.id)
+        self.remove_resource_from_id(resource.id)
 
     def remove_resource_from_id(self, id):
         """:func:`~oldman.resource.cache.ResourceCache.remove_resource` is usually preferred.
@@ -89,17 +195,254 @@ class ResourceCache(object):
         :param id: IRI of the resource to remove from the cache.
         """
         if self._region is not None:
-            self._region.delete(unicode(id))
+            key = unicode(id)
+            if self._local_cache is not None:
+                self._local_cache.delete(key)
+            self._region.delete(key)
             self._logger.debug(u"%s removed from the cache." % id)
 
+    def remove_resources_from_ids(self, ids):
+        """Removes some resources from the cache.
+
+        Relies on one single call to :func:`dogpile.cache.region.CacheRegion.delete_multi`.
+        Indempotent and does nothing if `cache_region` is `None`.
+
+        :param ids: Collection of IRIs.
+        """
+        if self._region is not None:
+            keys = list({unicode(id) for id in ids if id is not None})
+            if len(keys) == 0:
+                return
+            if self._local_cache is not None:
+                for key in keys:
+                    self._local_cache.delete(key)
+            self._region.delete_multi(keys)
+            self._logger.debug(u"%s removed from the cache." % keys)
+
+    def get_resources_metadata(self, ids):
+        """Gets the metadata cached for some resources (e.g. the HTTP validators of their documents).
+
+        Relies on one single call to :func:`dogpile.cache.region.CacheRegion.get_multi`.
+
+        :param ids: List of IRIs.
+        :return: `dict` of the metadata found. Keys are the IRIs.
+        """
+        if self._region is None:
+            return {}
+        keys = [unicode(id) for id in ids if id is not None]
+        if len(keys) == 0:
+            return {}
+        values = self._region.get_multi([_RESOURCE_METADATA_PREFIX + key for key in keys])
+        return {key: metadata for key, metadata in zip(keys, values) if metadata}
+
+    def set_resources_metadata(self, ids, metadata):
+        """Caches the same metadata for some resources, next to them.
+
+        Relies on one single call to :func:`dogpile.cache.region.CacheRegion.set_multi`.
+        Does nothing if `cache_region` is `None`.
+
+        :param ids: Collection of IRIs.
+        :param metadata: `dict` (must be serializable).
+        """
+        if self._region is not None:
+            mapping = {_RESOURCE_METADATA_PREFIX + unicode(id): metadata for id in ids if id is not None}
+            if len(mapping) > 0:
+                self._region.set_multi(mapping)
+
+    def get_document_version(self, hashless_iri):
+        """Gets the current version of a document.
+
+        Versions are opaque tokens shared through the `cache_region`, so they can also be used as ETags.
+
+        :param hashless_iri: Hash-less IRI of the document.
+        :return: A version token or `None` if the document is not tracked or if `cache_region` is `None`.
+        """
+        return self.get_document_state(hashless_iri)[0]
+
+    def get_document_state(self, hashless_iri):
+        """Gets the current version of a document and the time of its last modification.
+
+        Only the documents that have been bumped
+        (see :func:`~oldman.resource.cache.ResourceCache.bump_document_versions`)
+        or explicitly tracked (see :func:`~oldman.resource.cache.ResourceCache.track_document`) have a state.
+
+        :param hashless_iri: Hash-less IRI of the document.
+        :return: A pair (version token, last modification timestamp) or `(None, None)` if the document
+                 is not tracked or if `cache_region` is `None`.
+        """
+        if self._region is None:
+            return None, None
+        state = self._region.get(_DOCUMENT_VERSION_PREFIX + unicode(hashless_iri))
+        return state if state else (None, None)
+
+    def track_document(self, hashless_iri):
+        """Starts tracking the versions of an existing document (if not already tracked).
+
+        Its last modification time is unknown, so the current time is recorded.
+
+        :param hashless_iri: Hash-less IRI of the document.
+        :return: See :func:`~oldman.resource.cache.ResourceCache.get_document_state`.
+        """
+        if self._region is None:
+            return None, None
+        return self._region.get_or_create(_DOCUMENT_VERSION_PREFIX + unicode(hashless_iri), _new_document_state)
+
+    def bump_document_versions(self, hashless_iris):
+        """Gives new versions to some documents (after some of their resources have been saved or deleted).
+
+        Their last modification time is also updated.
+        Relies on one single call to :func:`dogpile.cache.region.CacheRegion.set_multi`.
+        Does nothing if `cache_region` is `None`.
+
+        :param hashless_iris: Collection of hash-less IRIs.
+        """
+        if self._region is not None:
+            mapping = {_DOCUMENT_VERSION_PREFIX + unicode(iri): _new_document_state()
+                       for iri in hashless_iris if iri is not None}
+            if len(mapping) > 0:
+                self._region.set_multi(mapping)
+                self._logger.debug(u"New versions for the documents %s." % mapping.keys())
+
+    def get_representation(self, hashless_iri, content_type, version):
+        """Gets a serialized representation of a document.
+
+        :param hashless_iri: Hash-less IRI of the document.
+        :param content_type: Content type of the representation.
+        :param version: Version of the document (see
+                        :func:`~oldman.resource.cache.ResourceCache.get_document_version`).
+        :return: The representation (string) or `None` if not found.
+        """
+        if self._region is None or version is None:
+            return None
+        payload = self._region.get(_representation_key(hashless_iri, content_type, version))
+        return payload if payload else None
+
+    def set_representation(self, hashless_iri, content_type, version, payload):
+        """Caches a serialized representation of a document.
+
+        Does nothing if `cache_region` is `None`.
+
+        :param hashless_iri: Hash-less IRI of the document.
+        :param content_type: Content type of the representation.
+        :param version: Version of the document the representation has been produced from.
+        :param payload: The representation (string).
+        """
+        if self._region is not None and version is not None:
+            self._region.set(_representation_key(hashless_iri, content_type, version), payload)
+
     def invalidate_cache(self):
         """See :func:`dogpile.cache.region.CacheRegion.invalidate`.
 
+        The in-process tier is always cleared.
+
         .. admonition:: Cache invalidation
 
             Please note that this method is not supported by some :class:`dogpile.cache.api.CacheBackend`
             objects. In such a case, this method has no effect so entries must be removed **explicitly**
             from their keys.
         """
+        if self._local_cache is not None:
+            self._local_cache.clear()
         if self._region is not None:
-            self._region.invalidate()
\ No newline at end of file
+            self._region.invalidate()
+
+    def _get_local_resources(self, keys):
+        """Copies the resources of the in-process tier (no unpickling) whose document versions
+        have not changed since they were cached.
+
+        :return: `dict` of the resources found. Keys are their IRIs.
+        """
+        entries = {}
+        for key in keys:
+            entry = self._local_cache.get(key)
+            if entry is not None:
+                entries[key] = entry
+        if len(entries) == 0:
+            return {}
+
+        current_versions = self._get_document_versions(entries.keys())
+        resources = {}
+        for key, (version, resource) in entries.iteritems():
+            if version == current_versions[key]:
+                resources[key] = copy(resource)
+            else:
+                # Modified, possibly by another process
+                self._local_cache.delete(key)
+        return resources
+
+    def _set_local_resources(self, resources, versions=None):
+        """Adds some resources to the in-process tier, stamped with the versions of their documents.
+
+        :param resources: `dict` of :class:`~oldman.resource.Resource` objects. Keys are their IRIs.
+        :param versions: `dict` of the document versions read before these resources. Read if not given.
+        """
+        if len(resources) == 0:
+            return
+        if versions is None:
+            versions = self._get_document_versions(resources.keys())
+        for key, resource in resources.iteritems():
+            # Not affected by the later modifications of the given object
+            self._local_cache.set(key, (versions[key], copy(resource)))
+
+    def _get_document_versions(self, ids):
+        """Reads the current versions of the documents of some resources (one single request).
+
+        :return: `dict` of versions (or `None` when not tracked). Keys are the IRIs.
+        """
+        hashless_iris = {id: id.split('#')[0] for id in ids}
+        documents = list(set(hashless_iris.values()))
+        states = self._region.get_multi([_DOCUMENT_VERSION_PREFIX + iri for iri in documents])
+        versions = {iri: (state[0] if state else None) for iri, state in zip(documents, states)}
+        return {id: versions[iri] for id, iri in hashless_iris.iteritems()}
+
+
+def _new_document_state():
+    return uuid4().hex, time()
+
+
+def _representation_key(hashless_iri, content_type, version):
+    return u"%s%s:%s:%s" % (_REPRESENTATION_PREFIX, version, content_type, hashless_iri)
+
+
+class _LRUCache(object):
+    """Thread-safe bounded LRU mapping whose entries may expire.
+
+    :param max_size: Maximum number of entries.
+    :param ttl: Time-to-live of the entries (in seconds). `None` for no expiration.
+    """
+
+    def __init__(self, max_size, ttl=None):
+        self._max_size = max_size
+        self._ttl = ttl
+        # {key: (expiration_time, value)}
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            expiration_time, value = entry
+            if expiration_time is not None and expiration_time < time():
+                return None
+            # Most recently used
+            self._entries[key] = entry
+            return value
+
+    def set(self, key, value):
+        expiration_time = time() + self._ttl if self._ttl is not None else None
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (expiration_time, value)
+            while len(self._entries) > self._max_size:
+                # Least recently used
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
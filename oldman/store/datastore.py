@@ -1,9 +1,12 @@
 import logging
+from copy import copy
+from threading import local
 from uuid import uuid4
 from oldman.model.manager import ModelManager
 
 from oldman.store.cache import ResourceCache
-from oldman.exception import UnsupportedDataStorageFeatureException, OMAttributeAccessError
+from oldman.store.session import StoreSession
+from oldman.exception import UnsupportedDataStorageFeatureException, OMAttributeAccessError, OMUserError
 from oldman.exception import OMObjectNotFoundError, OMClassInstanceError
 from oldman.resource.resource import Resource, StoreResource
 
@@ -30,18 +33,25 @@ class DataStore(object):
                          See :class:`~oldman.store.cache.ResourceCache` for further details.
     :param accept_iri_generation_configuration: If False, the IRI generator cannot be configured
                          by the user: it is imposed by the data store. Default to `False`.
+    :param local_cache_size: Maximum number of resources kept in the in-process tier of the
+                         :class:`~oldman.store.cache.ResourceCache` object. Defaults to `0` (disabled).
+    :param local_cache_ttl: Time-to-live (in seconds) of the entries of this in-process tier.
+                         Defaults to `None` (no expiration).
     """
     _stores = {}
 
     def __init__(self, model_manager, cache_region=None, accept_iri_generation_configuration=True,
-                 support_sparql=False):
+                 support_sparql=False, local_cache_size=0, local_cache_ttl=None):
         self._model_manager = model_manager
         self._logger = logging.getLogger(__name__)
-        self._resource_cache = ResourceCache(cache_region)
+        self._resource_cache = ResourceCache(cache_region, local_cache_size=local_cache_size,
+                                             local_cache_ttl=local_cache_ttl)
         self._name = str(uuid4())
         self._stores[self._name] = self
         self._accept_iri_generation_configuration = accept_iri_generation_configuration
         self._support_sparql=support_sparql
+        # Current session (per thread)
+        self._sessions = local()
 
         if not self._model_manager.has_default_model():
             self._model_manager.create_model(DEFAULT_MODEL_PREFIX + self._name, {u"@context": {}}, self, untyped=True,
@@ -64,6 +74,22 @@ class DataStore(object):
         """:class:`~oldman.resource.cache.ResourceCache` object."""
         return self._resource_cache
 
+    @property
+    def current_session(self):
+        """:class:`~oldman.store.session.StoreSession` object active in the current thread. May be `None`."""
+        return getattr(self._sessions, "current", None)
+
+    def new_session(self, chunk_size=100):
+        """Creates a :class:`~oldman.store.session.StoreSession` object that batches the updates.
+
+        The session becomes active when entering a `with` block or calling
+        :func:`~oldman.store.session.StoreSession.begin`.
+
+        :param chunk_size: Maximum number of update operations sent within one request. Defaults to `100`.
+        :return: A new :class:`~oldman.store.session.StoreSession` object.
+        """
+        return StoreSession(self, chunk_size=chunk_size)
+
     @classmethod
     def get_store(cls, name):
         """Gets a :class:`~oldman.store.datastore.DataStore` object by its name.
@@ -86,6 +112,14 @@ class DataStore(object):
         """
         return self._support_sparql
 
+    def support_representation_cache(self):
+        """Returns `True` if the serialized representations of its documents can be cached
+        (see :func:`~oldman.resource.cache.ResourceCache.get_representation`).
+
+        Requires the documents to be only modified through this data store, so that their versions are bumped.
+        """
+        return True
+
     def get(self, id=None, types=None, hashless_iri=None, eager_with_reversed_attributes=True, **kwargs):
         """Gets the first :class:`~oldman.resource.Resource` object matching the given criteria.
 
@@ -128,7 +162,27 @@ class DataStore(object):
 
         return None
 
-    def filter(self, types=None, hashless_iri=None, limit=None, eager=False, pre_cache_properties=None, **kwargs):
+    def get_many(self, ids):
+        """Gets the :class:`~oldman.resource.Resource` objects of some IRIs.
+
+        The :class:`~oldman.store.cache.ResourceCache` object is looked up first.
+        Then, the resources that are not cached are retrieved in bulk
+        (e.g. one SPARQL query per chunk of IRIs).
+
+        :param ids: List of IRIs.
+        :return: A list of :class:`~oldman.resource.Resource` objects (or `None` when a resource
+                 could not be retrieved), in the same order than `ids`.
+        """
+        ids = [unicode(id) for id in ids]
+        resources = self._resource_cache.get_resources(set(ids))
+        missing_ids = list({id for id in ids if id not in resources})
+
+        if len(missing_ids) > 0:
+            resources.update(zip(missing_ids, self._get_by_ids(missing_ids)))
+        return [resources.get(id) for id in ids]
+
+    def filter(self, types=None, hashless_iri=None, limit=None, eager=False, pre_cache_properties=None,
+               order_by=None, after=None, **kwargs):
         """Finds the :class:`~oldman.resource.Resource` objects matching the given criteria.
 
         The `kwargs` dict can contains:
@@ -146,6 +200,12 @@ class DataStore(object):
                       Their values (:class:`~oldman.resource.Resource` objects) are loaded and
                       added to the cache. Defaults to `[]`. If given, `eager` must be `True`.
                       Disabled if there is no cache.
+        :param order_by: Name of the (single-valued) attribute the resources are ordered by, then by IRI.
+                         Resources without value for this attribute are excluded.
+                         If `"id"`, they are only ordered by IRI. Defaults to `None`.
+        :param after: Opaque cursor built by :func:`~oldman.utils.cursor.build_cursor` from the last resource
+                      of the previous page (keyset pagination). Only the resources that come after it are
+                      returned. Resources are ordered by IRI if `order_by` is not given. Defaults to `None`.
         :return: A generator (if lazy) or a list (if eager) of :class:`~oldman.resource.Resource` objects.
         """
         if not eager and pre_cache_properties is not None:
@@ -156,11 +216,29 @@ class DataStore(object):
         if id is not None:
             return self.get(id=id, types=types, hashless_iri=hashless_iri, **kwargs)
 
-        if len(type_iris) == 0 and len(kwargs) > 0:
+        ordering_attributes = [order_by] if order_by not in (None, "id") else []
+        if len(type_iris) == 0 and len(kwargs) + len(ordering_attributes) > 0:
             raise OMAttributeAccessError(u"No type given in filter() so attributes %s are ambiguous."
-                                         % kwargs.keys())
+                                         % (kwargs.keys() + ordering_attributes))
+
+        return self._filter(type_iris, hashless_iri, limit, eager, pre_cache_properties, order_by=order_by,
+                            after=after, **kwargs)
+
+    def count(self, types=None, hashless_iri=None, **kwargs):
+        """Counts the resources matching the given criteria, without retrieving them.
+
+        Same criteria as :func:`~oldman.store.datastore.DataStore.filter` (except the special attribute `id`).
+        May raise an :class:`~oldman.exception.UnsupportedDataStorageFeatureException` exception.
 
-        return self._filter(type_iris, hashless_iri, limit, eager, pre_cache_properties, **kwargs)
+        :param types: IRIs of the RDFS classes counted resources must be instance of. Defaults to `None`.
+        :param hashless_iri: Hash-less IRI of counted resources. Defaults to `None`.
+        :return: Number of matching resources.
+        """
+        type_iris = types if types is not None else []
+        if len(type_iris) == 0 and len(kwargs) > 0:
+            raise OMAttributeAccessError(u"No type given in count() so attributes %s are ambiguous."
+                                         % kwargs.keys())
+        return self._count(type_iris, hashless_iri, **kwargs)
 
     def sparql_filter(self, query):
         """Finds the :class:`~oldman.resource.Resource` objects matching a given query.
@@ -182,10 +260,19 @@ class DataStore(object):
         :param attributes: Ordered list of :class:`~oldman.attribute.OMAttribute` objects.
         :param former_types: List of RDFS class IRIs previously saved.
         """
+        # Before the update (blank nodes may be dereferenced)
+        document_iris = self._find_document_iris([resource.id])
         id = self._save_resource_attributes(resource, attributes, former_types)
         resource.receive_id(id)
+        document_iris.add(resource.hashless_iri)
         # Cache
-        self._resource_cache.set_resource(resource)
+        session = self.current_session
+        if session is not None:
+            session.cache_resource(resource)
+            session.bump_document_versions(document_iris)
+        else:
+            self._resource_cache.set_resource(resource)
+            self._resource_cache.bump_document_versions(document_iris)
 
     def delete(self, resource, attributes, former_types):
         """End-users should not call it directly. Call :func:`oldman.Resource.delete()` instead.
@@ -194,9 +281,93 @@ class DataStore(object):
         :param attributes: Ordered list of :class:`~oldman.attribute.OMAttribute` objects.
         :param former_types: List of RDFS class IRIs previously saved.
         """
+        document_iris = self._find_document_iris([resource.id])
+        document_iris.add(resource.hashless_iri)
         self._save_resource_attributes(resource, attributes, former_types)
         # Cache
-        self._resource_cache.remove_resource(resource)
+        session = self.current_session
+        if session is not None:
+            session.uncache_resource(resource.id)
+            session.bump_document_versions(document_iris)
+        else:
+            self._resource_cache.remove_resource(resource)
+            self._resource_cache.bump_document_versions(document_iris)
+
+    def insert_nt(self, nt_lines):
+        """Inserts N-Triples lines within one request. Used for bulk loading.
+
+        No check is done and the cache is not updated.
+        May raise an :class:`~oldman.exception.UnsupportedDataStorageFeatureException` exception.
+
+        :param nt_lines: N-Triples lines (unicode string).
+        """
+        raise UnsupportedDataStorageFeatureException("This datastore %s cannot insert triples (read-only)."
+                                                     % self.__class__.__name__)
+
+    def add_object_values(self, id, property_iri, value_iris):
+        """Adds some IRIs to the values of a property without loading the resource.
+        Used for appending members to large collections.
+
+        The new values are added to a copy of the cached resource (if any) instead of reloading it
+        (cached objects may be shared).
+        The resource is removed from the cache when this is not possible
+        (see :func:`~oldman.resource.Resource.add_stored_object_values`) or within a session.
+        The version of its document is bumped.
+        May raise an :class:`~oldman.exception.UnsupportedDataStorageFeatureException` exception.
+
+        :param id: IRI of the resource.
+        :param property_iri: IRI of the property.
+        :param value_iris: IRIs of the new values.
+        """
+        if len(value_iris) == 0:
+            return
+        self.insert_nt(u"".join([u"<%s> <%s> <%s> .\n" % (id, property_iri, iri) for iri in value_iris]))
+        # Cache
+        session = self.current_session
+        if session is not None:
+            session.uncache_resource(id)
+            return
+        resource = self._resource_cache.get_resource(id)
+        if resource is not None and self._loads_property_values(resource.types, property_iri):
+            resource = copy(resource)
+            if resource.add_stored_object_values(property_iri, value_iris):
+                self._resource_cache.set_resource(resource)
+            else:
+                self._resource_cache.remove_resource(resource)
+        self._resource_cache.bump_document_versions([id.split("#")[0]])
+
+    def get_values_page(self, id, property_iri, limit, offset=0, after=None):
+        """Gets a page of the IRIs that are values of a property, without loading the resource.
+        Used for paging through large collections.
+
+        Values are ordered by IRI.
+        May raise an :class:`~oldman.exception.UnsupportedDataStorageFeatureException` exception.
+
+        :param id: IRI of the resource.
+        :param property_iri: IRI of the property.
+        :param limit: Maximum number of values.
+        :param offset: Number of values skipped. Defaults to `0`.
+        :param after: If given, only the values that come after this IRI are considered
+                      (cursor-based paging, cheaper than a large offset). Defaults to `None`.
+        :return: A tuple `(values, has_next)` where `values` is a list of IRIs and
+                 `has_next` is `True` if there are more values after this page.
+        """
+        raise UnsupportedDataStorageFeatureException("This datastore %s cannot page through property values."
+                                                     % self.__class__.__name__)
+
+    def export_graphs(self, types, chunk_size=1000):
+        """Pages through all the instances of some RDFS classes. Used for bulk exporting.
+
+        Resources are neither created nor cached.
+        May raise an :class:`~oldman.exception.UnsupportedDataStorageFeatureException` exception.
+
+        :param types: IRIs of the RDFS classes.
+        :param chunk_size: Number of resources per page. Defaults to `1000`.
+        :return: A generator of :class:`rdflib.Graph` objects
+                 (one per page, including the RDF list cells of the resources).
+        """
+        raise UnsupportedDataStorageFeatureException("This datastore %s cannot export resources."
+                                                     % self.__class__.__name__)
 
     def exists(self, resource_iri):
         """ Tests if the IRI of the resource is present in the data_store.
@@ -209,6 +380,17 @@ class DataStore(object):
         raise UnsupportedDataStorageFeatureException("This datastore %s cannot test the existence of an IRI."
                                                      % self.__class__.__name__)
 
+    def exists_many(self, ids):
+        """Tests the existence of some IRIs within the minimum number of requests.
+
+        Should be overwritten by data stores supporting bulk requests. By default, calls
+        :func:`~oldman.store.datastore.DataStore.exists` for each IRI.
+
+        :param ids: Collection of IRIs.
+        :return: The `set` of the IRIs that are present in the data store.
+        """
+        return {unicode(id) for id in ids if self.exists(id)}
+
     def generate_instance_number(self, class_iri):
         """ Generates a new incremented number for a given RDFS class IRI.
 
@@ -220,6 +402,21 @@ class DataStore(object):
         raise UnsupportedDataStorageFeatureException("This datastore %s does not generate instance numbers."
                                                      % self.__class__.__name__)
 
+    def reserve_instance_numbers(self, class_iri, count):
+        """ Reserves a block of consecutive numbers for a given RDFS class IRI.
+
+        The reserved numbers are not generated again by
+        :func:`~oldman.store.datastore.DataStore.generate_instance_number`.
+
+        May raise an :class:`~oldman.exception.UnsupportedDataStorageFeatureException` exception.
+
+        :param class_iri: RDFS class IRI.
+        :param count: Number of reserved numbers.
+        :return: First number of the block.
+        """
+        raise UnsupportedDataStorageFeatureException("This datastore %s does not generate instance numbers."
+                                                     % self.__class__.__name__)
+
     def reset_instance_counter(self, class_iri):
         """ Reset the counter related to a given RDFS class.
 
@@ -239,10 +436,10 @@ class DataStore(object):
                                                      % self.__class__.__name__)
 
     def create_model(self, class_name_or_iri, context_iri_or_payload, iri_generator=None, iri_prefix=None,
-                     iri_fragment=None, incremental_iri=False, context_file_path=None):
+                     iri_fragment=None, incremental_iri=False, context_file_path=None, iri_block_size=1):
         """TODO: comment. Convenience function """
         if not self._accept_iri_generation_configuration:
-            if iri_generator or iri_prefix or iri_fragment or incremental_iri:
+            if iri_generator or iri_prefix or iri_fragment or incremental_iri or iri_block_size > 1:
                 # TODO: find a better exception
                 raise Exception("The generator is imposed by the datastore, it cannot"
                                 "be configured by the user.")
@@ -252,7 +449,7 @@ class DataStore(object):
         self._model_manager.create_model(class_name_or_iri, context_iri_or_payload, self, iri_generator=iri_generator,
                                          iri_prefix=iri_prefix, iri_fragment=iri_fragment,
                                          incremental_iri=incremental_iri,
-                                         context_file_path=context_file_path)
+                                         context_file_path=context_file_path, iri_block_size=iri_block_size)
 
     def _get_first_resource_found(self):
         raise UnsupportedDataStorageFeatureException("This datastore %s cannot get a resource at random."
@@ -262,10 +459,26 @@ class DataStore(object):
         raise UnsupportedDataStorageFeatureException("This datastore %s cannot get a resource from its IRI."
                                                      % self.__class__.__name__)
 
-    def _filter(self, type_iris, hashless_iri, limit, eager, pre_cache_properties, **kwargs):
+    def _get_by_ids(self, ids):
+        """Retrieves resources that are not in the cache.
+
+        By default, calls :func:`~oldman.store.datastore.DataStore._get_by_id` for each IRI.
+        Should be overwritten by data stores supporting bulk retrieval.
+
+        :param ids: List of IRIs.
+        :return: List of :class:`~oldman.resource.Resource` objects (or `None`) in the same order.
+        """
+        return [self._get_by_id(id) for id in ids]
+
+    def _filter(self, type_iris, hashless_iri, limit, eager, pre_cache_properties, order_by=None, after=None,
+                **kwargs):
         raise UnsupportedDataStorageFeatureException("This datastore %s does not support filtering queries."
                                                      % self.__class__.__name__)
 
+    def _count(self, type_iris, hashless_iri, **kwargs):
+        raise UnsupportedDataStorageFeatureException("This datastore %s does not support counting queries."
+                                                     % self.__class__.__name__)
+
     def _save_resource_attributes(self, resource, attributes):
         """
         TODO: describe
@@ -276,11 +489,52 @@ class DataStore(object):
         raise UnsupportedDataStorageFeatureException("This datastore %s cannot update resources (read-only)."
                                                      % self.__class__.__name__)
 
+    def _execute_updates(self, updates):
+        """Sends some update operations collected by a :class:`~oldman.store.session.StoreSession` object.
+
+        :param updates: List of update operations.
+        """
+        raise UnsupportedDataStorageFeatureException("This datastore %s cannot update resources (read-only)."
+                                                     % self.__class__.__name__)
+
+    def _find_document_iris(self, ids):
+        """Finds the documents that describe some resources (their versions have to be bumped
+        when these resources are modified).
+
+        By default, returns the hash-less IRIs of the resources.
+        Data stores that can find the resources referring to a blank node should
+        also return the documents embedding it.
+
+        :param ids: Collection of IRIs.
+        :return: Set of hash-less IRIs.
+        """
+        return {id.split('#')[0] for id in ids if id is not None}
+
+    def _loads_property_values(self, types, property_iri):
+        """Returns `False` if the values of this property are never loaded for resources of these types
+        (so they are not cached either)."""
+        return True
+
+    def _set_current_session(self, session):
+        if session is not None and self.current_session not in (None, session):
+            raise OMUserError(u"Another session is already active on this data store.")
+        self._sessions.current = session
+
     def _new_resource_object(self, id, resource_graph):
         resource = StoreResource.load_from_graph(self._model_manager, self, id, resource_graph, is_new=False)
         self.resource_cache.set_resource(resource)
         return resource
 
+    def _new_resource_objects(self, ids, resource_graph):
+        """Bulk version of :func:`~oldman.store.datastore.DataStore._new_resource_object`.
+
+        The resources are cached at once.
+        """
+        resources = [StoreResource.load_from_graph(self._model_manager, self, id, resource_graph, is_new=False)
+                     for id in ids]
+        self.resource_cache.set_resources(resources)
+        return resources
+
     def _select_resource_from_hashless_iri(self, hashless_iri, resources):
         if len(resources) == 0:
             raise OMObjectNotFoundError(u"No resource with hash-less iri %s" % hashless_iri)
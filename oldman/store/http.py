@@ -1,6 +1,9 @@
 from logging import getLogger
+from multiprocessing.pool import ThreadPool
+from threading import Lock
 from rdflib.plugin import PluginException
 import requests
+from requests.adapters import HTTPAdapter
 from rdflib import Graph
 
 from .datastore import DataStore
@@ -11,37 +14,146 @@ from oldman.rest.crud import JSON_TYPES
 class HttpDataStore(DataStore):
     """
         Read only. No search feature.
+
+        When a cache region is given, the HTTP validators (`ETag` and `Last-Modified` headers)
+        of the retrieved documents are cached with each of their resources. Cached resources are then
+        revalidated with conditional GET requests and re-used when the server answers `304 Not Modified`.
+        Resources of the same document are only revalidated together when they have the same validators.
+
+        :param schema_graph: :class:`rdflib.Graph` object containing all the schema triples.
+        :param cache_region: :class:`dogpile.cache.region.CacheRegion` object.
+                             See :class:`~oldman.store.cache.ResourceCache` for further details.
+        :param session: :class:`requests.Session` object. If not given, a new session is created
+                        with a pooled :class:`requests.adapters.HTTPAdapter`.
+        :param local_cache_size: See :class:`~oldman.store.cache.ResourceCache`. Defaults to `0` (disabled).
+        :param local_cache_ttl: See :class:`~oldman.store.cache.ResourceCache`. Defaults to `None`.
+        :param pool_connections: Number of host pools kept alive by the created session. Defaults to `10`.
+        :param pool_maxsize: Maximum number of connections kept alive per host. Defaults to `10`.
+        :param pool_block: If `True`, waits for a free connection when the pool of a host is full.
+                           Defaults to `False`.
+        :param max_retries: Number of retries of failed connections. Defaults to `0`.
+        :param max_workers: Maximum number of documents retrieved concurrently by
+                            :func:`~oldman.store.datastore.DataStore.get_many`
+                            (size of the worker pool owned by the store). Defaults to `8`.
     """
 
-    def __init__(self, schema_graph=None, cache_region=None, session=None):
-        DataStore.__init__(self, ModelManager(schema_graph=schema_graph), cache_region)
-        self._session = session if session is not None else requests.session()
+    _accept_header = ('text/turtle;q=1.0, '
+                      'application/rdf+xml;q=1.0, '
+                      'application/ld+json;q=.0.8, '
+                      'application/json;q=0.1')
+
+    def __init__(self, schema_graph=None, cache_region=None, session=None, local_cache_size=0,
+                 local_cache_ttl=None, pool_connections=10, pool_maxsize=10, pool_block=False, max_retries=0,
+                 max_workers=8):
+        DataStore.__init__(self, ModelManager(schema_graph=schema_graph), cache_region,
+                           local_cache_size=local_cache_size, local_cache_ttl=local_cache_ttl)
+        if session is None:
+            session = requests.session()
+            adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                  max_retries=max_retries, pool_block=pool_block)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self._session = session
+        self._max_workers = max_workers
+        # Created on the first concurrent retrieval and then re-used
+        self._pool = None
+        self._pool_lock = Lock()
         self._logger = getLogger(__name__)
 
     @property
     def session(self):
         return self._session
 
+    def support_representation_cache(self):
+        """Documents are modified remotely, so their representations are not cached."""
+        return False
+
     def _get_by_id(self, id):
-        r = self._session.get(id, headers=dict(Accept='text/turtle;q=1.0, '
-                                                      'application/rdf+xml;q=1.0, '
-                                                      'application/ld+json;q=.0.8, '
-                                                      'application/json;q=0.1'))
-        if r.status_code != 200:
-            self._logger.warn("Resource %s not retrieved (Status code: %d)." % (id, r.status_code))
-            return None
-
-        hashless_iri = id.split('#')[0]
+        return self._get_by_ids([id])[0]
+
+    def _get_by_ids(self, ids):
+        """Retrieves the documents of these resources concurrently (worker pool of the store).
+
+        Each document is requested and parsed only once, even when it describes
+        multiple resources (hash IRIs).
+        """
+        ids_by_document = {}
+        for id in ids:
+            ids_by_document.setdefault(id.split('#')[0], []).append(id)
+        documents = ids_by_document.items()
+
+        if len(documents) == 1:
+            fetched_documents = [self._fetch_document(documents[0])]
+        else:
+            fetched_documents = self._get_pool().map(self._fetch_document, documents, chunksize=1)
+
+        # Resources are created by the current thread
+        resources = {}
+        for (hashless_iri, document_ids), (graph, cached_resources) in zip(documents, fetched_documents):
+            if cached_resources is not None:
+                resources.update(cached_resources)
+            elif graph is not None:
+                resources.update({r.id: r for r in self._new_resource_objects(document_ids, graph)})
+        return [resources.get(id) for id in ids]
+
+    def close(self):
+        """Stops the worker pool of the store (if created) and waits for its threads.
+
+        Further concurrent calls create a new pool.
+        """
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPool(self._max_workers)
+            return self._pool
+
+    def _fetch_document(self, document):
+        """Requests and parses a document.
+
+        :param document: Pair (hash-less IRI, IRIs of the resources to extract).
+        :return: A pair (:class:`rdflib.Graph` object, `None`) or (`None`, `dict` of the cached resources
+                 if the document has not been modified). (`None`, `None`) if the document cannot be retrieved.
+        """
+        hashless_iri, ids = document
+        headers = dict(Accept=self._accept_header)
+
+        # Conditional request if the resources are cached with the same validators
+        validators = None
+        cached_resources = self.resource_cache.get_resources(ids)
+        if len(cached_resources) == len(set(ids)):
+            metadata = self.resource_cache.get_resources_metadata(cached_resources.keys()).values()
+            if len(metadata) == len(cached_resources) and all(m == metadata[0] for m in metadata):
+                validators = metadata[0]
+        if validators is not None:
+            if validators.get("etag") is not None:
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified") is not None:
+                headers["If-Modified-Since"] = validators["last_modified"]
+
+        r = self._session.get(hashless_iri, headers=headers)
+        if r.status_code == 304 and validators is not None:
+            self._logger.debug("%s not modified. Cached resources re-used." % hashless_iri)
+            return None, cached_resources
+        elif r.status_code != 200:
+            self._logger.warn("Document %s not retrieved (Status code: %d)." % (hashless_iri, r.status_code))
+            return None, None
+
         content_type = r.headers.get('content-type')
 
         if content_type is None:
-            self._logger.warn("No content-type returned for the resource %s." % id)
-            return None
+            self._logger.warn("No content-type returned for the document %s." % hashless_iri)
+            return None, None
         elif content_type in JSON_TYPES:
             ctx_header = r.links.get("http://www.w3.org/ns/json-ld#context")
             if ctx_header is None:
-                self._logger.warn("No context header given with the JSON representation of %s." % id)
-                return None
+                self._logger.warn("No context header given with the JSON representation of %s." % hashless_iri)
+                return None, None
 
             ctx_url = ctx_header["url"]
             resource_graph = Graph().parse(data=r.content, context=ctx_url, publicID=hashless_iri,
@@ -51,7 +163,12 @@ class HttpDataStore(DataStore):
                 resource_graph = Graph().parse(data=r.content, publicID=hashless_iri,
                                                format=content_type)
             except PluginException:
-                self._logger.warn("Content-type %s is not supported. Impossible to get %s." % (content_type, id))
-                return None
+                self._logger.warn("Content-type %s is not supported. Impossible to get %s."
+                                  % (content_type, hashless_iri))
+                return None, None
 
-        return self._new_resource_object(id, resource_graph)
\ No newline at end of file
+        etag = r.headers.get('etag')
+        last_modified = r.headers.get('last-modified')
+        # Only these resources are (re-)cached from this version of the document
+        self.resource_cache.set_resources_metadata(ids, {"etag": etag, "last_modified": last_modified})
+        return resource_graph, None
@@ -1,30 +1,222 @@
+import logging
+import sys
+from multiprocessing.pool import ThreadPool
+from Queue import Queue, Empty
+from threading import Lock
+from time import time
 
 
 class DataStoreSelector:
-    """TODO: continue"""
+    """TODO: continue
 
-    def __init__(self, data_stores):
+    When multiple data stores are selected, they are queried concurrently
+    (see :func:`~oldman.store.selector.DataStoreSelector.map_stores`).
+
+    .. admonition:: Routing
+
+        Requests are routed to the stores that are known to hold the targeted resources:
+
+          - IRIs (`id` or `hashless_iri`) are routed according to their longest registered prefix
+            (see :func:`~oldman.store.selector.DataStoreSelector.route_iri_prefix`);
+          - RDFS classes (`types`) are routed to the stores having a model for them (or for a sub-class)
+            (see :func:`~oldman.store.selector.DataStoreSelector.index_store_models`)
+            or explicitly (see :func:`~oldman.store.selector.DataStoreSelector.route_type`).
+
+        Without routing information, all the stores are selected.
+
+    :param data_stores: :class:`~oldman.store.datastore.DataStore` object or collection of them.
+    :param max_workers: Maximum number of stores queried concurrently (size of the worker pool
+                        owned by the selector). Defaults to `None` (as many workers as data stores).
+    :param store_timeout: Time (in seconds) after which the stores that have not answered yet are ignored.
+                          Defaults to `None` (waits for all of them).
+    """
+
+    def __init__(self, data_stores, max_workers=None, store_timeout=None):
         if (data_stores is None) or (isinstance(data_stores, (list, set)) and len(data_stores) == 0):
             #TODO: find a better type of exception
             raise Exception("At least one data store must be given.")
 
         self._data_stores = list(data_stores) if isinstance(data_stores, (list, set)) else [data_stores]
-        #TODO: remove
-        if len(self._data_stores) > 1:
-            raise NotImplementedError("Multiple data stores are not yet supported.")
+        self._max_workers = max_workers
+        self._store_timeout = store_timeout
+        # Created on the first concurrent call and then re-used
+        self._pool = None
+        self._pool_lock = Lock()
+        self._iri_prefix_trie = _PrefixTrie()
+        # {class_iri: set of stores}
+        self._stores_by_types = {}
+        self._logger = logging.getLogger(__name__)
 
     @property
     def data_stores(self):
         return self._data_stores
 
-    def select_stores(self, id=None, **kwargs):
-        #TODO: implement seriously
+    def route_iri_prefix(self, iri_prefix, data_store):
+        """Routes the IRIs starting with `iri_prefix` to a data store.
+
+        The longest registered prefix of an IRI prevails.
+
+        :param iri_prefix: IRI prefix (e.g. `"http://example.org/persons/"`).
+        :param data_store: :class:`~oldman.store.datastore.DataStore` object. Must be one of the `data_stores`.
+        """
+        self._check_store(data_store)
+        self._iri_prefix_trie[iri_prefix] = data_store
+
+    def route_type(self, class_iri, data_store):
+        """Declares that a data store holds instances of a RDFS class.
+
+        :param class_iri: IRI of the RDFS class.
+        :param data_store: :class:`~oldman.store.datastore.DataStore` object. Must be one of the `data_stores`.
+        """
+        self._check_store(data_store)
+        self._stores_by_types.setdefault(class_iri, set()).add(data_store)
+
+    def index_store_models(self):
+        """Routes the RDFS classes (and their ancestors) of the models of each data store to this store."""
+        for store in self._data_stores:
+            for model in store.model_manager.models:
+                for class_iri in model.ancestry_iris:
+                    if class_iri is not None:
+                        self.route_type(class_iri, store)
+
+    def select_stores(self, id=None, types=None, hashless_iri=None, **kwargs):
+        """Selects the data stores that may hold the targeted resources.
+
+        :param id: IRI of the resource. Defaults to `None`.
+        :param types: IRIs of RDFS classes. Defaults to `None`.
+        :param hashless_iri: Hash-less IRI. Defaults to `None`.
+        :return: List of :class:`~oldman.store.datastore.DataStore` objects
+                 (ordered like `data_stores`).
+        """
+        for iri in (id, hashless_iri):
+            if iri is not None:
+                store = self._iri_prefix_trie.longest_prefix_value(iri)
+                if store is not None:
+                    return [store]
+
+        if types:
+            routed_stores = set()
+            for class_iri in types:
+                routed_stores.update(self._stores_by_types.get(class_iri, []))
+            if len(routed_stores) > 0:
+                return [s for s in self._data_stores if s in routed_stores]
+
         return self._data_stores
 
     def select_store(self, **kwargs):
         """TODO: what is the correct behavior when multiple stores are returned? """
         return self.select_stores(**kwargs)[0]
 
+    def group_ids_by_stores(self, ids):
+        """Groups IRIs according to the stores they are routed to.
+
+        IRIs without routing information are assigned to every data store.
+
+        :param ids: Collection of IRIs.
+        :return: `dict` whose keys are :class:`~oldman.store.datastore.DataStore` objects
+                 and values are lists of IRIs.
+        """
+        ids_by_stores = {}
+        for id in ids:
+            for store in self.select_stores(id=id):
+                ids_by_stores.setdefault(store, []).append(id)
+        return ids_by_stores
+
     def select_sparql_stores(self, query):
         #TODO: look at the query for filtering
         return filter(lambda s: s.support_sparql_filtering(), self._data_stores)
+
+    def map_stores(self, function, stores):
+        """Calls a function on each store concurrently (worker pool of the selector).
+
+        Results are generated as they arrive. Stores that do not answer
+        before the `store_timeout` are ignored (a warning is logged).
+        Exceptions raised by the function are re-raised.
+
+        :param function: Function that takes a :class:`~oldman.store.datastore.DataStore` object.
+        :param stores: Collection of :class:`~oldman.store.datastore.DataStore` objects.
+        :return: Generator of pairs (store, result).
+        """
+        stores = list(stores)
+        # No need for a worker
+        if len(stores) <= 1:
+            for store in stores:
+                yield store, function(store)
+            return
+
+        results = Queue()
+
+        def call(s):
+            try:
+                results.put((s, function(s), None))
+            except Exception:
+                results.put((s, None, sys.exc_info()))
+
+        # Slow workers are not waited for
+        pool = self._get_pool()
+        for store in stores:
+            pool.apply_async(call, (store,))
+
+        deadline = time() + self._store_timeout if self._store_timeout is not None else None
+        for received_count in range(len(stores)):
+            try:
+                if deadline is None:
+                    store, result, exc_info = results.get()
+                else:
+                    store, result, exc_info = results.get(timeout=max(deadline - time(), 0))
+            except Empty:
+                self._logger.warn(u"%d data store(s) did not answer within %s seconds. Ignored."
+                                  % (len(stores) - received_count, self._store_timeout))
+                return
+            if exc_info is not None:
+                raise exc_info[0], exc_info[1], exc_info[2]
+            yield store, result
+
+    def close(self):
+        """Stops the worker pool of the selector (if created) and waits for its threads.
+
+        Further concurrent calls create a new pool.
+        """
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                pool_size = len(self._data_stores) if self._max_workers is None else self._max_workers
+                self._pool = ThreadPool(pool_size)
+            return self._pool
+
+    def _check_store(self, data_store):
+        if data_store not in self._data_stores:
+            #TODO: find a better type of exception
+            raise Exception("Unknown data store: %s" % data_store)
+
+
+class _PrefixTrie(object):
+    """Character trie mapping string prefixes to values."""
+
+    def __init__(self):
+        # Node: [value, {character: child node}]
+        self._root = [None, {}]
+
+    def __setitem__(self, prefix, value):
+        node = self._root
+        for character in prefix:
+            node = node[1].setdefault(character, [None, {}])
+        node[0] = value
+
+    def longest_prefix_value(self, key):
+        """:return: The value of the longest prefix of `key` or `None`."""
+        node = self._root
+        value = node[0]
+        for character in key:
+            node = node[1].get(character)
+            if node is None:
+                break
+            if node[0] is not None:
+                value = node[0]
+        return value
@@ -0,0 +1,151 @@
+import logging
+from collections import OrderedDict
+
+
+class StoreSession(object):
+    """A :class:`~oldman.store.session.StoreSession` object is a unit of work
+    that batches the updates of a :class:`~oldman.store.datastore.DataStore` object.
+
+    While the session is active (in the current thread), the updates produced by the saved and deleted
+    :class:`~oldman.resource.Resource` objects (including type changes and cascade deletions)
+    are not sent to the data store but collected. They are sent on :func:`~oldman.store.session.StoreSession.flush`
+    as a few combined update requests. The cache (including the document versions) is updated at the same time.
+
+    Pending updates are not visible to the read requests.
+
+    Usage::
+
+        with data_store.new_session():
+            for r in resources:
+                r.save()
+
+    :param data_store: :class:`~oldman.store.datastore.DataStore` object.
+    :param chunk_size: Maximum number of update operations sent within one request. Defaults to `100`.
+    """
+
+    def __init__(self, data_store, chunk_size=100):
+        self._data_store = data_store
+        self._chunk_size = chunk_size
+        self._updates = []
+        self._resources_to_cache = OrderedDict()
+        self._ids_to_uncache = set()
+        self._documents_to_bump = set()
+        self._logger = logging.getLogger(__name__)
+
+    @property
+    def data_store(self):
+        """:class:`~oldman.store.datastore.DataStore` object."""
+        return self._data_store
+
+    @property
+    def pending_update_count(self):
+        """Number of update operations not sent yet."""
+        return len(self._updates)
+
+    def begin(self):
+        """Activates the session in the current thread."""
+        self._data_store._set_current_session(self)
+        return self
+
+    def add_update(self, update):
+        """Collects an update operation. Not for end-users.
+
+        :param update: Update operation (e.g. a SPARQL Update request).
+        """
+        self._updates.append(update)
+
+    def cache_resource(self, resource):
+        """Defers the caching of a saved :class:`~oldman.resource.Resource` object. Not for end-users."""
+        self._ids_to_uncache.discard(resource.id)
+        self._resources_to_cache[resource.id] = resource
+
+    def uncache_resource(self, id):
+        """Defers the removal of a deleted resource from the cache. Not for end-users."""
+        self._resources_to_cache.pop(id, None)
+        self._ids_to_uncache.add(id)
+
+    def bump_document_versions(self, hashless_iris):
+        """Defers the version bump of some documents (e.g. documents embedding a modified blank node).
+        Not for end-users."""
+        self._documents_to_bump.update(hashless_iris)
+
+    def flush(self):
+        """Sends the pending updates (chunked) and updates the cache.
+
+        Chunks are not sent atomically. If one of them fails, the previous ones remain applied,
+        so the concerned resources are removed from the cache and their documents get new versions.
+        """
+        try:
+            for i in range(0, len(self._updates), self._chunk_size):
+                self._data_store._execute_updates(self._updates[i:i + self._chunk_size])
+        except Exception:
+            self._logger.error(u"Flush failed: the concerned resources are removed from the cache.")
+            self._invalidate()
+            raise
+        self._logger.debug(u"%d update operations flushed." % len(self._updates))
+        self._updates = []
+
+        cache = self._data_store.resource_cache
+        cache.set_resources(self._resources_to_cache.values())
+        cache.remove_resources_from_ids(self._ids_to_uncache)
+        cache.bump_document_versions({id.split('#')[0] for id in
+                                      set(self._resources_to_cache.keys()).union(self._ids_to_uncache)}
+                                     .union(self._documents_to_bump))
+        self._resources_to_cache = OrderedDict()
+        self._ids_to_uncache = set()
+        self._documents_to_bump = set()
+
+    def commit(self):
+        """Flushes and ends the session."""
+        try:
+            self.flush()
+        finally:
+            self._end()
+
+    def rollback(self):
+        """Discards the pending updates and ends the session.
+
+        The concerned resources are removed from the cache. However, the
+        :class:`~oldman.resource.Resource` objects in memory are not restored.
+        """
+        self._logger.info(u"%d update operations discarded." % len(self._updates))
+        ids = set(self._resources_to_cache.keys()).union(self._ids_to_uncache)
+        self._updates = []
+        self._resources_to_cache = OrderedDict()
+        self._ids_to_uncache = set()
+        self._documents_to_bump = set()
+        try:
+            self._data_store.resource_cache.remove_resources_from_ids(ids)
+        finally:
+            self._end()
+
+    def _invalidate(self):
+        """Discards the pending updates, removes the concerned resources from the cache
+        and bumps the versions of their documents."""
+        ids = set(self._resources_to_cache.keys()).union(self._ids_to_uncache)
+        documents = {id.split('#')[0] for id in ids}.union(self._documents_to_bump)
+        self._updates = []
+        self._resources_to_cache = OrderedDict()
+        self._ids_to_uncache = set()
+        self._documents_to_bump = set()
+        cache = self._data_store.resource_cache
+        cache.remove_resources_from_ids(ids)
+        cache.bump_document_versions(documents)
+
+    def _end(self):
+        if self._data_store.current_session is self:
+            self._data_store._set_current_session(None)
+
+    def __enter__(self):
+        return self.begin()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            try:
+                self.commit()
+            except Exception:
+                # The cache may not have been updated
+                self._invalidate()
+                raise
+        else:
+            self.rollback()
@@ -1,12 +1,18 @@
 import logging
-from threading import Lock
+from threading import Lock, RLock
+from uuid import uuid1
+from weakref import WeakKeyDictionary
 
-from rdflib import URIRef, Graph, RDF
+from rdflib import URIRef, Graph, RDF, Literal
 from rdflib.plugins.sparql.parser import ParseException
+from rdflib.plugins.stores.sparqlstore import SPARQLStore
 
-from oldman.utils.sparql import build_query_part, build_update_query_part
+from oldman.utils.sparql import build_query_part, build_update_query_part, is_valid_iri
+from oldman.utils.cursor import parse_cursor
 from oldman.model.manager import ModelManager
-from oldman.exception import OMSPARQLParseError, OMAttributeAccessError, OMSPARQLError
+from oldman.resource.resource import is_blank_node
+from oldman.vocabulary import HYDRA_MEMBER_IRI, HYDRA_PAGED_COLLECTION_IRI
+from oldman.exception import OMSPARQLParseError, OMAttributeAccessError, OMSPARQLError, OMUserError
 from oldman.exception import OMHashIriError
 from oldman.exception import OMDataStoreError
 from .datastore import DataStore
@@ -26,10 +32,33 @@ class SPARQLDataStore(DataStore):
                          This object must already be configured.
                          Defaults to None (no cache).
                          See :class:`~oldman.store.cache.ResourceCache` for further details.
+    :param chunk_size: Maximum number of IRIs given to a SPARQL `VALUES` block
+                       by :func:`~oldman.store.datastore.DataStore.get_many`. Defaults to `100`.
+    :param local_cache_size: See :class:`~oldman.store.cache.ResourceCache`. Defaults to `0` (disabled).
+    :param local_cache_ttl: See :class:`~oldman.store.cache.ResourceCache`. Defaults to `None`.
+    :param lock_free_counter: If `True`, instance numbers are reserved without any local lock.
+                              The counter is incremented by one SPARQL update that also marks it with a unique
+                              token. The reservation is retried if another one has overwritten this token
+                              before it is read back (some numbers are then skipped).
+                              Requires an endpoint that executes each update atomically. Defaults to `False`.
+
+    .. admonition:: Paged collections
+
+        The `hydra:member` triples of the `hydra:PagedCollection` resources are never loaded
+        (these collections may have a very large number of members).
+        Their members are read page by page with
+        :func:`~oldman.store.sparql.SPARQLDataStore.get_values_page`
+        and appended with :func:`~oldman.store.sparql.SPARQLDataStore.add_object_values`.
+        They are removed when the collection is deleted.
 
     TODO: explain the choice between schema_graph and resource_manager
     """
-    _iri_mutex = Lock()
+    # Counter locks: {underlying rdflib store: {RDFS class IRI: lock}}
+    _counter_locks = WeakKeyDictionary()
+    _counter_locks_mutex = Lock()
+    # Held while rdflib handles SPARQL requests in-process: its parser (pyparsing) is not
+    # thread-safe and the data stores are queried concurrently (requests sent to endpoints are not concerned)
+    _parsing_lock = RLock()
     _counter_query_req = u"""
             PREFIX oldman: <urn:oldman:>
             SELECT ?number
@@ -48,13 +77,43 @@ class SPARQLDataStore(DataStore):
                 ?class_iri oldman:nextNumber ?current .
                 BIND (?current+1 AS ?next)
             }"""
+    # One request (two operations)
+    _token_counter_update_req = u"""
+            PREFIX oldman: <urn:oldman:>
+            DELETE WHERE {
+                ?class_iri oldman:lastReservation ?previous_token .
+            } ;
+            DELETE {
+                ?class_iri oldman:nextNumber ?current .
+            }
+            INSERT {
+                ?class_iri oldman:nextNumber ?next .
+                ?class_iri oldman:lastReservation ?token .
+            }
+            WHERE {
+                ?class_iri oldman:nextNumber ?current .
+                BIND (?current+1 AS ?next)
+            }"""
+    _token_query_req = u"""
+            PREFIX oldman: <urn:oldman:>
+            SELECT ?number
+            WHERE {
+                ?class_iri oldman:nextNumber ?number ;
+                    oldman:lastReservation ?token .
+            }"""
+    # Attempts of a lock-free reservation before giving up
+    _max_reservation_attempts = 20
 
-    def __init__(self, data_graph, schema_graph=None, model_manager=None, union_graph=None, cache_region=None):
+    def __init__(self, data_graph, schema_graph=None, model_manager=None, union_graph=None, cache_region=None,
+                 chunk_size=100, local_cache_size=0, local_cache_ttl=None, lock_free_counter=False):
         manager = model_manager if model_manager is not None else ModelManager(schema_graph)
-        DataStore.__init__(self, manager, cache_region, support_sparql=True)
+        DataStore.__init__(self, manager, cache_region, support_sparql=True, local_cache_size=local_cache_size,
+                           local_cache_ttl=local_cache_ttl)
         self._logger = logging.getLogger(__name__)
         self._data_graph = data_graph
         self._union_graph = union_graph if union_graph is not None else data_graph
+        self._chunk_size = chunk_size
+        self._lock_free_counter = lock_free_counter
 
     def extract_prefixes(self, other_graph):
         """Adds the RDF prefix (namespace) information from an other graph
@@ -74,33 +133,99 @@ class SPARQLDataStore(DataStore):
         if "SELECT" not in query:
             raise OMSPARQLError(u"Not a SELECT query. Query: %s" % query)
         try:
-            results = self._union_graph.query(query)
+            results = self._query(self._union_graph, query)
         except ParseException as e:
             raise OMSPARQLError(u"%s\n %s" % (query, e))
         return (self.get(id=unicode(r[0])) for r in results)
 
     def exists(self, id):
-        return bool(self._union_graph.query(u"ASK {?id ?p ?o .}", initBindings={'id': URIRef(id)}))
+        return bool(self._query(self._union_graph, u"ASK {?id ?p ?o .}", initBindings={'id': URIRef(id)}))
+
+    def exists_many(self, ids):
+        """See :func:`oldman.store.datastore.DataStore.exists_many`.
+
+        One SPARQL query (`VALUES` block) per chunk of IRIs.
+        Raises an :class:`~oldman.exception.OMUserError` exception if one IRI is invalid.
+        """
+        ids = [unicode(id) for id in ids]
+        for id in ids:
+            if not is_valid_iri(id):
+                raise OMUserError(u"Invalid IRI: %s" % id)
+        existing_ids = set()
+        for i in range(0, len(ids), self._chunk_size):
+            values = u" ".join([u"<%s>" % id for id in ids[i:i + self._chunk_size]])
+            query = u"SELECT DISTINCT ?s WHERE { ?s ?p ?o . VALUES ?s { %s } }" % values
+            try:
+                existing_ids.update(unicode(r[0]) for r in self._query(self._union_graph, query))
+            except ParseException as e:
+                raise OMSPARQLParseError(u"%s\n %s" % (query, e))
+        return existing_ids
 
     def generate_instance_number(self, class_iri):
         """ Needed for generating incremental IRIs. """
-        counter_query_req = unicode(self._counter_query_req).replace("?class_iri", u"<%s>" % class_iri)
-        counter_update_req = unicode(self._counter_update_req).replace("?class_iri", u"<%s>" % class_iri)
+        return self.reserve_instance_numbers(class_iri, 1)
 
-        # Critical section
-        self._iri_mutex.acquire()
-        try:
-            self._data_graph.update(counter_update_req)
-            numbers = [int(r) for r, in self._data_graph.query(counter_query_req)]
-        finally:
-            self._iri_mutex.release()
+    def reserve_instance_numbers(self, class_iri, count):
+        """See :func:`oldman.store.datastore.DataStore.reserve_instance_numbers`.
+
+        The whole block is reserved within one SPARQL update. Only the reservations
+        of the same class in the same underlying store are serialized.
+        """
+        if self._lock_free_counter:
+            numbers = self._reserve_numbers_with_token(class_iri, count)
+        else:
+            counter_query_req = unicode(self._counter_query_req).replace("?class_iri", u"<%s>" % class_iri)
+            counter_update_req = unicode(self._counter_update_req).replace("?class_iri", u"<%s>" % class_iri)
+            counter_update_req = counter_update_req.replace("?current+1", u"?current+%d" % count)
+
+            # Critical section
+            with self._get_counter_lock(class_iri):
+                self._update(counter_update_req)
+                numbers = [int(r) for r, in self._query(self._data_graph, counter_query_req)]
 
         if len(numbers) == 0:
             raise OMDataStoreError(u"No counter for class %s (has disappeared)" % class_iri)
         elif len(numbers) > 1:
             raise OMDataStoreError(u"Multiple counter for class %s" % class_iri)
 
-        return numbers[0]
+        # The counter stores the last reserved number
+        return numbers[0] - count + 1
+
+    def _reserve_numbers_with_token(self, class_iri, count):
+        """Lock-free reservation.
+
+        The counter is incremented and marked with a unique token by one atomic update request.
+        If the token is still there when the counter is read back, the block is ours.
+        Otherwise, another reservation has happened in the meantime and the block is given up.
+        """
+        class_ref = u"<%s>" % class_iri
+        counter_update_req = unicode(self._token_counter_update_req).replace("?class_iri", class_ref)
+        counter_update_req = counter_update_req.replace("?current+1", u"?current+%d" % count)
+        token_query_req = unicode(self._token_query_req).replace("?class_iri", class_ref)
+        counter_query_req = unicode(self._counter_query_req).replace("?class_iri", class_ref)
+
+        for _ in range(self._max_reservation_attempts):
+            token = u"<urn:uuid:%s>" % uuid1()
+            self._update(counter_update_req.replace("?token", token))
+            numbers = [int(r) for r, in self._query(self._data_graph, token_query_req.replace("?token", token))]
+            if len(numbers) > 0:
+                return numbers
+            # The counter has disappeared
+            if len(self._query(self._data_graph, counter_query_req)) == 0:
+                return numbers
+        raise OMDataStoreError(u"Too many concurrent reservations for class %s" % class_iri)
+
+    def _get_counter_lock(self, class_iri):
+        with self._counter_locks_mutex:
+            store_locks = self._counter_locks.get(self._data_graph.store)
+            if store_locks is None:
+                store_locks = {}
+                self._counter_locks[self._data_graph.store] = store_locks
+            lock = store_locks.get(class_iri)
+            if lock is None:
+                lock = Lock()
+                store_locks[class_iri] = lock
+        return lock
 
     def check_and_repair_counter(self, class_iri):
         """ Checks the counter of a given RDFS class and repairs (inits) it if needed.
@@ -108,7 +233,7 @@ class SPARQLDataStore(DataStore):
         :param class_iri: RDFS class IRI.
         """
         counter_query_req = unicode(self._counter_query_req).replace("?class_iri", u"<%s>" % class_iri)
-        numbers = list(self._data_graph.query(counter_query_req))
+        numbers = list(self._query(self._data_graph, counter_query_req))
         # Inits if no counter
         if len(numbers) == 0:
             self.reset_instance_counter(class_iri)
@@ -130,20 +255,20 @@ class SPARQLDataStore(DataStore):
             WHERE {
                 ?class_iri oldman:nextNumber ?number .
             }""".replace("?class_iri", "<%s>" % class_iri)
-        self._data_graph.update(delete_req)
+        self._update(delete_req)
 
         insert_req = u"""
             PREFIX oldman: <urn:oldman:>
             INSERT DATA {
                 <%s> oldman:nextNumber 0 .
                 }""" % class_iri
-        self._data_graph.update(insert_req)
+        self._update(insert_req)
 
     def _get_first_resource_found(self):
         self._logger.warn(u"get() called without parameter. Returns the first resource found in the union graph.")
         query = u"SELECT ?s WHERE { ?s ?p ?o } LIMIT 1"
         try:
-            results = self._union_graph.query(query)
+            results = self._query(self._union_graph, query)
         except ParseException as e:
             raise OMSPARQLParseError(u"%s\n %s" % (query, e))
         for r, in results:
@@ -155,58 +280,125 @@ class SPARQLDataStore(DataStore):
         resource = self.resource_cache.get_resource(id)
         if resource:
             return resource
-        resource_graph = Graph()
         iri = URIRef(id)
 
-        eager = eager_with_reversed_attributes and self.model_manager.include_reversed_attributes
-        if eager:
-            #TODO: look at specific properties and see if it improves the performance
-            triple_query = u"""SELECT ?s ?p ?o
-            WHERE {
-               {
-                  ?s ?p ?o .
-                  VALUES ?s { ?subject }
-               }
-               UNION
-               {
-                 ?s ?p ?o .
-                 VALUES ?o { ?subject }
-               }
-            }""".replace("?subject", "<%s>" % iri)
-            for s, p, o in self._union_graph.query(triple_query):
-                resource_graph.add((s, p, o))
+        include_reversed = self.model_manager.include_reversed_attributes
+        if eager_with_reversed_attributes or not include_reversed:
+            # One single round trip: subject triples, reversed triples (if needed) and list cells
+            resource_graph = self._load_resource_graph([iri], include_reversed,
+                                                       self.model_manager.list_property_iris)
         #Lazy
         else:
+            resource_graph = Graph()
             resource_graph += self._union_graph.triples((iri, None, None))
 
-            if self.model_manager.include_reversed_attributes:
-                #Extracts the types
-                types = {unicode(o) for o in resource_graph.objects(iri, RDF.type)}
-                models, _ = self.model_manager.find_models_and_types(types)
+            #Extracts the types
+            types = {unicode(o) for o in resource_graph.objects(iri, RDF.type)}
+            if HYDRA_PAGED_COLLECTION_IRI in types:
+                resource_graph.remove((iri, URIRef(HYDRA_MEMBER_IRI), None))
+            models, _ = self.model_manager.find_models_and_types(types)
 
-                #TODO: improve by looking at specific properties
-                if True in [m.include_reversed_attributes for m in models]:
-                    resource_graph += self._union_graph.triples((None, None, iri))
+            #TODO: improve by looking at specific properties
+            if True in [m.has_reversed_attributes for m in models]:
+                resource_graph += self._union_graph.triples((None, None, iri))
 
-        self._logger.debug(u"All triples with subject %s loaded from the union_graph" % iri)
-        # Extracts lists
-        list_items_request = u"""
-        SELECT ?subList ?value ?previous
-        WHERE {
-          <%s> ?p ?l .
-          ?l rdf:rest* ?subList .
-          ?subList rdf:first ?value .
-          OPTIONAL { ?previous rdf:rest ?subList }
-        }""" % id
-        results = list(self._union_graph.query(list_items_request))
-        for subList, value, previous in results:
-            if previous is not None:
-                resource_graph.add((previous, RDF.rest, subList))
-            resource_graph.add((subList, RDF.first, value))
+            # Extracts lists (only if some models have list attributes)
+            list_property_iris = {p for m in models for p in m.list_property_iris}
+            if len(list_property_iris) > 0:
+                list_query = u"SELECT ?s ?p ?o WHERE { %s }" % _build_list_cell_pattern([iri], list_property_iris)
+                for s, p, o in self._query(self._union_graph, list_query):
+                    resource_graph.add((s, p, o))
 
+        self._logger.debug(u"All triples with subject %s loaded from the union_graph" % iri)
         return self._new_resource_object(id, resource_graph)
 
-    def _filter(self, type_iris, hashless_iri, limit, eager, pre_cache_properties, **kwargs):
+    def _get_by_ids(self, ids):
+        """Loads the resources that are not in the cache within one SPARQL query per chunk of IRIs.
+
+        IRIs that are not the subject of any triple give `None` and are not cached.
+        """
+        include_reversed = self.model_manager.include_reversed_attributes
+        list_property_iris = self.model_manager.list_property_iris
+
+        resources = []
+        for i in range(0, len(ids), self._chunk_size):
+            chunk = ids[i:i + self._chunk_size]
+            graph = self._load_resource_graph([URIRef(id) for id in chunk], include_reversed, list_property_iris)
+            found_ids = [id for id in chunk if (URIRef(id), None, None) in graph]
+            found_resources = {r.id: r for r in self._new_resource_objects(found_ids, graph)}
+            resources += [found_resources.get(id) for id in chunk]
+        return resources
+
+    def _load_resource_graph(self, iris, include_reversed, list_property_iris, include_paged_members=False):
+        """Loads the triples describing some resources within one single SPARQL query.
+
+        :param iris: List of :class:`rdflib.URIRef` objects.
+        :param include_reversed: If `True`, the triples where the resources are the objects are also loaded.
+        :param list_property_iris: IRIs of the properties whose values are RDF lists.
+                                   Their list cells are loaded within the same query.
+                                   If empty, no list cell is requested.
+        :param include_paged_members: If `True`, the `hydra:member` triples of the paged collections
+                                      are also loaded. Defaults to `False`.
+        :return: A :class:`rdflib.Graph` object.
+        """
+        #TODO: look at specific properties and see if it improves the performance
+        values = u" ".join([u"<%s>" % iri for iri in iris])
+        member_filter = u"" if include_paged_members else _build_paged_member_filter(u"?s", u"?p")
+        blocks = [u"{ ?s ?p ?o . VALUES ?s { %s } %s}" % (values, member_filter)]
+        if include_reversed:
+            blocks.append(u"{ ?s ?p ?o . VALUES ?o { %s } }" % values)
+        if len(list_property_iris) > 0:
+            blocks.append(u"{ %s }" % _build_list_cell_pattern(iris, list_property_iris))
+        triple_query = u"SELECT ?s ?p ?o\nWHERE {\n  %s\n}" % u"\n  UNION\n  ".join(blocks)
+
+        resource_graph = Graph()
+        try:
+            results = self._query(self._union_graph, triple_query)
+        except ParseException as e:
+            raise OMSPARQLParseError(u"%s\n %s" % (triple_query, e))
+        for s, p, o in results:
+            resource_graph.add((s, p, o))
+        return resource_graph
+
+    def _filter(self, type_iris, hashless_iri, limit, eager, pre_cache_properties, order_by=None, after=None,
+                **kwargs):
+        lines, models = self._build_filter_lines(type_iris, hashless_iri, **kwargs)
+
+        is_ordered = order_by is not None or after is not None
+        if is_ordered:
+            lines += _build_keyset_lines(models, order_by, after)
+
+        query = build_query_part(u"SELECT DISTINCT ?s WHERE", u"?s", lines)
+        if is_ordered:
+            query += u"ORDER BY %sSTR(?s)\n" % (u"?key " if order_by not in (None, "id") else u"")
+        if limit is not None:
+            query += u"LIMIT %d" % limit
+
+        if eager and is_ordered:
+            return self._filter_eagerly_in_order(query, pre_cache_properties)
+        elif eager:
+            return self._filter_eagerly(query, pre_cache_properties)
+        # Lazy (by default)
+        return self._filter_lazily(query)
+
+    def _count(self, type_iris, hashless_iri, **kwargs):
+        """Same graph pattern as :func:`~oldman.store.sparql.SPARQLDataStore._filter`.
+
+        The selection is a sub-query (some engines like RDFLib 4.2 mishandle filters
+        next to aggregates).
+        """
+        lines, _ = self._build_filter_lines(type_iris, hashless_iri, **kwargs)
+        sub_query = build_query_part(u"SELECT DISTINCT ?s WHERE", u"?s", lines)
+        query = u"SELECT (COUNT(?s) AS ?count) WHERE {\n{ %s}\n}" % sub_query
+        self._logger.debug(u"Count query: %s" % query)
+        try:
+            return int(list(self._query(self._union_graph, query))[0][0])
+        except ParseException as e:
+            raise OMSPARQLParseError(u"%s\n %s" % (query, e))
+
+    def _build_filter_lines(self, type_iris, hashless_iri, **kwargs):
+        """:return: The lines of the graph pattern selecting the resources (?s) and the models of `type_iris`."""
+        models = []
         if len(type_iris) == 0 and len(kwargs) == 0:
             if hashless_iri is None:
                 self._logger.warn(u"filter() called without parameter. Returns every resource in the union graph.")
@@ -229,29 +421,71 @@ class SPARQLDataStore(DataStore):
         if hashless_iri is not None:
             if "#" in hashless_iri:
                 raise OMHashIriError(u"%s is not a hash-less IRI" % hashless_iri)
-            lines += u"""FILTER (REGEX(STR(?s), CONCAT(?base, "#")) || (STR(?s) = ?base) )""".replace(
+            lines += u"""FILTER (REGEX(STR(?s), CONCAT(?base, "#")) || (STR(?s) = ?base) )\n""".replace(
                 u"?base", u'"%s"' % hashless_iri)
-
-        query = build_query_part(u"SELECT DISTINCT ?s WHERE", u"?s", lines)
-        if limit is not None:
-            query += u"LIMIT %d" % limit
-
-        if eager:
-            return self._filter_eagerly(query, pre_cache_properties)
-        # Lazy (by default)
-        return self._filter_lazily(query)
+        return lines, models
 
     def _filter_lazily(self, query):
         """ Lazy filtering """
         self._logger.debug(u"Filter query: %s" % query)
         try:
-            results = self._union_graph.query(query)
+            results = self._query(self._union_graph, query)
         except ParseException as e:
             raise OMSPARQLParseError(u"%s\n %s" % (query, e))
 
         # Generator expression
         return (self.get(id=unicode(r[0])) for r in results)
 
+    def _filter_eagerly_in_order(self, query, pre_cache_properties):
+        """Eager but ordered: the ordered IRIs are requested first, then the resources
+        are retrieved in bulk (see :func:`~oldman.store.datastore.DataStore.get_many`).
+
+        When `pre_cache_properties` is given, the related resources are loaded by one more query
+        on these IRIs (the ordered selection is not run again).
+        """
+        self._logger.debug(u"Filter query: %s" % query)
+        try:
+            ids = [unicode(r[0]) for r in self._query(self._union_graph, query)]
+        except ParseException as e:
+            raise OMSPARQLParseError(u"%s\n %s" % (query, e))
+        if len(ids) == 0:
+            return []
+        if pre_cache_properties is not None:
+            self._pre_cache_related_resources(ids, pre_cache_properties)
+        return [r for r in self.get_many(ids) if r is not None]
+
+    def _pre_cache_related_resources(self, ids, pre_cache_properties):
+        """Loads and caches, within one single SPARQL query, the resources related
+        to `ids` by the `pre_cache_properties`.
+
+        The related resources already in the cache are left untouched.
+        """
+        query = u"""SELECT DISTINCT ?s2 ?p2 ?o2
+            WHERE
+            {
+                VALUES ?s { %s }
+                VALUES ?sp { %s }
+                ?s ?sp ?s2 .
+                ?s2 ?p2 ?o2 .
+                FILTER (isIRI(?s2)) .
+                %s
+            }""" % (u" ".join([u"<%s>" % id for id in ids]), u" ".join([u"<%s>" % p for p in pre_cache_properties]),
+                    _build_paged_member_filter(u"?s2", u"?p2"))
+        self._logger.debug(u"Pre-cache query: %s" % query)
+        try:
+            results = self._query(self._union_graph, query)
+        except ParseException as e:
+            raise OMSPARQLParseError(u"%s\n %s" % (query, e))
+
+        graph = Graph()
+        for s2, p2, o2 in results:
+            graph.add((s2, p2, o2))
+        related_iris = {unicode(s) for s in graph.subjects()}
+        if len(related_iris) == 0:
+            return
+        cached_resources = self.resource_cache.get_resources(related_iris)
+        self._new_resource_objects([iri for iri in related_iris if iri not in cached_resources], graph)
+
     def _filter_eagerly(self, sub_query, pre_cache_properties, erase_cache=False):
         """Eager: requests all the properties of all returned resource
         within one single SPARQL query.
@@ -277,7 +511,8 @@ class SPARQLDataStore(DataStore):
                    VALUES ?sp { %s }
                  }
                 FILTER (isIRI(?s2)) .
-            }""" % (sub_query, " ".join(properties))
+                %s
+            }""" % (sub_query, " ".join(properties), _build_paged_member_filter(u"?s2", u"?p2"))
         else:
             query = u"""SELECT DISTINCT ?s ?p ?o
             WHERE
@@ -286,11 +521,12 @@ class SPARQLDataStore(DataStore):
                  {
                   %s
                  }
-            }""" % sub_query
+              %s
+            }""" % (sub_query, _build_paged_member_filter(u"?s", u"?p"))
 
         self._logger.debug(u"Filter query: %s" % query)
         try:
-            results = self._union_graph.query(query)
+            results = self._query(self._union_graph, query)
         except ParseException as e:
             raise OMSPARQLParseError(u"%s\n %s" % (query, e))
 
@@ -313,23 +549,18 @@ class SPARQLDataStore(DataStore):
 
         main_resources = []
         if erase_cache:
-            new_resource_iris = resource_iris
+            new_resource_iris = list(resource_iris)
         else:
-            new_resource_iris = []
-            # Resource from cache
-            for iri in resource_iris:
-                resource = self.resource_cache.get_resource(iri)
-                if resource is None:
-                    new_resource_iris.append(iri)
-                elif iri in main_resource_iris:
-                    main_resources.append(resource)
+            # Resources from cache (one single request)
+            cached_resources = self.resource_cache.get_resources(resource_iris)
+            new_resource_iris = [iri for iri in resource_iris if unicode(iri) not in cached_resources]
+            main_resources += [r for iri, r in cached_resources.iteritems() if URIRef(iri) in main_resource_iris]
 
         #TODO: retrieve list values on new resource iris
 
-        for iri in new_resource_iris:
-            # Resource created and set in the cache
-            resource = self._new_resource_object(iri, graph)
-            if iri in main_resource_iris:
+        # Resources created and set in the cache (one single request)
+        for resource in self._new_resource_objects(new_resource_iris, graph):
+            if URIRef(resource.id) in main_resource_iris:
                 main_resources.append(resource)
 
         return main_resources
@@ -359,19 +590,177 @@ class SPARQLDataStore(DataStore):
                 type_line = u"<%s> a <%s> .\n" % (id, t)
                 former_lines += type_line
 
-        query = build_update_query_part(u"DELETE DATA", id, former_lines)
+        operations = [build_update_query_part(u"DELETE DATA", id, former_lines),
+                      build_update_query_part(u"INSERT DATA", id, new_lines)]
+        # Deleted paged collection: its members have not been loaded
+        if former_types is not None and HYDRA_PAGED_COLLECTION_IRI in former_types and len(resource.types) == 0:
+            operations.append(build_update_query_part(u"DELETE WHERE", id,
+                                                      u"{0} <%s> ?member .\n" % HYDRA_MEMBER_IRI))
+        query = u" ;\n".join(op for op in operations if len(op) > 0)
         if len(query) > 0:
-            query += u" ;"
-        query += build_update_query_part(u"INSERT DATA", id, new_lines)
-        if len(query) > 0:
-            self._logger.debug("Query: %s" % query)
+            session = self.current_session
+            if session is not None:
+                session.add_update(query)
+            else:
+                self._execute_update(query)
+
+        # Same IRI (no change)
+        return id
+
+    def insert_nt(self, nt_lines):
+        """See :func:`oldman.store.datastore.DataStore.insert_nt`.
+
+        Deferred to the current session (if any).
+        """
+        if len(nt_lines) > 0:
+            query = u"INSERT DATA {\n%s}" % nt_lines
+            session = self.current_session
+            if session is not None:
+                session.add_update(query)
+            else:
+                self._execute_update(query)
+
+    def get_values_page(self, id, property_iri, limit, offset=0, after=None):
+        """See :func:`oldman.store.datastore.DataStore.get_values_page`.
+
+        One more value is requested to know if there is a next page.
+        """
+        cursor_filter = u"FILTER (STR(?o) > %s)\n" % Literal(after).n3() if after is not None else u""
+        query = u"SELECT ?o WHERE {\n<%s> <%s> ?o .\n%s}\nORDER BY STR(?o)\nLIMIT %d\nOFFSET %d" % (
+            id, property_iri, cursor_filter, limit + 1, offset)
+        self._logger.debug(u"Page query: %s" % query)
+        try:
+            values = [unicode(row[0]) for row in self._query(self._union_graph, query)]
+        except ParseException as e:
+            raise OMSPARQLParseError(u"%s\n %s" % (query, e))
+        return values[:limit], len(values) > limit
+
+    def export_graphs(self, types, chunk_size=1000):
+        """See :func:`oldman.store.datastore.DataStore.export_graphs`.
+
+        Pages are delimited by a cursor on the IRIs (instead of an OFFSET)
+        and their triples are loaded eagerly within one single SPARQL query.
+        """
+        type_lines = u"".join([u"?s a <%s> .\n" % t for t in types])
+        models, _ = self._model_manager.find_models_and_types(set(types))
+        list_property_iris = {p for m in models for p in m.list_property_iris}
+        last_iri = None
+        while True:
+            cursor_filter = u"FILTER (STR(?s) > %s)\n" % Literal(last_iri).n3() if last_iri is not None else u""
+            query = u"SELECT DISTINCT ?s WHERE {\n%s%s}\nORDER BY STR(?s)\nLIMIT %d" % (type_lines, cursor_filter,
+                                                                                      chunk_size)
+            self._logger.debug(u"Export query: %s" % query)
             try:
-                self._data_graph.update(query)
+                iris = [row[0] for row in self._query(self._union_graph, query)]
             except ParseException as e:
                 raise OMSPARQLParseError(u"%s\n %s" % (query, e))
+            if len(iris) == 0:
+                return
+            yield self._load_resource_graph(iris, False, list_property_iris, include_paged_members=True)
+            if len(iris) < chunk_size:
+                return
+            last_iri = iris[-1]
+
+    def _find_document_iris(self, ids):
+        """See :func:`oldman.store.datastore.DataStore._find_document_iris`.
+
+        The resources referring to the blank nodes are searched recursively
+        (one query per level). Nothing is searched when there is no cache.
+        """
+        document_iris = set()
+        blank_node_ids = set()
+        for id in ids:
+            if id is None:
+                continue
+            document_iris.add(id.split('#')[0])
+            if is_blank_node(id):
+                blank_node_ids.add(id)
+        if not self.resource_cache.is_active():
+            return document_iris
+
+        visited_ids = set(blank_node_ids)
+        while len(blank_node_ids) > 0:
+            values = u" ".join([URIRef(id).n3() for id in blank_node_ids])
+            query = u"SELECT DISTINCT ?s WHERE { ?s ?p ?o . VALUES ?o { %s } }" % values
+            blank_node_ids = set()
+            for subject, in self._query(self._union_graph, query):
+                subject = unicode(subject)
+                if is_blank_node(subject):
+                    if subject not in visited_ids:
+                        visited_ids.add(subject)
+                        blank_node_ids.add(subject)
+                else:
+                    document_iris.add(subject.split('#')[0])
+        return document_iris
+
+    def _loads_property_values(self, types, property_iri):
+        """The members of the paged collections are not loaded."""
+        return property_iri != HYDRA_MEMBER_IRI or HYDRA_PAGED_COLLECTION_IRI not in types
+
+    def _execute_updates(self, updates):
+        """Combines the update operations into one SPARQL Update request."""
+        self._execute_update(u" ;\n".join(updates))
+
+    def _execute_update(self, query):
+        self._logger.debug("Query: %s" % query)
+        try:
+            self._update(query)
+        except ParseException as e:
+            raise OMSPARQLParseError(u"%s\n %s" % (query, e))
 
-        # Same IRI (no change)
-        return id
+    def _query(self, graph, query, **kwargs):
+        if isinstance(graph.store, SPARQLStore):
+            return graph.query(query, **kwargs)
+        with self._parsing_lock:
+            return graph.query(query, **kwargs)
+
+    def _update(self, query):
+        if isinstance(self._data_graph.store, SPARQLStore):
+            return self._data_graph.update(query)
+        with self._parsing_lock:
+            return self._data_graph.update(query)
+
+
+def _build_keyset_lines(models, order_by, after):
+    """Binds the ordering key (?key) and filters the resources that come after the cursor."""
+    by_key = order_by not in (None, "id")
+    lines = u""
+    if by_key:
+        # May raise a OMAttributeAccessError
+        attr = _find_attribute(models, order_by)
+        if attr.container is not None or attr.reversed:
+            raise OMUserError(u"Cannot order by %s (single-valued attributes only)" % order_by)
+        lines += u"?s <%s> ?key .\n" % attr.om_property.iri
+    if after is not None:
+        last_iri, last_key = parse_cursor(after)
+        iri_filter = u"STR(?s) > %s" % Literal(last_iri).n3()
+        if by_key:
+            if last_key is None:
+                raise OMUserError(u"This cursor has been built for another ordering than %s" % order_by)
+            key = last_key.n3()
+            lines += u"FILTER (?key > %s || (?key = %s && %s))\n" % (key, key, iri_filter)
+        else:
+            lines += u"FILTER (%s)\n" % iri_filter
+    return lines
+
+
+def _build_paged_member_filter(subject_variable, property_variable):
+    """SPARQL filter excluding the `hydra:member` triples of the paged collections."""
+    return u"FILTER (%s != <%s> || NOT EXISTS { %s a <%s> })\n" % (property_variable, HYDRA_MEMBER_IRI,
+                                                                   subject_variable, HYDRA_PAGED_COLLECTION_IRI)
+
+
+def _build_list_cell_pattern(iris, list_property_iris):
+    """Builds a SPARQL graph pattern binding ?s ?p ?o to the rdf:first and rdf:rest triples
+    of the RDF lists that are values of some properties of some resources."""
+    return u"""?r ?lp ?l .
+      VALUES ?r { %s }
+      VALUES ?lp { %s }
+      ?l <%s>* ?s .
+      ?s ?p ?o .
+      VALUES ?p { <%s> <%s> }""" % (u" ".join([u"<%s>" % iri for iri in iris]),
+                                    u" ".join([u"<%s>" % p for p in list_property_iris]),
+                                    RDF.rest, RDF.first, RDF.rest)
 
 
 def _find_attribute(models, name):
@@ -0,0 +1,69 @@
+import re
+from rdflib import Graph, BNode
+
+# Object of a N-Triples line when it is a blank node (literals end with a quote, a language tag or a datatype)
+_BNODE_OBJECT_REGEX = re.compile(r'\s(_:[^\s"]+)\s*\.$')
+
+
+def read_nt_chunks(stream, chunk_size):
+    """Reads a N-Triples stream chunk by chunk.
+
+    Chunks are cut between two subjects, once `chunk_size` subjects have been read
+    and when no referenced blank node remains undescribed. Memory usage thus does not
+    depend on the size of the stream, provided that the triples are grouped by subject
+    and that blank nodes are described after being referenced (like nested descriptions).
+
+    Blank node labels are scoped to the chunk.
+
+    :param stream: File-like object or iterable of N-Triples lines.
+    :param chunk_size: Minimum number of subjects per chunk (except the last one).
+    :return: A generator of :class:`rdflib.Graph` objects.
+    """
+    lines = []
+    subjects = set()
+    open_bnodes = set()
+    previous_subject = None
+
+    for line in stream:
+        if isinstance(line, str):
+            line = line.decode("utf-8")
+        line = line.strip()
+        if len(line) == 0 or line.startswith(u"#"):
+            continue
+        # Neither IRIs nor blank node labels contain spaces
+        s = line.split(None, 1)[0]
+
+        if s != previous_subject and len(subjects) >= chunk_size and len(open_bnodes) == 0:
+            yield _parse_nt_chunk(lines)
+            lines = []
+            subjects = set()
+
+        lines.append(line)
+        subjects.add(s)
+        previous_subject = s
+        if s.startswith(u"_:"):
+            open_bnodes.discard(s)
+        match = _BNODE_OBJECT_REGEX.search(line)
+        if match is not None and match.group(1) not in subjects:
+            open_bnodes.add(match.group(1))
+
+    if len(lines) > 0:
+        yield _parse_nt_chunk(lines)
+
+
+def _parse_nt_chunk(lines):
+    """Parses some N-Triples lines into a new graph.
+
+    Their blank nodes are mapped to new :class:`rdflib.BNode` objects, so
+    they are not shared with other chunks using the same labels.
+
+    :param lines: List of N-Triples lines.
+    :return: A :class:`rdflib.Graph` object.
+    """
+    parsed_graph = Graph().parse(data=u"".join(l + u"\n" for l in lines), format="nt")
+    bnodes = {}
+    map_node = lambda n: bnodes.setdefault(n, BNode()) if isinstance(n, BNode) else n
+    graph = Graph()
+    for s, p, o in parsed_graph:
+        graph.add((map_node(s), p, map_node(o)))
+    return graph
@@ -25,7 +25,7 @@ def create_blank_nodes(manager, graph, bnode_subjects, hashless_iri=None, collec
     for bnode in bnode_subjects:
         types = {unicode(t) for t in graph.objects(bnode, RDF.type)}
         resource = manager.new(hashless_iri=hashless_iri, collection_iri=collection_iri, types=types)
-        _alter_bnode_triples(graph, bnode, URIRef(resource.id))
+        alter_bnode_triples(graph, bnode, URIRef(resource.id))
         resource.update_from_graph(graph, save=False)
         resources.append(resource)
 
@@ -71,7 +71,13 @@ def create_regular_resources(manager, graph, subjects, hashless_iri=None, collec
     return resources, resources_to_update
 
 
-def _alter_bnode_triples(graph, bnode, new_iri_ref):
+def alter_bnode_triples(graph, bnode, new_iri_ref):
+    """Replaces a blank node by an IRI in the triples of a graph.
+
+    :param graph: :class:`rdflib.Graph` object.
+    :param bnode: :class:`rdflib.BNode` object to replace.
+    :param new_iri_ref: :class:`rdflib.URIRef` object.
+    """
     subject_triples = list(graph.triples((bnode, None, None)))
     for _, p, o in subject_triples:
         graph.remove((bnode, p, o))
@@ -0,0 +1,65 @@
+import json
+import re
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from rdflib import URIRef, Literal
+from rdflib.util import from_n3
+from oldman.exception import OMUserError
+from oldman.utils.sparql import is_valid_iri
+
+_LANGUAGE_REGEX = re.compile(u'^[a-zA-Z]+(-[a-zA-Z0-9]+)*$')
+
+
+def build_cursor(resource, order_by=None):
+    """Builds the opaque cursor that selects the resources coming after a given one
+    (see the `after` parameter of :func:`~oldman.store.datastore.DataStore.filter`).
+
+    :param resource: Last :class:`~oldman.resource.Resource` object of the previous page.
+    :param order_by: Name of the attribute the page is ordered by.
+                     Defaults to `None` (ordered by IRI, like `"id"`).
+    :return: An opaque cursor (URL-safe string).
+    """
+    key = None
+    if order_by not in (None, "id"):
+        attr = resource.get_attribute(order_by)
+        value = attr.get_lightly(resource)
+        if value is None:
+            raise OMUserError(u"%s has no value for %s: no cursor can be built" % (resource.id, order_by))
+        if attr.jsonld_type == "@id":
+            key = URIRef(value).n3()
+        elif attr.language:
+            key = Literal(value, lang=attr.language).n3()
+        else:
+            key = Literal(value, datatype=attr.jsonld_type).n3()
+    return urlsafe_b64encode(json.dumps([resource.id, key]))
+
+
+def parse_cursor(cursor):
+    """Decodes a cursor built by :func:`~oldman.utils.cursor.build_cursor`.
+
+    Raises an :class:`~oldman.exception.OMUserError` exception if the cursor is invalid
+    (cursors usually come from untrusted clients).
+
+    :param cursor: Opaque cursor.
+    :return: The IRI of the last resource and its ordering key
+             (:class:`rdflib.URIRef` or :class:`rdflib.Literal` object, `None` if ordered by IRI).
+    """
+    try:
+        iri, key = json.loads(urlsafe_b64decode(str(cursor)))
+        key_term = from_n3(key) if key is not None else None
+    except (TypeError, ValueError, UnicodeError, AttributeError, KeyError):
+        raise OMUserError(u"Invalid cursor: %s" % cursor)
+
+    iris = [iri]
+    if isinstance(key_term, URIRef):
+        iris.append(key_term)
+    elif isinstance(key_term, Literal):
+        if key_term.datatype is not None:
+            iris.append(key_term.datatype)
+        if key_term.language is not None and not _LANGUAGE_REGEX.match(key_term.language):
+            raise OMUserError(u"Invalid cursor: %s" % cursor)
+    elif key_term is not None:
+        raise OMUserError(u"Invalid cursor: %s" % cursor)
+    for i in iris:
+        if not is_valid_iri(i):
+            raise OMUserError(u"Invalid cursor: %s" % cursor)
+    return iri, key_term
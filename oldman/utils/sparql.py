@@ -1,6 +1,9 @@
+import re
 from rdflib import Graph
 from rdflib.plugins.stores.sparqlstore import SPARQLUpdateStore
 
+_IRI_REGEX = re.compile(u'^[^\\s<>"{}|^`\\\\]+$')
+
 
 def parse_graph_safely(graph, *args, **kwargs):
     """Skolemizes the input source if the graph uses a
@@ -19,6 +22,15 @@ def parse_graph_safely(graph, *args, **kwargs):
     return graph
 
 
+def is_valid_iri(iri):
+    """Checks that an IRI can be written between angle brackets in a SPARQL request.
+
+    :param iri: IRI coming from an untrusted source.
+    :return: `False` if the IRI is empty or contains a space or a character forbidden in IRIs (e.g. `>`).
+    """
+    return isinstance(iri, basestring) and _IRI_REGEX.match(iri) is not None
+
+
 def build_query_part(verb_and_vars, subject_term, lines):
     """Builds a SPARQL query.
 
@@ -38,6 +38,9 @@ NEXT_NUMBER_IRI = "urn:oldman:nextNumber"
 HYDRA_COLLECTION_IRI = "http://www.w3.org/ns/hydra/core#Collection"
 HYDRA_PAGED_COLLECTION_IRI = "http://www.w3.org/ns/hydra/core#PagedCollection"
 HYDRA_MEMBER_IRI = "http://www.w3.org/ns/hydra/core#member"
+HYDRA_NEXT_PAGE_IRI = "http://www.w3.org/ns/hydra/core#nextPage"
+HYDRA_PREVIOUS_PAGE_IRI = "http://www.w3.org/ns/hydra/core#previousPage"
+HYDRA_ITEMS_PER_PAGE_IRI = "http://www.w3.org/ns/hydra/core#itemsPerPage"
 
 HYDRA_SUPPORTED_OPERATION = "http://www.w3.org/ns/hydra/core#supportedOperation"
 HYDRA_METHOD = "http://www.w3.org/ns/hydra/core#method"
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import unittest
+from StringIO import StringIO
+from rdflib import Graph, URIRef, BNode, Literal, RDF, XSD
+from rdflib.collection import Collection
+from default_model import *
+from oldman.exception import OMRequiredPropertyError
+from oldman.utils.bulk import read_nt_chunks
+
+LOCAL_PERSON = URIRef(MY_VOC + "LocalPerson")
+PERSON = URIRef(FOAF + "Person")
+
+
+def add_person(graph, subject, name, children=None):
+    graph.add((subject, RDF.type, LOCAL_PERSON))
+    graph.add((subject, RDF.type, PERSON))
+    graph.add((subject, URIRef(FOAF + "name"), Literal(name, datatype=XSD.string)))
+    graph.add((subject, URIRef(FOAF + "mbox"), Literal("%s@example.org" % name.lower(), datatype=XSD.string)))
+    graph.add((subject, URIRef(BIO + "olb"), Literal("Bio of %s" % name, lang="en")))
+    if children:
+        head = BNode()
+        Collection(graph, head, children)
+        graph.add((subject, URIRef(REL + "parentOf"), head))
+
+
+class BulkLoadTest(unittest.TestCase):
+    def setUp(self):
+        set_up()
+
+    def tearDown(self):
+        tear_down()
+
+    def test_graph(self):
+        g = Graph()
+        persons = [URIRef("http://localhost/persons/%d" % i) for i in range(5)]
+        for i, iri in enumerate(persons):
+            add_person(g, iri, "Person%d" % i)
+        anonymous = BNode()
+        add_person(g, anonymous, "Anonymous")
+        g.add((persons[0], URIRef(FOAF + "knows"), anonymous))
+        add_person(g, URIRef("http://localhost/persons/parent"), "Parent", children=persons[1:3])
+
+        progress = []
+        count = client_manager.bulk_load(g, batch_size=3, progress_callback=progress.append)
+        self.assertEquals(count, 7)
+        self.assertEquals(progress, [3, 6, 7])
+
+        names = {r.name for r in lp_model.all()}
+        self.assertEquals(names, {"Person%d" % i for i in range(5)}.union({"Parent", "Anonymous"}))
+        friend = list(lp_model.get(id=unicode(persons[0])).friends)[0]
+        self.assertEquals(friend.name, "Anonymous")
+        self.assertFalse(friend.is_blank_node())
+        parent = lp_model.get(id="http://localhost/persons/parent")
+        self.assertEquals([c.id for c in parent.children], [unicode(p) for p in persons[1:3]])
+
+    def test_stream(self):
+        lines = []
+        for i in range(8):
+            # Nested description: the blank node is described after being referenced
+            for subject, name in [("<http://localhost/persons/%d>" % i, "Friend%d" % i), ("_:b%d" % i, "Person%d" % i)]:
+                lines += ['%s <%s> <%s> .' % (subject, RDF.type, LOCAL_PERSON),
+                          '%s <%sname> "%s"^^<%s> .' % (subject, FOAF, name, XSD.string),
+                          '%s <%smbox> "%s@example.org"^^<%s> .' % (subject, FOAF, name, XSD.string),
+                          '%s <%solb> "Bio"@en .' % (subject, BIO)]
+                if subject.startswith("<"):
+                    lines.append('%s <%sknows> _:b%d .' % (subject, FOAF, i))
+        dump = "\n".join(lines)
+
+        chunks = list(read_nt_chunks(StringIO(dump), 4))
+        self.assertEquals(len(chunks), 4)
+        self.assertEquals(sum(len(c) for c in chunks), len(lines))
+
+        count = client_manager.bulk_load(StringIO(dump), batch_size=4)
+        self.assertEquals(count, 16)
+        persons = list(lp_model.all())
+        self.assertEquals(len(persons), 16)
+        friends = {list(p.friends)[0].name for p in persons if p.name.startswith("Friend")}
+        self.assertEquals(friends, {"Person%d" % i for i in range(8)})
+
+    def test_invalid_resource(self):
+        g = Graph()
+        iri = URIRef("http://localhost/persons/no-name")
+        g.add((iri, RDF.type, LOCAL_PERSON))
+        g.add((iri, URIRef(FOAF + "mbox"), Literal("no-name@example.org", datatype=XSD.string)))
+        with self.assertRaises(OMRequiredPropertyError):
+            client_manager.bulk_load(g)
+        self.assertFalse(data_store.exists(unicode(iri)))
+
+    def test_special_characters(self):
+        g = Graph()
+        iri = URIRef("http://localhost/persons/special")
+        add_person(g, iri, "Special")
+        name = u'The "special" one\nwith a back\\slash'
+        g.set((iri, URIRef(FOAF + "name"), Literal(name, datatype=XSD.string)))
+        bio = u'Says "hi"\r\n'
+        g.set((iri, URIRef(BIO + "olb"), Literal(bio, lang="en")))
+        self.assertEquals(client_manager.bulk_load(g), 1)
+        person = lp_model.get(id=unicode(iri))
+        self.assertEquals(person.name, name)
+        self.assertEquals(person.short_bio_en, bio)
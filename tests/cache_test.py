@@ -1,5 +1,10 @@
 import unittest
+from copy import copy
+from time import sleep
 from default_model import *
+from oldman.store.cache import ResourceCache
+from oldman.resource.resource import StoreResource
+from oldman.exception import OMOutdatedCacheEntryError
 
 # Force the cache
 data_store.resource_cache.change_cache_region(make_region().configure('dogpile.cache.memory_pickle'))
@@ -105,4 +110,144 @@ class CacheTest(unittest.TestCase):
 
         alice3 = client_manager.get(id=alice_iri)
         self.assertEquals(alice3.types, [])
-        self.assertFalse(bool(data_graph.query("ASK { <%s> ?p ?o }" % alice_iri)))
\ No newline at end of file
+        self.assertFalse(bool(data_graph.query("ASK { <%s> ?p ?o }" % alice_iri)))
+
+    def test_compact_state(self):
+        alice = create_alice()
+        store_alice = data_store.get(id=alice.id)
+        state = store_alice.__getstate__()
+        self.assertTrue(isinstance(state, tuple))
+        self.assertIn(alice_name, state[-1])
+
+        restored = StoreResource.__new__(StoreResource)
+        restored.__setstate__(state)
+        self.assertEquals(restored.name, alice_name)
+        self.assertEquals(restored.mboxes, {alice_mail})
+        # Considered as saved
+        self.assertFalse(restored.get_attribute("name").has_changed(restored))
+
+        outdated_state = state[:4] + (u"outdated",) + state[5:]
+        with self.assertRaises(OMOutdatedCacheEntryError):
+            StoreResource.__new__(StoreResource).__setstate__(outdated_state)
+
+    def test_outdated_entry(self):
+        alice = create_alice()
+        store_alice = data_store.get(id=alice.id)
+        legacy_alice = LegacyStoreResource(data_store.model_manager, data_store, id=alice.id,
+                                           types=store_alice.types, is_new=False)
+        data_store.resource_cache.set_resource(legacy_alice)
+        # Treated as a miss
+        self.assertTrue(data_store.resource_cache.get_resource(alice.id) is None)
+        self.assertEquals(data_store.resource_cache.get_resources([alice.id]), {})
+        self.assertEquals(client_manager.get(id=alice.id).name, alice_name)
+
+
+    def test_store_resource_copy(self):
+        alice = create_alice()
+        store_alice = data_store.get(id=alice.id)
+        alice_copy = copy(store_alice)
+        self.assertFalse(alice_copy is store_alice)
+        self.assertEquals(alice_copy.id, store_alice.id)
+        self.assertEquals(alice_copy.name, alice_name)
+        self.assertEquals(set(alice_copy.mboxes), set(store_alice.mboxes))
+
+        # Values are not shared
+        alice_copy.name = u"Other"
+        self.assertEquals(store_alice.name, alice_name)
+
+
+class LegacyStoreResource(StoreResource):
+    def __getstate__(self):
+        return {"_id": self._id}
+
+
+class FakeResource(object):
+    def __init__(self, id):
+        self.id = id
+
+
+class LocalCacheTest(unittest.TestCase):
+
+    def test_local_tier(self):
+        region = make_region().configure('dogpile.cache.memory')
+        cache = ResourceCache(region, local_cache_size=2)
+        r1, r2, r3 = FakeResource(u"http://localhost/r1"), FakeResource(u"http://localhost/r2"), \
+            FakeResource(u"http://localhost/r3")
+        for r in [r1, r2, r3]:
+            cache.set_resource(r)
+
+        # Served by the region: r1 has been evicted from the local tier
+        region.delete(r1.id)
+        self.assertTrue(cache.get_resource(r1.id) is None)
+        # Served by the local tier, as a fresh copy
+        region.delete(r3.id)
+        local_r3 = cache.get_resource(r3.id)
+        self.assertEquals(local_r3.id, r3.id)
+        self.assertFalse(local_r3 is r3)
+        local_r3.modified = True
+        self.assertFalse(hasattr(cache.get_resource(r3.id), "modified"))
+
+        # Coherence
+        cache.remove_resource(r3)
+        self.assertTrue(cache.get_resource(r3.id) is None)
+        cache.set_resource(r1)
+        new_r1 = FakeResource(r1.id)
+        new_r1.modified = True
+        cache.set_resource(new_r1)
+        region.delete(r1.id)
+        self.assertTrue(cache.get_resource(r1.id).modified)
+        cache.change_cache_region(make_region().configure('dogpile.cache.memory'))
+        self.assertTrue(cache.get_resource(r1.id) is None)
+
+    def test_local_ttl(self):
+        region = make_region().configure('dogpile.cache.memory')
+        cache = ResourceCache(region, local_cache_size=10, local_cache_ttl=0.05)
+        r1 = FakeResource(u"http://localhost/r1")
+        cache.set_resource(r1)
+        region.delete(r1.id)
+        self.assertEquals(cache.get_resource(r1.id).id, r1.id)
+        sleep(0.1)
+        self.assertTrue(cache.get_resource(r1.id) is None)
+
+    def test_multi_operations(self):
+        region = make_region().configure('dogpile.cache.memory')
+        for local_cache_size in [0, 2]:
+            cache = ResourceCache(region, local_cache_size=local_cache_size)
+            resources = [FakeResource(u"http://localhost/r%d" % i) for i in range(4)]
+            cache.set_resources(resources)
+            ids = [r.id for r in resources]
+            found = cache.get_resources(ids + [u"http://localhost/missing"])
+            self.assertEquals(set(found.keys()), set(ids))
+
+            cache.remove_resources_from_ids(ids[:3])
+            self.assertEquals(set(cache.get_resources(ids).keys()), {ids[3]})
+            cache.remove_resources_from_ids(ids)
+            self.assertEquals(cache.get_resources(ids), {})
+
+    def test_local_versions(self):
+        region = make_region().configure('dogpile.cache.memory')
+        cache = ResourceCache(region, local_cache_size=10)
+        # Another process sharing the same region
+        other_cache = ResourceCache(region)
+        r1 = FakeResource(u"http://localhost/doc#r1")
+        r1.name = u"Old"
+        cache.track_document(u"http://localhost/doc")
+        cache.set_resource(r1)
+        self.assertEquals(cache.get_resource(r1.id).name, u"Old")
+
+        new_r1 = FakeResource(r1.id)
+        new_r1.name = u"New"
+        other_cache.set_resource(new_r1)
+        # Version not bumped yet: still served by the local tier
+        self.assertEquals(cache.get_resource(r1.id).name, u"Old")
+        other_cache.bump_document_versions([u"http://localhost/doc"])
+        self.assertEquals(cache.get_resource(r1.id).name, u"New")
+        self.assertEquals(cache.get_resources([r1.id])[r1.id].name, u"New")
+
+    def test_local_representation(self):
+        region = make_region().configure('dogpile.cache.memory')
+        iri = u"http://localhost/doc"
+        cache = ResourceCache(region, local_cache_size=2)
+        cache.set_representation(iri, "text/turtle", "v1", u"payload")
+        self.assertEquals(cache.get_representation(iri, "text/turtle", "v1"), u"payload")
+        self.assertTrue(cache.get_representation(iri, "text/turtle", "v2") is None)
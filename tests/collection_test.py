@@ -0,0 +1,247 @@
+import json
+import unittest
+from dogpile.cache import make_region
+from rdflib import Graph, URIRef
+from oldman import SPARQLDataStore, ClientResourceManager, parse_graph_safely
+from oldman.rest.controller import HTTPController
+from oldman.exception import OMEditError
+from oldman.vocabulary import HYDRA_MEMBER_IRI, HYDRA_NEXT_PAGE_IRI, HYDRA_PREVIOUS_PAGE_IRI
+
+schema_ttl = """
+@prefix hydra: <http://www.w3.org/ns/hydra/core#> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix : <urn:test:oldman:paged:> .
+@prefix dcterms: <http://purl.org/dc/terms/> .
+
+hydra:Collection hydra:supportedProperty [
+        hydra:property hydra:member
+    ] .
+
+hydra:PagedCollection rdfs:subClassOf hydra:Collection .
+
+:Collection a hydra:Class ;
+    rdfs:subClassOf hydra:PagedCollection ;
+    hydra:supportedProperty [
+        hydra:property dcterms:title
+    ] ;
+    hydra:supportedOperation [
+        hydra:method "POST"^^xsd:string ;
+        hydra:expects :Item ;
+        hydra:returns :Item ] .
+
+:Bag a hydra:Class ;
+    rdfs:subClassOf hydra:Collection ;
+    hydra:supportedOperation [
+        hydra:method "POST"^^xsd:string ;
+        hydra:expects :Item ;
+        hydra:returns :Item ] .
+
+:Item a hydra:Class ;
+   hydra:supportedProperty [
+        hydra:property dcterms:title ;
+        hydra:required true ] .
+"""
+
+context = {
+    "@context": {
+        "hydra": "http://www.w3.org/ns/hydra/core#",
+        "dcterms": "http://purl.org/dc/terms/",
+        "xsd": "http://www.w3.org/2001/XMLSchema#",
+        "test": "urn:test:oldman:paged:",
+        "id": "@id",
+        "types": "@type",
+        "title": {
+            "@id": "dcterms:title",
+            "@type": "xsd:string"
+        },
+        "member": {
+            "@id": "hydra:member",
+            "@type": "@id"
+        },
+        "Collection": "test:Collection",
+        "Item": "test:Item"
+    }
+}
+
+bag_context = {
+    "@context": {
+        "hydra": "http://www.w3.org/ns/hydra/core#",
+        "id": "@id",
+        "types": "@type",
+        "member": {
+            "@id": "hydra:member",
+            "@type": "@id",
+            "@container": "@set"
+        },
+        "Bag": "urn:test:oldman:paged:Bag"
+    }
+}
+
+schema_graph = parse_graph_safely(Graph(), data=schema_ttl, format="turtle")
+data_graph = Graph()
+data_store = SPARQLDataStore(data_graph, schema_graph=schema_graph,
+                             cache_region=make_region().configure('dogpile.cache.memory'))
+data_store.create_model("Collection", context, iri_prefix="http://localhost/paged/", incremental_iri=True)
+data_store.create_model("Item", context, iri_prefix="http://localhost/paged-items/", incremental_iri=True)
+data_store.create_model("Bag", bag_context, iri_prefix="http://localhost/bags/", incremental_iri=True)
+
+client_manager = ClientResourceManager(data_store)
+client_manager.import_store_models()
+collection_model = client_manager.get_model("Collection")
+item_model = client_manager.get_model("Item")
+bag_model = client_manager.get_model("Bag")
+
+controller = HTTPController(client_manager, config={'page_size': 2})
+JSON_LD = "application/ld+json"
+
+
+def tear_down():
+    data_graph.update("CLEAR DEFAULT")
+    for model in [collection_model, item_model, bag_model]:
+        data_store.reset_instance_counter(model.class_iri)
+    # Fresh cache
+    data_store.resource_cache.change_cache_region(make_region().configure('dogpile.cache.memory'))
+
+
+class CollectionTest(unittest.TestCase):
+    def setUp(self):
+        self.bag = bag_model.create()
+
+    def tearDown(self):
+        tear_down()
+
+    def test_append(self):
+        items = [item_model.new(title=u"Item %d" % i) for i in range(2)]
+        self.bag.get_operation("POST")(self.bag, new_resources=items)
+        item_iris = {item.id for item in items}
+        self.assertEquals(set(data_graph.objects(URIRef(self.bag.id), URIRef(HYDRA_MEMBER_IRI))),
+                          {URIRef(iri) for iri in item_iris})
+        # In memory and in the cache, without being reloaded
+        self.assertEquals(self.bag.get_lightly("member"), item_iris)
+        self.assertFalse(self.bag.get_attribute("member").has_changed(self.bag))
+        self.assertEquals(data_store.resource_cache.get_resource(self.bag.id).get_lightly("member"), item_iris)
+
+        updates = []
+        original_execute_update = data_store._execute_update
+
+        def execute_update(query):
+            updates.append(query)
+            original_execute_update(query)
+        data_store._execute_update = execute_update
+        try:
+            item = item_model.new(title=u"Last")
+            self.bag.get_operation("POST")(self.bag, new_resources=[item])
+        finally:
+            del data_store._execute_update
+        # Item creation, then only the new member triple
+        self.assertEquals(len(updates), 2)
+        self.assertEquals(updates[1], u"INSERT DATA {\n<%s> <%s> <%s> .\n}" % (self.bag.id, HYDRA_MEMBER_IRI,
+                                                                                item.id))
+        self.assertEquals(client_manager.get(id=self.bag.id).get_lightly("member"), item_iris.union({item.id}))
+
+    def test_append_unsaved_members(self):
+        other_item = item_model.create(title=u"Other")
+        self.bag.member = {other_item.id}
+        item = item_model.new(title=u"New")
+        with self.assertRaises(OMEditError):
+            self.bag.get_operation("POST")(self.bag, new_resources=[item])
+        # Nothing has been saved
+        self.assertTrue(item.is_new)
+        self.assertEquals(list(data_graph.objects(URIRef(self.bag.id), URIRef(HYDRA_MEMBER_IRI))), [])
+
+    def test_shared_cached_resource(self):
+        cached_bag = data_store.resource_cache.get_resource(self.bag.id)
+        self.assertTrue(cached_bag is not None)
+        items = [item_model.new(title=u"Item %d" % i) for i in range(2)]
+        self.bag.get_operation("POST")(self.bag, new_resources=items)
+        # The object previously served by the cache has not been mutated
+        self.assertEquals(cached_bag.get_lightly("member"), None)
+        self.assertEquals(data_store.resource_cache.get_resource(self.bag.id).get_lightly("member"),
+                          {item.id for item in items})
+
+
+class PagedCollectionTest(unittest.TestCase):
+    def setUp(self):
+        self.collection = collection_model.create(title=u"Paged")
+        items = [item_model.new(title=u"Item %d" % i) for i in range(5)]
+        self.collection.get_operation("POST")(self.collection, new_resources=items)
+        self.member_iris = sorted(item.id for item in items)
+
+    def tearDown(self):
+        tear_down()
+
+    def test_append_without_loading(self):
+        collection_ref = URIRef(self.collection.id)
+        self.assertEquals({unicode(o) for o in data_graph.objects(collection_ref, URIRef(HYDRA_MEMBER_IRI))},
+                          set(self.member_iris))
+
+        # Members are not loaded
+        collection = client_manager.get(id=self.collection.id)
+        self.assertEquals(collection.member, None)
+        self.assertEquals(collection.title, u"Paged")
+
+        # Saving it does not remove them
+        collection.title = u"Renamed"
+        collection.save()
+        self.assertEquals(len(list(data_graph.objects(collection_ref, URIRef(HYDRA_MEMBER_IRI)))), 5)
+
+        # From a payload
+        item = item_model.new(title=u"Posted")
+        controller.post(self.collection.id, JSON_LD, item.to_jsonld())
+        self.assertEquals(len(list(data_graph.objects(collection_ref, URIRef(HYDRA_MEMBER_IRI)))), 6)
+
+    def test_deletion(self):
+        collection_ref = URIRef(self.collection.id)
+        client_manager.get(id=self.collection.id).delete()
+        self.assertEquals(list(data_graph.predicate_objects(collection_ref)), [])
+        # The members themselves are not deleted
+        for member_iri in self.member_iris:
+            self.assertTrue(data_store.exists(member_iri))
+
+    def test_pages(self):
+        collection_iri = self.collection.id
+        first_page = json.loads(controller.get(collection_iri, accept_header=JSON_LD)[0])
+        self.assertEquals(first_page["member"], self.member_iris[:2])
+        self.assertEquals(first_page["nextPage"], collection_iri + "?page=2")
+        self.assertFalse("previousPage" in first_page)
+        self.assertEquals(first_page["itemsPerPage"], 2)
+        self.assertEquals(first_page["title"], u"Paged")
+
+        last_page = json.loads(controller.get(collection_iri, accept_header=JSON_LD, page="3")[0])
+        self.assertEquals(last_page["member"], self.member_iris[4:])
+        self.assertEquals(last_page["previousPage"], collection_iri + "?page=2")
+        self.assertFalse("nextPage" in last_page)
+
+        # The page is part of the ETag
+        self.assertNotEquals(controller.head(collection_iri, accept_header=JSON_LD)["ETag"],
+                             controller.head(collection_iri, accept_header=JSON_LD, page=3)["ETag"])
+
+        # JSON-LD
+        g = Graph().parse(data=json.dumps(first_page), format="json-ld")
+        collection_ref = URIRef(collection_iri)
+        self.assertEquals(len(list(g.objects(collection_ref, URIRef(HYDRA_MEMBER_IRI)))), 2)
+        self.assertEquals(g.value(collection_ref, URIRef(HYDRA_NEXT_PAGE_IRI)), URIRef(collection_iri + "?page=2"))
+
+    def test_cursor(self):
+        collection_iri = self.collection.id
+        page = Graph().parse(data=controller.get(collection_iri, accept_header="text/turtle",
+                                                 after=self.member_iris[1])[0], format="turtle")
+        collection_ref = URIRef(collection_iri)
+        self.assertEquals({unicode(o) for o in page.objects(collection_ref, URIRef(HYDRA_MEMBER_IRI))},
+                          set(self.member_iris[2:4]))
+        next_page = page.value(collection_ref, URIRef(HYDRA_NEXT_PAGE_IRI))
+        self.assertTrue(next_page.startswith(collection_iri + "?after="))
+        self.assertEquals(page.value(collection_ref, URIRef(HYDRA_PREVIOUS_PAGE_IRI)), None)
+
+        members, has_next = data_store.get_values_page(collection_iri, HYDRA_MEMBER_IRI, 2, after=self.member_iris[3])
+        self.assertEquals(members, self.member_iris[4:])
+        self.assertFalse(has_next)
+
+    def test_cache_invalidation(self):
+        collection_iri = self.collection.id
+        etag = controller.head(collection_iri, accept_header=JSON_LD, page=3)["ETag"]
+        self.collection.get_operation("POST")(self.collection, new_resources=[item_model.new(title=u"Last")])
+        self.assertNotEquals(controller.head(collection_iri, accept_header=JSON_LD, page=3)["ETag"], etag)
+        last_page = json.loads(controller.get(collection_iri, accept_header=JSON_LD, page=3)[0])
+        self.assertEquals(len(last_page["member"]), 2)
@@ -0,0 +1,147 @@
+import unittest
+from time import sleep
+from default_model import *
+from oldman.rest.controller import HTTPController
+from oldman.exception import OMNotModifiedException, OMResourceNotFoundException
+
+controller = HTTPController(client_manager)
+JSON_LD = "application/ld+json"
+
+
+class ConditionalRequestTest(unittest.TestCase):
+    def setUp(self):
+        set_up()
+
+    def tearDown(self):
+        tear_down()
+
+    def test_if_none_match(self):
+        bob = create_bob()
+        headers = controller.head(bob.hashless_iri, accept_header=JSON_LD)
+        etag = headers["ETag"]
+        self.assertEquals(headers["Content-Type"], JSON_LD)
+        self.assertTrue(etag.startswith('"') and etag.endswith('"'))
+
+        with self.assertRaises(OMNotModifiedException) as cm:
+            controller.get(bob.hashless_iri, accept_header=JSON_LD, if_none_match='"other", %s' % etag)
+        self.assertEquals(cm.exception.headers["ETag"], etag)
+        # Weak comparison
+        with self.assertRaises(OMNotModifiedException):
+            controller.get(bob.hashless_iri, accept_header=JSON_LD, if_none_match="W/%s" % etag)
+
+        # Per content type
+        turtle_etag = controller.head(bob.hashless_iri, accept_header="text/turtle")["ETag"]
+        self.assertNotEquals(turtle_etag, etag)
+        payload, _ = controller.get(bob.hashless_iri, accept_header="text/turtle", if_none_match=etag)
+        self.assertEquals(payload, bob.to_rdf("text/turtle"))
+
+        bob.name = "Robert"
+        bob.save()
+        payload, _ = controller.get(bob.hashless_iri, accept_header=JSON_LD, if_none_match=etag)
+        self.assertEquals(json.loads(payload)["name"], "Robert")
+        self.assertNotEquals(controller.head(bob.hashless_iri, accept_header=JSON_LD)["ETag"], etag)
+
+    def test_if_modified_since(self):
+        bob = create_bob()
+        last_modified = controller.head(bob.hashless_iri, accept_header=JSON_LD)["Last-Modified"]
+        with self.assertRaises(OMNotModifiedException):
+            controller.get(bob.hashless_iri, accept_header=JSON_LD, if_modified_since=last_modified)
+        payload, _ = controller.get(bob.hashless_iri, accept_header=JSON_LD,
+                                    if_modified_since="Sat, 01 Jan 2000 00:00:00 GMT")
+        self.assertEquals(json.loads(payload)["name"], bob_name)
+
+    def test_head_without_loading(self):
+        bob = create_bob()
+        hashless_iri = bob.hashless_iri
+        controller.get(hashless_iri, accept_header=JSON_LD)
+
+        get_calls = []
+        original_get = client_manager.get
+
+        def get(**kwargs):
+            get_calls.append(kwargs)
+            return original_get(**kwargs)
+        client_manager.get = get
+        try:
+            controller.head(hashless_iri, accept_header=JSON_LD)
+            self.assertEquals(len(get_calls), 0)
+            bob.delete()
+            with self.assertRaises(OMResourceNotFoundException):
+                controller.head(hashless_iri, accept_header=JSON_LD)
+        finally:
+            del client_manager.get
+
+    def test_embedded_blank_node(self):
+        bob = create_bob()
+        rsa_key = create_rsa_key()
+        bob.keys = {rsa_key}
+        bob.save()
+        etag = controller.head(bob.hashless_iri, accept_header=JSON_LD)["ETag"]
+        payload, _ = controller.get(bob.hashless_iri, accept_header=JSON_LD)
+        self.assertEquals(json.loads(payload)["keys"][0]["label"], key_label)
+
+        # The key is only described in the document of Bob
+        new_label = u"New label"
+        rsa_key = client_manager.get(id=rsa_key.id)
+        rsa_key.label = new_label
+        rsa_key.save()
+        payload, _ = controller.get(bob.hashless_iri, accept_header=JSON_LD, if_none_match=etag)
+        self.assertEquals(json.loads(payload)["keys"][0]["label"], new_label)
+
+    def test_reversed_attribute(self):
+        alice = create_alice()
+        bob = create_bob()
+        etag = controller.head(bob.hashless_iri, accept_header=JSON_LD)["ETag"]
+        payload, _ = controller.get(bob.hashless_iri, accept_header=JSON_LD)
+        self.assertFalse("employer" in json.loads(payload))
+
+        # Bob is only modified through a reversed attribute
+        alice.employee = bob
+        alice.save()
+        payload, _ = controller.get(bob.hashless_iri, accept_header=JSON_LD, if_none_match=etag)
+        self.assertEquals(json.loads(payload)["employer"], alice.id)
+
+    def test_untracked_documents(self):
+        missing_iri = "http://localhost/persons/missing"
+        with self.assertRaises(OMResourceNotFoundException):
+            controller.get(missing_iri, accept_header=JSON_LD)
+        with self.assertRaises(OMResourceNotFoundException):
+            controller.head(missing_iri, accept_header=JSON_LD)
+        # No state is created for unknown documents
+        self.assertEquals(data_store.resource_cache.get_document_state(missing_iri), (None, None))
+
+    def test_if_none_match_any(self):
+        bob = create_bob()
+        with self.assertRaises(OMNotModifiedException) as cm:
+            controller.get(bob.hashless_iri, accept_header=JSON_LD, if_none_match="*")
+        self.assertTrue("ETag" in cm.exception.headers)
+        with self.assertRaises(OMResourceNotFoundException):
+            controller.get("http://localhost/persons/missing", accept_header=JSON_LD, if_none_match="*")
+
+    def test_last_modified_at_bump(self):
+        bob = create_bob()
+        cache = data_store.resource_cache
+        _, last_modified = cache.get_document_state(bob.hashless_iri)
+        self.assertTrue(last_modified is not None)
+        sleep(0.01)
+        bob.name = "Robert"
+        bob.save()
+        self.assertGreater(cache.get_document_state(bob.hashless_iri)[1], last_modified)
+
+    def test_validators_of_get(self):
+        bob = create_bob()
+        payload, headers = controller.get_with_headers(bob.hashless_iri, accept_header=JSON_LD)
+        self.assertEquals(headers["Content-Type"], JSON_LD)
+        etag = headers["ETag"]
+        self.assertEquals(etag, controller.head(bob.hashless_iri, accept_header=JSON_LD)["ETag"])
+        self.assertTrue("Last-Modified" in headers)
+
+        bob.name = "Robert"
+        bob.save()
+        payload, headers = controller.get_with_headers(bob.hashless_iri, accept_header=JSON_LD)
+        self.assertEquals(json.loads(payload)["name"], "Robert")
+        self.assertNotEquals(headers["ETag"], etag)
+        with self.assertRaises(OMNotModifiedException):
+            controller.get_with_headers(bob.hashless_iri, accept_header=JSON_LD, if_none_match=headers["ETag"])
+        # Former return shape
+        self.assertEquals(controller.get(bob.hashless_iri, accept_header=JSON_LD), (payload, JSON_LD))
@@ -244,4 +244,19 @@ class ContainerTest(TestCase):
         obj.lang_map = {"en": "ok",
                         "fr": "ok aussi"}
 
+    def test_list_property_iris(self):
+        expected = {EXAMPLE + "primaryList", EXAMPLE + "localizedList", EXAMPLE + "boolList"}
+        self.assertEquals(model.list_property_iris, expected)
+        self.assertEquals(data_store.model_manager.list_property_iris, expected)
 
+    def test_lists_after_lazy_loading(self):
+        obj = self.create_object()
+        uri = obj.id
+        lst = [True, False]
+        obj.bool_list = lst
+        obj.save()
+
+        # No cache: loaded from the data graph
+        store_obj = data_store._get_by_id(uri, eager_with_reversed_attributes=False)
+        self.assertEquals(store_obj.bool_list, lst)
+        self.assertEquals(store_obj.list_en, default_list_en)
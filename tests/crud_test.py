@@ -43,6 +43,67 @@ class CrudTest(unittest.TestCase):
         resources = client_manager.filter(hashless_iri=doc_iri)
         self.assertEquals({bob_iri, doc_iri}, {r.id for r in resources})
 
+    def test_representation_cache(self):
+        bob = create_bob()
+        bob_hashless_iri = bob.hashless_iri
+        get_calls = []
+        original_get = client_manager.get
+
+        def get(**kwargs):
+            get_calls.append(kwargs)
+            return original_get(**kwargs)
+        client_manager.get = get
+        try:
+            payload = crud_controller.get(bob_hashless_iri, "application/ld+json")[0]
+            self.assertEquals(crud_controller.get(bob_hashless_iri, "application/ld+json")[0], payload)
+            self.assertEquals(len(get_calls), 1)
+            # Other content type
+            crud_controller.get(bob_hashless_iri, "text/turtle")
+            self.assertEquals(len(get_calls), 2)
+
+            # New version
+            bob.name = "Robert"
+            bob.save()
+            self.assertEquals(json.loads(crud_controller.get(bob_hashless_iri, "application/ld+json")[0])["name"],
+                              "Robert")
+            self.assertEquals(len(get_calls), 3)
+
+            with data_store.new_session():
+                bob.name = "Bobby"
+                bob.save()
+            self.assertEquals(json.loads(crud_controller.get(bob_hashless_iri, "application/ld+json")[0])["name"],
+                              "Bobby")
+        finally:
+            del client_manager.get
+
+    def test_stream(self):
+        bob = create_bob()
+        bob.mboxes = {"bob%d@example.org" % i for i in range(25)}
+        bob.children = [create_alice(), create_john()]
+        bob.save()
+        bob_hashless_iri = bob.hashless_iri
+
+        chunks, content_type = crud_controller.stream(bob_hashless_iri, chunk_size=10)
+        chunks = list(chunks)
+        self.assertEquals(content_type, "application/n-triples")
+        self.assertTrue(len(chunks) > 2)
+        g = Graph()
+        for chunk in chunks:
+            g.parse(data=chunk, format="nt")
+        self.assertTrue(g.isomorphic(Graph().parse(data=bob.to_rdf("nt"), format="nt")))
+
+        chunks, _ = crud_controller.stream(bob_hashless_iri, "application/ld+json", chunk_size=10)
+        self.assertEquals(json.loads(u"".join(chunks)), json.loads(bob.to_jsonld()))
+        chunks, _ = crud_controller.stream(bob_hashless_iri, "application/json", chunk_size=10)
+        self.assertEquals(json.loads(u"".join(chunks)), json.loads(bob.to_json()))
+
+        # Not streamed
+        chunks, _ = crud_controller.stream(bob_hashless_iri, "text/turtle")
+        self.assertEquals(list(chunks), [bob.to_rdf("turtle")])
+
+        with self.assertRaises(OMObjectNotFoundError):
+            crud_controller.stream("http://localhost/not-existing")
+
     def test_bob_controller_delete(self):
         ask_bob = """ASK {?x foaf:name "%s"^^xsd:string }""" % bob_name
         self.assertFalse(bool(data_graph.query(ask_bob)))
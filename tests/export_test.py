@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import json
+import unittest
+from rdflib import Graph, URIRef, RDF
+from rdflib.collection import Collection
+from default_model import *
+from oldman.exception import OMUserError
+
+LOCAL_PERSON = URIRef(MY_VOC + "LocalPerson")
+
+
+class ExportTest(unittest.TestCase):
+    def setUp(self):
+        set_up()
+        self.bob = create_bob()
+        self.alice = create_alice()
+        self.john = create_john()
+        self.bob.children = [self.alice, self.john]
+        self.bob.friends = {self.alice}
+        self.bob.save()
+        create_rsa_key()
+
+    def tearDown(self):
+        tear_down()
+
+    def test_nt(self):
+        chunks = list(lp_model.export(chunk_size=2))
+        self.assertEquals(len(chunks), 2)
+
+        g = Graph()
+        for chunk in chunks:
+            g.parse(data=chunk, format="nt")
+        self.assertEquals(set(g.subjects(RDF.type, LOCAL_PERSON)),
+                          {URIRef(p.id) for p in [self.bob, self.alice, self.john]})
+        # RDF list cells
+        children_iri = URIRef(REL + "parentOf")
+        children = list(Collection(g, g.value(URIRef(self.bob.id), children_iri)))
+        self.assertEquals(children, [URIRef(self.alice.id), URIRef(self.john.id)])
+
+    def test_turtle(self):
+        g = Graph()
+        for chunk in lp_model.export(format="turtle", chunk_size=1):
+            g.parse(data=chunk, format="turtle")
+        self.assertEquals(len(set(g.subjects(RDF.type, LOCAL_PERSON))), 3)
+
+    def test_jsonld_lines(self):
+        lines = u"".join(lp_model.export(format="jsonld")).splitlines()
+        self.assertEquals(len(lines), 3)
+        dcts = {d["id"]: d for d in [json.loads(l) for l in lines]}
+        bob_dict = dcts[self.bob.id]
+        self.assertEquals(bob_dict["name"], bob_name)
+        self.assertEquals(bob_dict["children"], [self.alice.id, self.john.id])
+        self.assertEquals(bob_dict["friends"], [self.alice.id])
+        self.assertTrue("@context" in bob_dict)
+
+        g = Graph().parse(data=lines[0], format="json-ld")
+        self.assertTrue(len(g) > 0)
+
+    def test_unsupported_format(self):
+        with self.assertRaises(OMUserError):
+            list(lp_model.export(format="xml"))
@@ -1,6 +1,7 @@
 import unittest
 from default_model import *
-from oldman.exception import OMAttributeAccessError
+from oldman.exception import OMAttributeAccessError, OMUserError
+from oldman.utils.cursor import build_cursor
 
 
 class FindTest(unittest.TestCase):
@@ -115,4 +116,138 @@ class FindTest(unittest.TestCase):
         self.assertEquals(len(list(lp_model.all())), n)
         self.assertEquals(len(list(client_manager.filter(limit=10))), 10)
         self.assertEquals(len(list(lp_model.filter(limit=10))), 10)
-        self.assertEquals(len(list(lp_model.all(limit=10))), 10)
\ No newline at end of file
+        self.assertEquals(len(list(lp_model.all(limit=10))), 10)
+
+    def test_keyset_pagination(self):
+        for name in ["Carl", "Bea", "Eve", "Ann", "Dan", "Bea"]:
+            lp_model.create(name=name, mboxes={"%s@example.org" % name.lower()}, short_bio_en="Bio")
+
+        def read_pages(order_by, eager):
+            pages, cursor = [], None
+            while True:
+                page = list(lp_model.all(limit=2, eager=eager, order_by=order_by, after=cursor))
+                if len(page) == 0:
+                    return pages
+                pages.append(page)
+                cursor = build_cursor(page[-1], order_by)
+
+        for eager in [False, True]:
+            pages = read_pages("name", eager)
+            self.assertEquals([len(p) for p in pages], [2, 2, 2])
+            names = [r.name for p in pages for r in p]
+            self.assertEquals(names, ["Ann", "Bea", "Bea", "Carl", "Dan", "Eve"])
+            # Ties broken by IRI
+            self.assertTrue(pages[0][1].id < pages[1][0].id)
+
+            ids = [r.id for p in read_pages("id", eager) for r in p]
+            self.assertEquals(ids, sorted(r.id for r in lp_model.all()))
+
+        with self.assertRaises(OMUserError):
+            list(lp_model.all(order_by="name", after="not-a-cursor"))
+        with self.assertRaises(OMAttributeAccessError):
+            list(client_manager.filter(order_by="name"))
+
+    def test_ordered_pre_cache(self):
+        alice = create_alice()
+        bob = create_bob()
+        john = create_john()
+        alice.friends = {bob}
+        alice.save()
+        data_store.resource_cache.remove_resources_from_ids([alice.id, bob.id, john.id])
+
+        persons = list(lp_model.filter(order_by="name", eager=True, pre_cache_properties=[FOAF.knows]))
+        self.assertEquals([p.name for p in persons], [alice_name, bob_name, john_name])
+        self.assertEquals([f.id for f in persons[0].friends], [bob.id])
+        self.assertTrue(data_store.resource_cache.get_resource(bob.id) is not None)
+
+    def test_count(self):
+        alice = create_alice()
+        create_bob()
+        lp_model.create(name=bob_name, mboxes={"bob2@example.org"}, short_bio_en="I am a double.")
+        create_rsa_key()
+
+        ids = {unicode(s) for s in data_graph.subjects()}
+        self.assertTrue(data_store.resource_cache.is_active())
+        data_store.resource_cache.remove_resources_from_ids(ids)
+
+        self.assertEquals(lp_model.count(), 3)
+        self.assertEquals(lp_model.count(name=bob_name), 2)
+        self.assertEquals(lp_model.count(name=bob_name, mboxes={bob_email2}), 1)
+        self.assertEquals(lp_model.count(name="Nobody"), 0)
+        self.assertEquals(client_manager.count(types=[MY_VOC + "LocalPerson"]), 3)
+        self.assertEquals(client_manager.count(hashless_iri=alice.hashless_iri), 1)
+        # The resources have not been retrieved
+        self.assertEquals(data_store.resource_cache.get_resources(ids), {})
+
+        with self.assertRaises(OMAttributeAccessError):
+            client_manager.count(name=bob_name)
+
+    def test_exists_many(self):
+        alice = create_alice()
+        bob = create_bob()
+        unknown_iri = "http://localhost/persons/unknown"
+        self.assertEquals(client_manager.exists_many([alice.id, unknown_iri, bob.id]), {alice.id, bob.id})
+        self.assertEquals(data_store.exists_many([]), set())
+
+        # SPARQL injection
+        with self.assertRaises(OMUserError):
+            data_store.exists_many([u"http://localhost/x> ?p ?o } } SELECT * WHERE { <http://localhost/y"])
+        with self.assertRaises(OMUserError):
+            client_manager.exists_many([alice.id, u"http://localhost/a b"])
+
+    def test_get_many(self):
+        alice = create_alice()
+        bob = create_bob()
+        alice.children = [bob.id]
+        alice.save()
+        john = create_john()
+        ids = [john.id, alice.id, bob.id, alice.id]
+
+        # Not cached
+        for iri in ids:
+            data_store.resource_cache.remove_resource_from_id(iri)
+        resources = client_manager.get_many(ids)
+        self.assertEquals([r.id for r in resources], ids)
+        self.assertEquals(resources[1].name, alice_name)
+        self.assertEquals(resources[1].get_lightly("children"), [bob.id])
+        self.assertEquals(resources[2].mboxes, bob_emails)
+
+        # Now from the cache
+        self.assertEquals([r.id for r in client_manager.get_many(ids)], ids)
+
+    def test_get_many_missing(self):
+        alice = create_alice()
+        missing_iri = u"http://localhost/persons/missing"
+        data_store.resource_cache.remove_resource_from_id(alice.id)
+        resources = data_store.get_many([missing_iri, alice.id])
+        self.assertTrue(resources[0] is None)
+        self.assertEquals(resources[1].name, alice_name)
+        self.assertTrue(data_store.resource_cache.get_resource(missing_iri) is None)
+
+    def test_get_many_chunks(self):
+        n = 7
+        ids = [create_alice().id for _ in range(n)]
+        for iri in ids:
+            data_store.resource_cache.remove_resource_from_id(iri)
+        data_store._chunk_size = 3
+        try:
+            resources = data_store.get_many(ids)
+        finally:
+            data_store._chunk_size = 100
+        self.assertEquals([r.id for r in resources], ids)
+        self.assertEquals({r.name for r in resources}, {alice_name})
+
+    def test_related_resources_in_bulk(self):
+        alice = create_alice()
+        bob = create_bob()
+        john = create_john()
+        alice.children = [john.id, bob.id]
+        alice.friends = {bob, john}
+        alice.save()
+
+        for iri in [alice.id, bob.id, john.id]:
+            data_store.resource_cache.remove_resource_from_id(iri)
+        alice2 = lp_model.get(id=alice.id)
+        # Order of the list is kept
+        self.assertEquals([c.name for c in alice2.children], [john_name, bob_name])
+        self.assertEquals({f.id for f in alice2.friends}, {bob.id, john.id})
@@ -1,6 +1,9 @@
 from os import path
+from threading import Lock
 from unittest import TestCase
+from dogpile.cache import make_region
 from rdflib import Graph
+from requests.structures import CaseInsensitiveDict
 from oldman import HttpDataStore, ClientResourceManager, parse_graph_safely
 
 directory = path.dirname(__file__)
@@ -34,3 +37,119 @@ class HttpStoreTest(TestCase):
         supported_classes = doc.get_lightly("supported_classes")
         for cls in expected_classes:
             self.assertIn(cls, supported_classes, "Unsupported class: %s" % cls)
+
+
+class FakeResponse(object):
+    def __init__(self, status_code, content=None, headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = CaseInsensitiveDict(headers if headers is not None else {})
+        self.links = {}
+
+
+class FakeSession(object):
+    """Serves one Turtle document with an ETag."""
+
+    def __init__(self, content, etag):
+        self.content = content
+        self.etag = etag
+        self.requests = []
+
+    def get(self, iri, headers=None):
+        self.requests.append(headers)
+        if headers.get("If-None-Match") == self.etag:
+            return FakeResponse(304)
+        return FakeResponse(200, self.content, {"Content-Type": "text/turtle", "ETag": self.etag})
+
+
+class ConditionalGetTest(TestCase):
+    def test_not_modified(self):
+        iri = u"http://example.org/doc"
+        content = """@prefix hydra: <http://www.w3.org/ns/hydra/core#> .
+        <http://example.org/doc> a hydra:ApiDocumentation ;
+            hydra:title "First title" ."""
+        session = FakeSession(content, '"v1"')
+        store = HttpDataStore(schema_graph=schema_graph, session=session,
+                              cache_region=make_region().configure('dogpile.cache.memory_pickle'))
+        store.create_model('ApiDocumentation', context_uri)
+
+        self.assertEquals(store.get(id=iri).title, u"First title")
+        self.assertFalse("If-None-Match" in session.requests[0])
+
+        # Revalidated
+        self.assertEquals(store.get(id=iri).title, u"First title")
+        self.assertEquals(session.requests[1]["If-None-Match"], '"v1"')
+
+        # Modified
+        session.content = content.replace("First", "Second")
+        session.etag = '"v2"'
+        self.assertEquals(store.get(id=iri).title, u"Second title")
+        self.assertEquals(len(session.requests), 3)
+
+    def test_validators_per_resource(self):
+        iri = u"http://example.org/doc"
+        content = """@prefix hydra: <http://www.w3.org/ns/hydra/core#> .
+        <http://example.org/doc#a> a hydra:ApiDocumentation ; hydra:title "First A" .
+        <http://example.org/doc#b> a hydra:ApiDocumentation ; hydra:title "First B" ."""
+        session = FakeSession(content, '"v1"')
+        store = HttpDataStore(schema_graph=schema_graph, session=session,
+                              cache_region=make_region().configure('dogpile.cache.memory_pickle'))
+        store.create_model('ApiDocumentation', context_uri)
+
+        self.assertEquals(store.get(id=iri + u"#a").title, u"First A")
+        self.assertEquals(store.get(id=iri + u"#b").title, u"First B")
+
+        # Only doc#a is re-cached from the new version
+        session.content = content.replace("First", "Second")
+        session.etag = '"v2"'
+        self.assertEquals(store.get(id=iri + u"#a").title, u"Second A")
+        # doc#b is still revalidated with the old validators
+        self.assertEquals(store.get(id=iri + u"#b").title, u"Second B")
+        self.assertEquals(session.requests[-1]["If-None-Match"], '"v1"')
+
+
+class DocumentSession(object):
+    """Serves Turtle documents. Records the requested IRIs."""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.requested_iris = []
+        self._lock = Lock()
+
+    def get(self, iri, headers=None):
+        with self._lock:
+            self.requested_iris.append(iri)
+        if iri not in self.documents:
+            return FakeResponse(404)
+        return FakeResponse(200, self.documents[iri], {"Content-Type": "text/turtle"})
+
+
+class GetManyTest(TestCase):
+    def test_one_request_per_document(self):
+        template = """@prefix hydra: <http://www.w3.org/ns/hydra/core#> .
+        <%(doc)s#a> a hydra:ApiDocumentation ; hydra:title "%(doc)s A" .
+        <%(doc)s#b> a hydra:ApiDocumentation ; hydra:title "%(doc)s B" ."""
+        docs = [u"http://example.org/doc%d" % i for i in range(5)]
+        session = DocumentSession({doc: template % {"doc": doc} for doc in docs})
+        store = HttpDataStore(schema_graph=schema_graph, session=session, max_workers=3)
+        store.create_model('ApiDocumentation', context_uri)
+
+        ids = [u"%s#%s" % (doc, suffix) for suffix in ["b", "a"] for doc in docs]
+        ids.append(u"http://example.org/missing#a")
+        resources = store.get_many(ids)
+        self.assertEquals(len(resources), len(ids))
+        for id, resource in zip(ids[:-1], resources):
+            self.assertEquals(resource.id, id)
+            self.assertEquals(resource.title, u"%s %s" % (id.split("#")[0], id.split("#")[1].upper()))
+        self.assertTrue(resources[-1] is None)
+        # One request per document
+        self.assertEquals(sorted(session.requested_iris), sorted(docs + [u"http://example.org/missing"]))
+
+        # The worker pool of the store is re-used
+        pool = store._pool
+        self.assertTrue(pool is not None)
+        store.get_many(ids)
+        self.assertTrue(pool is store._pool)
+
+        store.close()
+        self.assertTrue(store._pool is None)
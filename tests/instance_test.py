@@ -264,4 +264,18 @@ class InstanceTest(TestCase):
         for i in range(1, 6):
             child = child_model.new()
             self.assertEquals(child.id, "%s%d#%s" % (child_prefix, i, uri_fragment))
-            print child.id
\ No newline at end of file
+            print child.id
+
+    def test_compact_state(self):
+        tom = child_model.new(old_number_value=3, mid_values={"Hello"}, new_value=u"Tom")
+        tom.save()
+        store_tom = data_store.get(id=tom.id)
+        state = store_tom.__getstate__()
+        # Inherited attributes are pickled only once
+        self.assertEquals(len(state[-1]), 3)
+
+        restored = store_tom.__class__.__new__(store_tom.__class__)
+        restored.__setstate__(state)
+        self.assertEquals(restored.old_number_value, 3)
+        self.assertEquals(restored.mid_values, {"Hello"})
+        self.assertEquals(restored.new_value, u"Tom")
@@ -1,9 +1,10 @@
+from threading import Thread
 from unittest import TestCase
 
 from rdflib import ConjunctiveGraph, URIRef, RDF, BNode, Graph
 
 from oldman import ClientResourceManager, SPARQLDataStore
-from oldman.iri import UUIDFragmentIriGenerator
+from oldman.iri import UUIDFragmentIriGenerator, IncrementalIriGenerator
 from oldman.exception import OMRequiredHashlessIRIError
 from oldman.rest.crud import HashLessCRUDer
 
@@ -81,4 +82,90 @@ class DatatypeTest(TestCase):
         hashless_iri = "http://example.org/doc3"
         crud_controller.update(hashless_iri, ttl, "turtle", allow_new_type=True)
         resource = client_manager.get(hashless_iri=hashless_iri)
-        self.assertEquals(resource.id, hashless_iri + "#this")
\ No newline at end of file
+        self.assertEquals(resource.id, hashless_iri + "#this")
+
+
+class BlockAllocationTest(TestCase):
+
+    def test_hilo(self):
+        graph = Graph()
+        store = SPARQLDataStore(graph, schema_graph=schema_graph)
+        store.create_model("MyClass", context, iri_prefix="http://localhost/objects/", incremental_iri=True,
+                           iri_block_size=3)
+        store_model = store.model_manager.get_model("MyClass")
+
+        iris = [store_model.generate_iri() for _ in range(7)]
+        self.assertEquals(iris, ["http://localhost/objects/%d" % i for i in range(1, 8)])
+        # Three blocks have been reserved
+        counter = graph.value(URIRef(EXAMPLE + "MyClass"), URIRef("urn:oldman:nextNumber"))
+        self.assertEquals(counter.toPython(), 9)
+
+        # Another generator (e.g. in another process) does not re-use the reserved numbers
+        other_generator = IncrementalIriGenerator("http://localhost/objects/", store, EXAMPLE + "MyClass",
+                                                  block_size=3)
+        self.assertEquals(other_generator.generate(), "http://localhost/objects/10")
+        self.assertEquals(store_model.generate_iri(), "http://localhost/objects/8")
+
+    def test_concurrent_generation(self):
+        store = SPARQLDataStore(Graph(), schema_graph=schema_graph)
+        store.create_model("MyClass", context, iri_prefix="http://localhost/objects/", incremental_iri=True,
+                           iri_block_size=5)
+        store_model = store.model_manager.get_model("MyClass")
+
+        iris = []
+        threads = [Thread(target=lambda: iris.extend([store_model.generate_iri() for _ in range(20)]))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEquals(len(set(iris)), 80)
+
+
+class CounterTest(TestCase):
+
+    def test_lock_striping(self):
+        graph = Graph()
+        store1 = SPARQLDataStore(graph, schema_graph=schema_graph)
+        store2 = SPARQLDataStore(graph, schema_graph=schema_graph)
+        other_store = SPARQLDataStore(Graph(), schema_graph=schema_graph)
+        class_iri = EXAMPLE + "MyClass"
+
+        self.assertTrue(store1._get_counter_lock(class_iri) is store2._get_counter_lock(class_iri))
+        self.assertFalse(store1._get_counter_lock(class_iri) is store1._get_counter_lock(EXAMPLE + "Other"))
+        self.assertFalse(store1._get_counter_lock(class_iri) is other_store._get_counter_lock(class_iri))
+
+    def test_lock_free_counter(self):
+        graph = Graph()
+        store = SPARQLDataStore(graph, schema_graph=schema_graph, lock_free_counter=True)
+        class_iri = EXAMPLE + "MyClass"
+        store.check_and_repair_counter(class_iri)
+
+        self.assertEquals([store.generate_instance_number(class_iri) for _ in range(3)], [1, 2, 3])
+        self.assertEquals(store.reserve_instance_numbers(class_iri, 10), 4)
+        self.assertEquals(store.generate_instance_number(class_iri), 14)
+        # Only the last token is kept
+        self.assertEquals(len(list(graph.triples((None, URIRef("urn:oldman:lastReservation"), None)))), 1)
+
+    def test_interleaved_lock_free_reservation(self):
+        store = SPARQLDataStore(Graph(), schema_graph=schema_graph, lock_free_counter=True)
+        other_store = SPARQLDataStore(store._data_graph, schema_graph=schema_graph, lock_free_counter=True)
+        class_iri = EXAMPLE + "MyClass"
+        store.check_and_repair_counter(class_iri)
+
+        # Another reservation happens just after the first update of the store
+        graph_update = store._data_graph.update
+        calls = []
+
+        def update(query):
+            graph_update(query)
+            if len(calls) == 0:
+                calls.append(query)
+                self.assertEquals(other_store.reserve_instance_numbers(class_iri, 5), 6)
+
+        store._data_graph.update = update
+        try:
+            # The first block (1-5) is given up
+            self.assertEquals(store.reserve_instance_numbers(class_iri, 5), 11)
+        finally:
+            del store._data_graph.update
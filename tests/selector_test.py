@@ -0,0 +1,170 @@
+from time import sleep, time
+from unittest import TestCase
+from rdflib import Graph
+from oldman import SPARQLDataStore, ClientResourceManager
+from oldman.store.selector import DataStoreSelector
+from oldman.utils.cursor import build_cursor
+from default_model import schema_graph, context
+
+
+class FakeStore(object):
+    def __init__(self, name, delay=0, error=None):
+        self.name = name
+        self.delay = delay
+        self.error = error
+
+    def filter(self):
+        sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return [self.name]
+
+
+class SelectorTest(TestCase):
+
+    def test_parallel_queries(self):
+        stores = [FakeStore("store%d" % i, delay=0.2) for i in range(5)]
+        selector = DataStoreSelector(stores)
+        start = time()
+        results = dict(selector.map_stores(lambda s: s.filter(), selector.select_stores()))
+        self.assertLess(time() - start, 0.8)
+        self.assertEquals(results, {s: [s.name] for s in stores})
+
+        # The worker pool of the selector is re-used
+        pool = selector._pool
+        dict(selector.map_stores(lambda s: s.filter(), selector.select_stores()))
+        self.assertTrue(pool is not None and pool is selector._pool)
+
+        selector.close()
+        self.assertTrue(selector._pool is None)
+        # A new pool is created when needed
+        results = dict(selector.map_stores(lambda s: s.filter(), selector.select_stores()))
+        self.assertEquals(results, {s: [s.name] for s in stores})
+        selector.close()
+
+    def test_arrival_order(self):
+        slow_store = FakeStore("slow", delay=0.3)
+        fast_store = FakeStore("fast")
+        selector = DataStoreSelector([slow_store, fast_store])
+        stores = [store for store, _ in selector.map_stores(lambda s: s.filter(), selector.select_stores())]
+        self.assertEquals(stores, [fast_store, slow_store])
+
+    def test_timeout(self):
+        slow_store = FakeStore("slow", delay=1)
+        fast_store = FakeStore("fast")
+        selector = DataStoreSelector([slow_store, fast_store], store_timeout=0.2)
+        results = dict(selector.map_stores(lambda s: s.filter(), selector.select_stores()))
+        self.assertEquals(results, {fast_store: ["fast"]})
+
+    def test_error(self):
+        selector = DataStoreSelector([FakeStore("ok"), FakeStore("ko", error=ValueError("ko"))])
+        with self.assertRaises(ValueError):
+            list(selector.map_stores(lambda s: s.filter(), selector.select_stores()))
+
+
+class FederationTest(TestCase):
+
+    def test_filter_and_get(self):
+        stores = []
+        for i in range(2):
+            store = SPARQLDataStore(Graph(), schema_graph=schema_graph)
+            store.create_model("LocalPerson", context, iri_prefix="http://localhost/persons/%d/" % i)
+            stores.append(store)
+
+        # Each person is created in its own store
+        persons = []
+        for store, name in zip(stores, ["Alice", "Bob"]):
+            manager = ClientResourceManager(store)
+            manager.import_store_models()
+            persons.append(manager.get_model("LocalPerson").create(name=name, mboxes={"%s@example.org" % name},
+                                                                  short_bio_en="Hi"))
+
+        federation = ClientResourceManager(stores, store_timeout=10)
+        federation.import_store_models()
+        model = federation.get_model("LocalPerson")
+        self.assertEquals({r.name for r in model.filter()}, {"Alice", "Bob"})
+        self.assertEquals(len(model.filter(limit=1)), 1)
+        for person in persons:
+            self.assertEquals(model.get(id=person.id).name, person.name)
+        self.assertEquals([r.name for r in federation.get_many([p.id for p in persons])], ["Alice", "Bob"])
+
+    def test_ordered_filter(self):
+        stores = []
+        for i in range(2):
+            store = SPARQLDataStore(Graph(), schema_graph=schema_graph)
+            store.create_model("LocalPerson", context, iri_prefix="http://localhost/persons/%d/" % i)
+            stores.append(store)
+
+        # Interleaved names: each store page has to be merged with the other one
+        for store, names in zip(stores, [["Alice", "Carol", "Eve"], ["Bob", "Dave", "Frank"]]):
+            manager = ClientResourceManager(store)
+            manager.import_store_models()
+            for name in names:
+                manager.get_model("LocalPerson").create(name=name, mboxes={"%s@example.org" % name},
+                                                        short_bio_en="Hi")
+
+        federation = ClientResourceManager(stores)
+        federation.import_store_models()
+        model = federation.get_model("LocalPerson")
+        page = model.filter(order_by="name", limit=3)
+        self.assertEquals([r.name for r in page], ["Alice", "Bob", "Carol"])
+        cursor = build_cursor(page[-1], order_by="name")
+        self.assertEquals([r.name for r in model.filter(order_by="name", limit=3, after=cursor)],
+                          ["Dave", "Eve", "Frank"])
+
+        ids = [r.id for r in model.filter(order_by="id")]
+        self.assertEquals(ids, sorted(ids))
+
+
+class RoutingTest(TestCase):
+
+    def test_iri_prefixes(self):
+        stores = [FakeStore("store%d" % i) for i in range(3)]
+        selector = DataStoreSelector(stores)
+        selector.route_iri_prefix("http://example.org/", stores[0])
+        selector.route_iri_prefix("http://example.org/persons/", stores[1])
+
+        self.assertEquals(selector.select_stores(id="http://example.org/persons/alice#me"), [stores[1]])
+        self.assertEquals(selector.select_stores(id="http://example.org/docs/1"), [stores[0]])
+        self.assertEquals(selector.select_stores(hashless_iri="http://example.org/persons/bob"), [stores[1]])
+        # Unknown prefix
+        self.assertEquals(selector.select_stores(id="http://example.com/1"), stores)
+        self.assertEquals(selector.select_stores(), stores)
+
+        ids_by_stores = selector.group_ids_by_stores(["http://example.org/persons/alice", "http://example.org/1",
+                                                      "http://example.com/1"])
+        self.assertEquals(ids_by_stores, {stores[0]: ["http://example.org/1", "http://example.com/1"],
+                                          stores[1]: ["http://example.org/persons/alice", "http://example.com/1"],
+                                          stores[2]: ["http://example.com/1"]})
+
+        with self.assertRaises(Exception):
+            selector.route_iri_prefix("http://example.net/", FakeStore("unknown"))
+
+    def test_types(self):
+        stores = [FakeStore("store%d" % i) for i in range(3)]
+        selector = DataStoreSelector(stores)
+        selector.route_type("http://example.org/Person", stores[2])
+        selector.route_type("http://example.org/Person", stores[0])
+        selector.route_type("http://example.org/Document", stores[1])
+
+        self.assertEquals(selector.select_stores(types=["http://example.org/Person"]), [stores[0], stores[2]])
+        self.assertEquals(selector.select_stores(types=["http://example.org/Document"]), [stores[1]])
+        self.assertEquals(selector.select_stores(types=["http://example.org/Unknown"]), stores)
+
+    def test_federation(self):
+        stores = []
+        for i in range(2):
+            store = SPARQLDataStore(Graph(), schema_graph=schema_graph)
+            store.create_model("LocalPerson", context, iri_prefix="http://localhost/persons/%d/" % i)
+            stores.append(store)
+        manager = ClientResourceManager(stores)
+        manager.import_store_models()
+        person_iri = "http://xmlns.com/foaf/0.1/Person"
+        self.assertEquals(manager.store_selector.select_stores(types=[person_iri]), stores)
+
+        manager.store_selector.route_iri_prefix("http://localhost/persons/1/", stores[1])
+        alice = manager.get_model("LocalPerson").create(id="http://localhost/persons/1/alice", name="Alice",
+                                                        mboxes={"alice@example.org"}, short_bio_en="Hi")
+        self.assertEquals(alice.store, stores[1])
+        self.assertEquals(len(list(stores[0].filter(types=[person_iri]))), 0)
+        self.assertEquals(manager.get(id=alice.id).name, "Alice")
@@ -1,6 +1,9 @@
 import unittest
-from rdflib import URIRef
+from functools import partial
+from rdflib import URIRef, BNode, Literal
+from rdflib.collection import Collection
 from default_model import *
+from oldman.resource.resource import set_compact_json_encoder
 
 
 class SerializationTest(unittest.TestCase):
@@ -32,6 +35,55 @@ class SerializationTest(unittest.TestCase):
         self.assertEquals(bob_jsonld["@context"], context["@context"])
         self.assertEquals(bob_jsonld["types"], lp_model.ancestry_iris)
 
+    def test_compact_json(self):
+        bob = create_bob()
+        compact_json = bob.to_json(compact=True)
+        self.assertFalse("\n" in compact_json)
+        self.assertTrue(len(compact_json) < len(bob.to_json()))
+        self.assertEquals(json.loads(compact_json), json.loads(bob.to_json()))
+        self.assertEquals(json.loads(bob.to_jsonld(compact=True)), json.loads(bob.to_jsonld()))
+
+    def test_compact_json_encoder(self):
+        bob = create_bob()
+        encoded_dicts = []
+
+        def encoder(dct):
+            encoded_dicts.append(dct)
+            return "encoded"
+        set_compact_json_encoder(encoder)
+        try:
+            self.assertEquals(bob.to_jsonld(compact=True), "encoded")
+            self.assertEquals(encoded_dicts[0]["name"], bob_name)
+            # Not concerned
+            self.assertNotEquals(bob.to_jsonld(), "encoded")
+        finally:
+            set_compact_json_encoder(partial(json.dumps, separators=(",", ":")))
+
+    def test_max_depth(self):
+        bob = create_bob()
+        bob.keys = {create_rsa_key(), gpg_model.create(fingerprint=gpg_fingerprint, hex_id=gpg_hex_id)}
+        bob.save()
+
+        bob_dict = bob.to_dict(max_depth=0)
+        self.assertEquals(set(bob_dict["keys"]), {k.id for k in bob.keys})
+        self.assertEquals(json.loads(bob.to_json(max_depth=0))["keys"], bob_dict["keys"])
+
+        # Embedded keys are retrieved within one single bulk call
+        get_many_calls = []
+        original_get_many = client_manager.get_many
+
+        def get_many(ids):
+            get_many_calls.append(ids)
+            return original_get_many(ids)
+        client_manager.get_many = get_many
+        try:
+            bob_jsonld = json.loads(bob.to_jsonld(max_depth=1))
+        finally:
+            del client_manager.get_many
+        self.assertEquals(len(get_many_calls), 1)
+        self.assertEquals({k.get("label") for k in bob_jsonld["keys"]}, {key_label, None})
+        self.assertEquals({k.get("hex_id") for k in bob_jsonld["keys"]}, {gpg_hex_id, None})
+
     def test_rsa_jsonld(self):
         rsa_key = create_rsa_key()
         key_jsonld = json.loads(rsa_key.to_jsonld())
@@ -53,6 +105,68 @@ class SerializationTest(unittest.TestCase):
         self.assertEquals({bio.toPython() for bio in g.objects(bob_uri, URIRef(BIO + "olb"))},
                           {bob_bio_en, bob_bio_fr})
 
+    def test_rdf_special_characters(self):
+        bob = create_bob()
+        name = u'Bob "the builder"\nwith a back\\slash'
+        bob.name = name
+        bio = u'Says "hi"\r\n'
+        bob.short_bio_en = bio
+        bob.save()
+        bob_uri = URIRef(bob.id)
+        for rdf_format in ["nt", "turtle", "xml"]:
+            g = Graph().parse(data=bob.to_rdf(rdf_format), format=rdf_format)
+            self.assertEquals(g.value(bob_uri, URIRef(FOAF + "name")).toPython(), name)
+            self.assertIn(Literal(bio, lang="en"), set(g.objects(bob_uri, URIRef(BIO + "olb"))))
+
+    def test_iter_json(self):
+        bob = create_bob()
+        bob.children = [create_alice(), create_john()]
+        bob.keys = {create_rsa_key(), create_gpg_key()}
+        bob.mboxes = {"bob%d@example.org" % i for i in range(5)}
+        bob.name = u'Bob "the builder"\nwith a back\\slash'
+        bob.save()
+        bob = client_manager.get(id=bob.id)
+        g = Graph().parse(data=u"".join(bob.iter_nt(chunk_size=2)), format="nt")
+        self.assertEquals(g.value(URIRef(bob.id), URIRef(FOAF + "name")).toPython(), bob.name)
+        expected = {max_depth: (json.loads(bob.to_json(max_depth=max_depth)),
+                                json.loads(bob.to_jsonld(max_depth=max_depth)))
+                    for max_depth in [None, 0]}
+        # The keys are embedded
+        self.assertEquals({key.get("label") for key in expected[None][0]["keys"]}, {key_label, None})
+
+        def to_dict(*args, **kwargs):
+            raise AssertionError("The complete dict should not be built")
+        resource_class = bob.__class__
+        resource_class.to_dict = to_dict
+        try:
+            for max_depth, (expected_json, expected_jsonld) in expected.iteritems():
+                chunks = list(bob.iter_json(chunk_size=2, max_depth=max_depth))
+                self.assertTrue(len(chunks) > 2)
+                self.assertEquals(json.loads(u"".join(chunks)), expected_json)
+                self.assertEquals(json.loads(u"".join(bob.iter_jsonld(chunk_size=2, max_depth=max_depth))),
+                                  expected_jsonld)
+        finally:
+            del resource_class.to_dict
+
+    def test_rdf_list_and_blank_node(self):
+        bob = create_bob()
+        alice = create_alice()
+        john = create_john()
+        rsa_key = create_rsa_key()
+        bob.children = [alice, john]
+        bob.keys = {rsa_key}
+        bob.save()
+
+        rdf = bob.to_rdf("nt")
+        self.assertFalse(rsa_key.id in rdf)
+        g = Graph().parse(data=rdf, format="nt")
+        bob_uri = URIRef(bob.id)
+        children = list(Collection(g, g.value(bob_uri, URIRef(REL + "parentOf"))))
+        self.assertEquals(children, [URIRef(alice.id), URIRef(john.id)])
+        key = g.value(bob_uri, URIRef(CERT + "key"))
+        self.assertTrue(isinstance(key, BNode))
+        self.assertEquals(g.value(key, URIRef(RDFS + "label")).toPython(), key_label)
+
     def test_children_jsonld(self):
         bob = create_bob()
         alice = create_alice()
@@ -0,0 +1,124 @@
+import unittest
+from default_model import *
+from oldman.exception import OMUserError
+
+
+class CountingGraph(object):
+    """Counts the update requests sent to the data graph."""
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.update_count = 0
+
+    def __enter__(self):
+        def update(*args, **kwargs):
+            self.update_count += 1
+            return self.graph.__class__.update(self.graph, *args, **kwargs)
+        self.graph.update = update
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        del self.graph.update
+
+
+class SessionTest(unittest.TestCase):
+    def setUp(self):
+        set_up()
+
+    def tearDown(self):
+        tear_down()
+
+    def test_batched_updates(self):
+        with CountingGraph(data_graph) as counter:
+            with data_store.new_session() as session:
+                alice = create_alice()
+                bob = create_bob()
+                john = create_john()
+                self.assertEquals(session.pending_update_count, 3)
+                # Not sent yet
+                self.assertFalse(data_store.exists(alice.id))
+            self.assertEquals(counter.update_count, 1)
+
+        self.assertTrue(data_store.current_session is None)
+        for person in [alice, bob, john]:
+            self.assertTrue(data_store.exists(person.id))
+            self.assertEquals(lp_model.get(id=person.id).name, person.name)
+
+        with CountingGraph(data_graph) as counter:
+            with data_store.new_session():
+                bob.blog = None
+                bob.save()
+                alice.delete()
+                john.delete()
+            self.assertEquals(counter.update_count, 1)
+        self.assertFalse(data_store.exists(alice.id))
+        self.assertFalse(data_store.exists(john.id))
+        self.assertEquals(lp_model.get(id=bob.id).blog, None)
+
+    def test_chunks(self):
+        with CountingGraph(data_graph) as counter:
+            session = data_store.new_session(chunk_size=2).begin()
+            persons = [create_alice(), create_bob(), create_john()]
+            session.flush()
+            self.assertEquals(counter.update_count, 2)
+            for person in persons:
+                self.assertTrue(data_store.exists(person.id))
+            session.commit()
+
+    def test_rollback(self):
+        with self.assertRaises(ValueError):
+            with data_store.new_session():
+                alice = create_alice()
+                raise ValueError("Abort")
+        self.assertTrue(data_store.current_session is None)
+        self.assertFalse(data_store.exists(alice.id))
+        self.assertFalse(data_store.resource_cache.get_resource(alice.id))
+
+    def test_nested_sessions(self):
+        with data_store.new_session():
+            with self.assertRaises(OMUserError):
+                data_store.new_session().begin()
+
+    def test_deferred_invalidation(self):
+        alice = create_alice()
+        bob = create_bob()
+        data_store.get(id=bob.id)
+        self.assertTrue(data_store.resource_cache.get_resource(bob.id))
+
+        with data_store.new_session():
+            alice.friends = {bob}
+            alice.save()
+            # The update has not been sent yet
+            self.assertTrue(data_store.resource_cache.get_resource(bob.id))
+        self.assertFalse(data_store.resource_cache.get_resource(bob.id))
+
+    def test_failed_flush(self):
+        alice = create_alice()
+        bob = create_bob()
+        data_store.get(id=alice.id)
+        data_store.get(id=bob.id)
+        cache = data_store.resource_cache
+        versions = [cache.track_document(person.id.split('#')[0])[0] for person in [alice, bob]]
+
+        with CountingGraph(data_graph) as counter:
+            original_update = data_graph.update
+
+            def update(*args, **kwargs):
+                if counter.update_count >= 1:
+                    raise IOError("Unavailable")
+                return original_update(*args, **kwargs)
+            data_graph.update = update
+
+            with self.assertRaises(IOError):
+                with data_store.new_session(chunk_size=1):
+                    alice.name = u"New Alice"
+                    alice.save()
+                    bob.name = u"New Bob"
+                    bob.save()
+
+        self.assertTrue(data_store.current_session is None)
+        # The first chunk has been applied
+        self.assertEquals(lp_model.get(id=alice.id).name, u"New Alice")
+        self.assertEquals(lp_model.get(id=bob.id).name, bob_name)
+        for person, version in zip([alice, bob], versions):
+            self.assertNotEquals(cache.get_document_version(person.id.split('#')[0]), version)